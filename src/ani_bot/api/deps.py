@@ -3,10 +3,10 @@ from typing import Annotated
 
 from fastapi import Depends
 from sqlmodel import Session
-from ani_bot.core.db import engine
+from ani_bot.core import db as core_db
 
 def get_db() -> Generator[Session, None, None]:
-    with Session(engine) as session:
+    with Session(core_db.engine) as session:
         yield session
 
-SessionDep = Annotated[Session, Depends(get_db)]
\ No newline at end of file
+SessionDep = Annotated[Session, Depends(get_db)]
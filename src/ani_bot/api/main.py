@@ -1,6 +1,10 @@
 from fastapi import APIRouter
-from ani_bot.api.routers import rss
+from ani_bot.api.routers import events, maintenance, profiling, rss, search
 
 
 api_router = APIRouter()
 api_router.include_router(rss.router)
+api_router.include_router(maintenance.router)
+api_router.include_router(search.router)
+api_router.include_router(events.router)
+api_router.include_router(profiling.router)
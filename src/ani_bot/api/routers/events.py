@@ -0,0 +1,47 @@
+from typing import Optional
+from fastapi import APIRouter, Header, Query, Request
+from fastapi.responses import StreamingResponse
+from ani_bot.core.config import settings
+from ani_bot.events import broker
+
+router = APIRouter(prefix="/events", tags=["events"])
+
+
+async def event_stream(request: Request, subscription, heartbeat: float):
+    """SSE 消息流，空闲时发送注释行作为心跳"""
+    with subscription:
+        yield "retry: 3000\n\n"
+        while not await request.is_disconnected():
+            try:
+                event = await subscription.get(timeout=heartbeat)
+            except ConnectionResetError:
+                # 消费过慢被断开，客户端会带 Last-Event-ID 自动重连
+                break
+            yield event.to_sse() if event is not None else ": ping\n\n"
+
+
+@router.get(
+    path="",
+    response_class=StreamingResponse
+)
+async def stream_events(
+    request: Request,
+    types: Optional[str] = Query(default=None, description="逗号分隔的事件类型，如 episode.created,torrent.status"),
+    last_event_id: Optional[int] = Query(default=None),
+    last_event_id_header: Optional[int] = Header(default=None, alias="Last-Event-ID"),
+):
+    """
+    新剧集、新种子与下载状态变化的事件流（Server-Sent Events）
+
+    事件类型：episode.created、torrent.created、torrent.status；
+    续传缓冲区不足时先收到 reset 事件，需通过 API 重新同步。
+    多 worker 部署时事件经事件日志表转发，连接任一 worker 均可，延迟不超过 EVENT_POLL_INTERVAL 秒。
+    """
+    type_set = set(types.split(",")) if types else None
+    resume_from = last_event_id_header if last_event_id_header is not None else last_event_id
+    subscription = broker.subscribe(last_event_id=resume_from, types=type_set)
+    return StreamingResponse(
+        event_stream(request, subscription, settings.EVENT_HEARTBEAT),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
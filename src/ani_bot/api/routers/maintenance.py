@@ -0,0 +1,25 @@
+import asyncio
+from typing import Any
+from fastapi import APIRouter
+from ani_bot.core import db as core_db
+from ani_bot.retention import retention_from_settings
+
+router = APIRouter(prefix="/maintenance", tags=["maintenance"])
+
+
+@router.get(
+    path="/db",
+    response_model=dict
+)
+async def get_db_stats() -> Any:
+    return await asyncio.to_thread(core_db.database_stats)
+
+
+@router.post(
+    path="/db/compact",
+    response_model=dict
+)
+async def compact_db(full: bool = False) -> Any:
+    deleted = await retention_from_settings().run(full_vacuum=full)
+    stats = await asyncio.to_thread(core_db.database_stats)
+    return {"deleted": deleted, "stats": stats}
@@ -0,0 +1,55 @@
+import asyncio
+from typing import Any, Literal
+from fastapi import APIRouter, HTTPException, Query
+from ani_bot.profiling import pipelines, rss_profiler, trace_buffer
+
+router = APIRouter(prefix="/profiling", tags=["profiling"])
+
+
+@router.get(
+    path="/traces",
+    response_model=dict
+)
+def get_traces(limit: int = Query(default=20, ge=1, le=100)) -> Any:
+    """最近几次 RSS 轮询的各源各阶段耗时（fetch/parse/save），新的在前"""
+    traces = trace_buffer.recent(limit)
+    return {"data": [trace.to_dict() for trace in traces], "count": len(trace_buffer)}
+
+
+@router.get(
+    path="/pipelines",
+    response_model=dict
+)
+async def get_pipelines() -> Any:
+    """各流水线每个阶段的排队数量、处理中数量和 worker 数"""
+    return {"data": {name: stats() for name, stats in pipelines.items()}, "count": len(pipelines)}
+
+
+@router.post(
+    path="/rss",
+    response_model=dict
+)
+async def profile_rss(
+    runs: int = Query(default=1, ge=1, le=20),
+    sort: Literal["cumulative", "tottime", "ncalls"] = "cumulative",
+    limit: int = Query(default=50, ge=1, le=500),
+    timeout: float = Query(default=600.0, gt=0),
+) -> Any:
+    """
+    在 cProfile 下执行接下来 runs 次 RSSParseTask.run，返回 pstats 输出
+
+    轮询只在 leader 进程中运行，请求落到其他 worker 时立即返回 503。
+    """
+    if not rss_profiler.attached:
+        raise HTTPException(status_code=503, detail="RSS polling does not run in this process (not the leader).")
+    try:
+        future = rss_profiler.request(runs=runs, sort=sort, limit=limit)
+    except RuntimeError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+
+    try:
+        stats = await asyncio.wait_for(future, timeout)
+    except asyncio.TimeoutError:
+        rss_profiler.cancel()
+        raise HTTPException(status_code=504, detail="No RSS poll ran within the timeout.")
+    return {"runs": runs, "stats": stats}
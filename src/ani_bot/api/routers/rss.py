@@ -2,7 +2,7 @@ from typing import Any
 from fastapi import APIRouter, Depends, HTTPException
 from sqlmodel import select, func
 from ani_bot.api.deps import SessionDep
-from ani_bot.db.models import RSSFeed
+from ani_bot.db.models import FeedHealth, RSSFeed
 from ani_bot.db import crud
 from datetime import datetime, timezone
 
@@ -21,6 +21,17 @@ def get_rss(session: SessionDep, skip: int = 0, limit: int = 100) -> Any:
     return {"data": rss_items, "count": count}
 
 
+@router.get(
+    path="/health",
+    response_model=dict
+)
+def get_rss_health(session: SessionDep, skip: int = 0, limit: int = 100) -> Any:
+    """各 RSS 源的连续失败次数、最近错误、最近成功时间和抓取耗时"""
+    data = crud.list_feed_health(session, skip=skip, limit=limit)
+    count = session.exec(select(func.count()).select_from(FeedHealth)).one()
+    return {"data": data, "count": count}
+
+
 @router.post(
     path="",
     response_model=RSSFeed
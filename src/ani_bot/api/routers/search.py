@@ -0,0 +1,21 @@
+from typing import Any, Literal
+from fastapi import APIRouter, Query
+from ani_bot.api.deps import SessionDep
+from ani_bot.db import search as db_search
+
+router = APIRouter(prefix="/search", tags=["search"])
+
+
+@router.get(
+    path="",
+    response_model=dict
+)
+def search(
+    session: SessionDep,
+    q: str = Query(min_length=1),
+    type: Literal["anime", "episode", "torrent"] = "anime",
+    skip: int = Query(default=0, ge=0),
+    limit: int = Query(default=20, ge=1, le=100),
+) -> Any:
+    data, count = db_search.search(session, q, kind=type, skip=skip, limit=limit)
+    return {"data": data, "count": count}
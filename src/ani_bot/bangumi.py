@@ -0,0 +1,237 @@
+import asyncio
+import json
+import logging
+import re
+import time
+from collections import OrderedDict
+from datetime import date, datetime, timedelta, timezone
+from typing import Any, Dict, Hashable, Iterable, List, Optional, Tuple
+
+import aiohttp
+
+from ani_bot.db import crud
+from ani_bot.db.models import BangumiCache
+
+
+logger = logging.getLogger(__name__)
+
+_MISSING = object()
+
+# Bangumi 条目类型：2 为动画
+SUBJECT_TYPE_ANIME = 2
+
+
+class LRUCache:
+    """带过期时间的内存 LRU 缓存"""
+
+    def __init__(self, maxsize: int = 1024):
+        self.maxsize = maxsize
+        self._data: "OrderedDict[Hashable, Tuple[Any, float]]" = OrderedDict()
+
+    def get(self, key: Hashable, default: Any = _MISSING) -> Any:
+        item = self._data.get(key)
+        if item is None:
+            return default
+        value, expires_at = item
+        if expires_at <= time.time():
+            del self._data[key]
+            return default
+        self._data.move_to_end(key)
+        return value
+
+    def set(self, key: Hashable, value: Any, ttl: float):
+        self._data[key] = (value, time.time() + ttl)
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+
+def anime_keyword(original_title: str) -> str:
+    """从 RSS 标题中提取查询关键字，如 'Mikan Project - 古诺希亚' -> '古诺希亚'"""
+    keyword = re.sub(r"^\s*Mikan Project\s*-\s*", "", original_title)
+    return keyword.strip()
+
+
+class BangumiClient:
+    """Bangumi API (https://bangumi.github.io/api/) 客户端"""
+
+    def __init__(self, base_url: str = "https://api.bgm.tv", timeout: float = 30.0,
+                 user_agent: str = "ani-bot (https://github.com/xueyin123/ani-bot)"):
+        self.base_url = base_url.rstrip("/")
+        self.timeout = aiohttp.ClientTimeout(total=timeout)
+        # Bangumi 要求请求带有可识别的 User-Agent
+        self.headers = {"User-Agent": user_agent}
+        self._session: Optional[aiohttp.ClientSession] = None
+
+    async def _get_session(self) -> aiohttp.ClientSession:
+        if self._session is None or self._session.closed:
+            self._session = aiohttp.ClientSession(timeout=self.timeout, headers=self.headers)
+        return self._session
+
+    async def search_subject(self, keyword: str) -> Optional[Dict[str, Any]]:
+        """按关键字搜索动画条目，返回最匹配的一条"""
+        session = await self._get_session()
+        body = {"keyword": keyword, "filter": {"type": [SUBJECT_TYPE_ANIME]}}
+        async with session.post(f"{self.base_url}/v0/search/subjects", params={"limit": 1}, json=body) as response:
+            response.raise_for_status()
+            data = await response.json()
+        subjects = data.get("data") or []
+        return subjects[0] if subjects else None
+
+    async def get_episodes(self, subject_id: int) -> List[Dict[str, Any]]:
+        """获取条目的本篇剧集列表"""
+        session = await self._get_session()
+        params = {"subject_id": subject_id, "type": 0, "limit": 200}
+        async with session.get(f"{self.base_url}/v0/episodes", params=params) as response:
+            response.raise_for_status()
+            data = await response.json()
+        return data.get("data") or []
+
+    async def close(self):
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+
+
+def _parse_date(value: Optional[str]) -> Optional[datetime]:
+    if not value:
+        return None
+    try:
+        parsed = datetime.fromisoformat(value)
+    except ValueError:
+        return None
+    return parsed if parsed.tzinfo else parsed.replace(tzinfo=timezone.utc)
+
+
+def subject_to_metadata(subject: Dict[str, Any]) -> Dict[str, Any]:
+    """将缓存中的 Bangumi 条目转换为 Anime 字段"""
+    metadata: Dict[str, Any] = {
+        "title": subject.get("name_cn") or subject.get("name") or "",
+        "air_date": _parse_date(subject.get("date")),
+        "total_episodes": subject.get("eps") or subject.get("total_episodes") or 0,
+    }
+    metadata = {key: value for key, value in metadata.items() if value}
+    # 已无待播出的剧集时清空，避免按过去的日期反复刷新
+    metadata["next_air_date"] = _parse_date(subject.get("next_air_date"))
+    return metadata
+
+
+class BangumiEnricher:
+    """
+    Anime 元数据补全
+
+    查询顺序：内存 LRU -> SQLite 缓存 (BangumiCache) -> Bangumi API。
+    同一批次内的关键字先去重，缓存未命中的关键字以有限并发查询，结果批量写回。
+    未匹配的关键字以较短的 TTL 负缓存，避免每轮轮询重复查询。
+    """
+
+    def __init__(self,
+                 client: BangumiClient,
+                 ttl: float = 86400.0,
+                 negative_ttl: float = 21600.0,
+                 concurrency: int = 4,
+                 batch_size: int = 100,
+                 lru_size: int = 1024,
+        ):
+        self.client = client
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self.batch_size = batch_size
+        self.lru = LRUCache(lru_size)
+        self._semaphore = asyncio.Semaphore(concurrency)
+
+    async def _lookup(self, keyword: str) -> Optional[Dict[str, Any]]:
+        async with self._semaphore:
+            subject = await self.client.search_subject(keyword)
+            if subject is None:
+                return None
+
+            # 计算下一集播出日期
+            today = date.today().isoformat()
+            episodes = await self.client.get_episodes(subject["id"])
+            upcoming = sorted(ep["airdate"] for ep in episodes if ep.get("airdate") and ep["airdate"] >= today)
+            return {
+                "id": subject["id"],
+                "name": subject.get("name", ""),
+                "name_cn": subject.get("name_cn", ""),
+                "date": subject.get("date"),
+                "eps": subject.get("eps") or subject.get("total_episodes") or len(episodes),
+                "next_air_date": upcoming[0] if upcoming else None,
+            }
+
+    async def resolve_many(self, keywords: List[str], refresh: Iterable[str] = ()) -> Dict[str, Optional[Dict[str, Any]]]:
+        """批量解析关键字，返回 关键字 -> 条目（未匹配为 None）；refresh 中的关键字跳过缓存重新查询"""
+        refresh = set(refresh)
+        results: Dict[str, Optional[Dict[str, Any]]] = {}
+        pending = []
+        for keyword in dict.fromkeys(keywords):
+            cached = self.lru.get(keyword) if keyword not in refresh else _MISSING
+            if cached is _MISSING:
+                pending.append(keyword)
+            else:
+                results[keyword] = cached
+
+        if not pending:
+            return results
+
+        stored = await crud.get_bangumi_cache([keyword for keyword in pending if keyword not in refresh])
+        misses = []
+        for keyword in pending:
+            entry = stored.get(keyword)
+            if entry is None:
+                misses.append(keyword)
+                continue
+            subject = json.loads(entry.data) if entry.subject_id is not None else None
+            remaining = 0.0
+            if entry.expires_at is not None:
+                # SQLite 读回的时间不带时区，按 UTC 处理
+                expires_at = entry.expires_at
+                if expires_at.tzinfo is None:
+                    expires_at = expires_at.replace(tzinfo=timezone.utc)
+                remaining = expires_at.timestamp() - time.time()
+            self.lru.set(keyword, subject, max(remaining, 0))
+            results[keyword] = subject
+
+        lookups = await asyncio.gather(*(self._lookup(keyword) for keyword in misses), return_exceptions=True)
+
+        now = crud.utcnow()
+        entries = []
+        for keyword, subject in zip(misses, lookups):
+            if isinstance(subject, BaseException):
+                # 网络错误不缓存，下一轮重试
+                logger.warning(f"Bangumi 查询 {keyword} 失败: {subject}")
+                continue
+            ttl = self.ttl if subject is not None else self.negative_ttl
+            entries.append(BangumiCache(
+                keyword=keyword,
+                subject_id=subject["id"] if subject is not None else None,
+                data=json.dumps(subject or {}, ensure_ascii=False),
+                fetched_at=now,
+                expires_at=now + timedelta(seconds=ttl),
+            ))
+            self.lru.set(keyword, subject, ttl)
+            results[keyword] = subject
+
+        await crud.save_bangumi_cache(entries)
+        return results
+
+    async def run(self):
+        """补全尚无元数据的动漫，刷新连载中已过期或有新一集播出的动漫"""
+        animes = await crud.get_animes_to_enrich(self.batch_size)
+        if not animes:
+            return
+
+        keywords = {anime.id: anime_keyword(anime.original_title) for anime in animes}
+        # 已补全的动漫被选中说明缓存过期或已过时，不再使用缓存
+        refresh = {keywords[anime.id] for anime in animes if anime.title}
+        subjects = await self.resolve_many([keyword for keyword in keywords.values() if keyword], refresh=refresh)
+
+        metadata = {}
+        for anime_id, keyword in keywords.items():
+            subject = subjects.get(keyword)
+            if subject is not None:
+                metadata[anime_id] = subject_to_metadata(subject)
+        await crud.update_anime_metadata(metadata)
@@ -75,6 +75,40 @@ class AniBotCLI:
             print(f"删除RSS失败: {e}")
             return None
 
+    def search(self, keyword: str, search_type: str = "anime", skip: int = 0, limit: int = 20):
+        """全文搜索动漫/剧集/种子"""
+        url = f"{self.base_url}/search"
+        params = {"q": keyword, "type": search_type, "skip": skip, "limit": limit}
+        try:
+            response = requests.get(url, params=params)
+            response.raise_for_status()
+            return response.json()
+        except requests.exceptions.RequestException as e:
+            print(f"搜索失败: {e}")
+            return None
+
+    def db_stats(self):
+        """获取数据库大小统计"""
+        url = f"{self.base_url}/maintenance/db"
+        try:
+            response = requests.get(url)
+            response.raise_for_status()
+            return response.json()
+        except requests.exceptions.RequestException as e:
+            print(f"获取数据库统计失败: {e}")
+            return None
+
+    def db_compact(self, full: bool = False):
+        """清理过期数据并压缩数据库"""
+        url = f"{self.base_url}/maintenance/db/compact"
+        try:
+            response = requests.post(url, params={"full": full})
+            response.raise_for_status()
+            return response.json()
+        except requests.exceptions.RequestException as e:
+            print(f"压缩数据库失败: {e}")
+            return None
+
 
 def main():
     parser = argparse.ArgumentParser(description="Ani-Bot CLI 客户端")
@@ -120,6 +154,20 @@ def main():
     delete_parser = rss_subparsers.add_parser('delete', help='删除RSS')
     delete_parser.add_argument('id', type=int, help='RSS ID')
     
+    # 搜索
+    search_parser = subparsers.add_parser('search', help='搜索动漫/剧集/种子')
+    search_parser.add_argument('keyword', help='关键字')
+    search_parser.add_argument('--type', choices=['anime', 'episode', 'torrent'], default='anime', help='搜索类型')
+    search_parser.add_argument('--skip', type=int, default=0, help='跳过的条目数')
+    search_parser.add_argument('--limit', type=int, default=20, help='限制返回的条目数')
+    
+    # 数据库维护命令
+    db_parser = subparsers.add_parser('db', help='数据库维护命令')
+    db_subparsers = db_parser.add_subparsers(dest='db_action', help='数据库操作')
+    db_subparsers.add_parser('stats', help='查看各表大小')
+    compact_parser = db_subparsers.add_parser('compact', help='清理过期数据并压缩数据库')
+    compact_parser.add_argument('--full', action='store_true', help='执行完整 VACUUM')
+    
     args = parser.parse_args()
     
     cli = AniBotCLI(base_url=args.base_url)
@@ -172,6 +220,20 @@ def main():
             result = cli.delete_rss(args.id)
             if result:
                 print(json.dumps(result, indent=2, ensure_ascii=False))
+    elif args.command == 'search':
+        result = cli.search(args.keyword, search_type=args.type, skip=args.skip, limit=args.limit)
+        if result:
+            print(json.dumps(result, indent=2, ensure_ascii=False))
+    elif args.command == 'db':
+        if args.db_action == 'stats':
+            result = cli.db_stats()
+        elif args.db_action == 'compact':
+            result = cli.db_compact(full=args.full)
+        else:
+            db_parser.print_help()
+            result = None
+        if result:
+            print(json.dumps(result, indent=2, ensure_ascii=False))
     else:
         parser.print_help()
 
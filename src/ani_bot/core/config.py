@@ -27,6 +27,62 @@ class Settings(BaseSettings):
 
     FRONTEND_HOST: str = "http://localhost:5173"
 
+    # 数据库：默认使用 resources/anime.db；设置 DATABASE_URL 或 POSTGRES_SERVER 后改用 PostgreSQL
+    # 多个节点共享同一份数据时需使用 PostgreSQL（SQLite 同一时刻只允许一个写入者），需安装 psycopg
+    DATABASE_URL: str = ""
+    POSTGRES_SERVER: str = ""
+    POSTGRES_PORT: int = 5432
+    POSTGRES_USER: str = "postgres"
+    POSTGRES_PASSWORD: str = ""
+    POSTGRES_DB: str = "ani_bot"
+    # 连接池：常驻连接数、高峰额外连接数、等待空闲连接的秒数、连接最长复用秒数
+    DB_POOL_SIZE: int = 10
+    DB_MAX_OVERFLOW: int = 10
+    DB_POOL_TIMEOUT: float = 30.0
+    DB_POOL_RECYCLE: int = 1800
+
+    @computed_field  # type: ignore[prop-decorator]
+    @property
+    def SQLALCHEMY_DATABASE_URI(self) -> str | None:
+        if self.DATABASE_URL:
+            return self.DATABASE_URL
+        if not self.POSTGRES_SERVER:
+            return None
+        return str(PostgresDsn.build(
+            scheme="postgresql+psycopg",
+            username=self.POSTGRES_USER,
+            password=self.POSTGRES_PASSWORD or None,
+            host=self.POSTGRES_SERVER,
+            port=self.POSTGRES_PORT,
+            path=self.POSTGRES_DB,
+        ))
+
+    # 多 worker 部署时仅由持有租约的进程运行后台任务
+    LEADER_LEASE_NAME: str = "scheduler"
+    LEADER_LEASE_TTL: float = 30.0
+
+    # 持久化任务队列
+    JOB_WORKERS: int = 4
+    JOB_BATCH_SIZE: int = 10
+    JOB_VISIBILITY_TIMEOUT: float = 300.0
+    JOB_POLL_INTERVAL: float = 2.0
+    TORRENT_CACHE_DIR: str = "./torrents"
+
+    # Bangumi 元数据
+    BANGUMI_API_URL: str = "https://api.bgm.tv"
+    BANGUMI_CACHE_TTL: float = 86400.0
+    BANGUMI_NEGATIVE_CACHE_TTL: float = 21600.0
+    BANGUMI_CONCURRENCY: int = 4
+    BANGUMI_ENRICH_INTERVAL: float = 300.0
+
+    # 蜜柑爬虫，发现的 RSS 源默认不启用，需手动开启
+    MIKAN_BASE_URL: str = "https://mikanime.tv"
+    MIKAN_CRAWL_INTERVAL: float = 6 * 3600
+    MIKAN_CRAWL_CONCURRENCY: int = 8
+    MIKAN_CRAWL_PER_HOST: int = 4
+    MIKAN_CRAWL_DELAY: float = 0.1
+    MIKAN_FEEDS_ENABLED: bool = False
+
     BACKEND_CORS_ORIGINS: Annotated[
         list[AnyUrl] | str, BeforeValidator(parse_cors)
     ] = []
@@ -43,13 +99,104 @@ class Settings(BaseSettings):
     def API_BASE_URL(self) -> str:
         return f"http://localhost:{self.API_PORT}{self.API_V1_STR}"
 
+    # 媒体库整理：link 硬链接（保持做种）或 rename 移动，均不复制文件
+    LIBRARY_PATH: str = "./library"
+    ORGANIZE_MODE: Literal["link", "rename"] = "link"
+    ORGANIZE_INTERVAL: float = 60.0
+    DOWNLOAD_POLL_INTERVAL: float = 30.0
+
+    # 数据保留与压缩
+    RETENTION_INTERVAL: float = 24 * 3600
+    RETENTION_SUPERSEDED_TORRENTS: bool = True
+    RETENTION_DROPPED_DAYS: int | None = 90
+    RETENTION_HISTORY_DAYS: int | None = 7
+    RETENTION_TOMBSTONE_DAYS: int | None = 180  # 需长于 RSS 源保留条目的时间，否则已清理的种子会重新入库
+    RETENTION_BATCH_SIZE: int = 500
+    RETENTION_VACUUM_PAGES: int | None = None
+
+    # 事件推送（SSE）：续传缓冲区大小、每个订阅者的队列长度、心跳间隔、从事件日志表拉取其他进程事件的间隔
+    EVENT_HISTORY_SIZE: int = 2000
+    EVENT_QUEUE_SIZE: int = 500
+    EVENT_HEARTBEAT: float = 15.0
+    EVENT_POLL_INTERVAL: float = 1.0
+
+    # 通知：收集窗口内的事件合并为一份摘要，每个渠道独立限速（period 秒内最多 rate 份）
+    NOTIFY_EVENTS: Annotated[list[str] | str, BeforeValidator(parse_cors)] = ["episode.created"]
+    NOTIFY_WINDOW: float = 30.0
+    NOTIFY_RATE: int = 10
+    NOTIFY_RATE_PERIOD: float = 3600.0
+    NOTIFY_RETRIES: int = 3
+    NOTIFY_WEBHOOK_URL: str = ""
+    NOTIFY_EMAIL_TO: Annotated[list[str] | str, BeforeValidator(parse_cors)] = []
+    SMTP_HOST: str = ""
+    SMTP_PORT: int = 587
+    SMTP_USER: str = ""
+    SMTP_PASSWORD: str = ""
+    SMTP_TLS: bool = True
+    SMTP_SSL: bool = False
+    EMAILS_FROM_EMAIL: str = ""
+
+    # 轮询阶段耗时报告保留的次数
+    TRACE_HISTORY_SIZE: int = 100
+
+    # RSS 轮询流水线：各阶段 worker 数、阶段间队列长度；停止时等待当前轮询结束的秒数
+    RSS_FETCH_WORKERS: int = 8
+    RSS_PARSE_WORKERS: int = 2
+    RSS_SAVE_WORKERS: int = 1
+    RSS_QUEUE_SIZE: int = 16
+    SCHEDULER_STOP_TIMEOUT: float = 10.0
+    # 解析结果先进入写缓冲，攒够条数或等待超时后在一个事务中提交
+    RSS_WRITE_BATCH_SIZE: int = 50
+    RSS_WRITE_DELAY: float = 1.0
+
+    # RSS 源熔断：连续失败 N 次后指数退避重试，源自身连续失效（404/410、无法解析）过多则自动停用；
+    # 同一站点的源同时故障不计入
+    RSS_FETCH_TIMEOUT: float = 30.0
+    FEED_FAILURE_THRESHOLD: int = 3
+    FEED_BACKOFF_BASE: float = 600.0
+    FEED_BACKOFF_MAX: float = 6 * 3600
+    FEED_DISABLE_AFTER: int | None = 20
+
+    # 择优下载：同一集的多个版本（字幕组、分辨率、v2）只下载得分最高的一个，
+    # 更好的版本出现时替换尚未开始下载的版本。按 RELEASE_PRIORITY 的顺序逐项比较
+    RELEASE_SELECTION: bool = True
+    RELEASE_PRIORITY: Annotated[list[str] | str, BeforeValidator(parse_cors)] = ["resolution", "group", "version", "size"]
+    RELEASE_GROUPS: Annotated[list[str] | str, BeforeValidator(parse_cors)] = []  # 偏好的字幕组，靠前优先
+    RELEASE_EXCLUDED_GROUPS: Annotated[list[str] | str, BeforeValidator(parse_cors)] = []
+    RELEASE_RESOLUTIONS: Annotated[list[int] | str, BeforeValidator(parse_cors)] = [1080, 2160, 720]
+    RELEASE_PREFER_SMALLER: bool = False
+    RELEASE_MIN_SIZE: int = 0  # 字节
+    RELEASE_MAX_SIZE: int | None = None
+
+    # BT 客户端：qbittorrent 或 transmission
+    BT_CLIENT: Literal["qbittorrent", "transmission"] = "qbittorrent"
+    TRANSMISSION_URL: str = "http://localhost:9091/transmission/rpc"
+    TRANSMISSION_USERNAME: str = ""
+    TRANSMISSION_PASSWORD: str = ""
+    QBITTORRENT_URL: str = "http://localhost:8080"
+    QBITTORRENT_USERNAME: str = "admin"
+    QBITTORRENT_PASSWORD: str = "adminadmin"
+    # BT 客户端所在主机上的下载目录；留空时使用客户端自己的默认目录
+    DOWNLOAD_DIR: str = ""
+
+    @computed_field  # type: ignore[prop-decorator]
+    @property
+    def transmission_config(self) -> dict:
+        return {
+            "url": self.TRANSMISSION_URL,
+            "username": self.TRANSMISSION_USERNAME,
+            "password": self.TRANSMISSION_PASSWORD,
+            "download.save_path": self.DOWNLOAD_DIR or None,
+        }
+
     @computed_field  # type: ignore[prop-decorator]
     @property
     def qbittorrent_config(self) -> dict:
         return {
-            "url": "http://localhost:8080",
-            "username": "admin",
-            "password": "adminadmin",
+            "url": self.QBITTORRENT_URL,
+            "username": self.QBITTORRENT_USERNAME,
+            "password": self.QBITTORRENT_PASSWORD,
+            "download.save_path": self.DOWNLOAD_DIR or None,
         }
 
 settings = Settings()
\ No newline at end of file
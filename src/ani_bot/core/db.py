@@ -1,13 +1,46 @@
 from contextlib import asynccontextmanager, contextmanager
+from typing import Any, Dict, Optional, Tuple
+from sqlalchemy import URL, func, inspect, make_url, select
+from sqlalchemy.engine import Engine
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.schema import CreateColumn, DDLElement
 from sqlmodel import SQLModel, Session, create_engine
 
+from ani_bot.core.config import settings
 
 import os
 
 database_path = os.path.join(os.path.dirname(os.path.dirname(__file__)), "resources", "anime.db")
 # 确保目录存在
 os.makedirs(os.path.dirname(database_path), exist_ok=True)
-engine = create_engine(f"sqlite:///{database_path}")
+
+
+def engine_options(url: str) -> Tuple[URL, Dict[str, Any]]:
+    """补全数据库驱动并设置连接池参数"""
+    url = make_url(url)
+    if url.get_backend_name() != "postgresql":
+        return url, {}
+    if url.drivername == "postgresql":
+        url = url.set(drivername="postgresql+psycopg")
+    return url, dict(
+        pool_size=settings.DB_POOL_SIZE,
+        max_overflow=settings.DB_MAX_OVERFLOW,
+        pool_timeout=settings.DB_POOL_TIMEOUT,
+        pool_recycle=settings.DB_POOL_RECYCLE,
+        # 取出连接前先探测，数据库重启或网络中断后自动重连
+        pool_pre_ping=True,
+        # 读回的时间统一为 UTC，与 crud.utcnow() 一致
+        connect_args={"options": "-c timezone=UTC"},
+    )
+
+
+def create_db_engine(url: str) -> Engine:
+    url, options = engine_options(url)
+    return create_engine(url, **options)
+
+
+engine = create_db_engine(settings.SQLALCHEMY_DATABASE_URI or f"sqlite:///{database_path}")
 
 @contextmanager
 def session_scope():
@@ -38,6 +71,104 @@ async def async_session_scope():
     finally:
         db.close()
 
+class AddColumn(DDLElement):
+    """ALTER TABLE ... ADD COLUMN"""
+
+    def __init__(self, table, column):
+        self.table = table
+        self.column = column
+
+
+@compiles(AddColumn)
+def _compile_add_column(element: AddColumn, compiler, **kw) -> str:
+    table = compiler.preparer.format_table(element.table)
+    return f"ALTER TABLE {table} ADD COLUMN {compiler.process(CreateColumn(element.column))}"
+
+
 def init_db():
     """创建所有数据库表"""
-    SQLModel.metadata.create_all(bind=engine)
\ No newline at end of file
+    if engine.dialect.name == "sqlite":
+        # 新建的数据库启用增量 vacuum；已有数据库需执行一次完整 VACUUM 才会生效
+        with engine.connect() as conn:
+            conn.exec_driver_sql("PRAGMA auto_vacuum=INCREMENTAL")
+    SQLModel.metadata.create_all(bind=engine)
+    # create_all 不会给已有的表补建新增的列和索引；新增的非空列需设置 server_default
+    existing = inspect(engine)
+    with engine.begin() as conn:
+        for table in SQLModel.metadata.sorted_tables:
+            columns = {column["name"] for column in existing.get_columns(table.name)}
+            for column in table.columns:
+                if column.name not in columns:
+                    conn.execute(AddColumn(table, column))
+    for table in SQLModel.metadata.sorted_tables:
+        for index in table.indexes:
+            index.create(bind=engine, checkfirst=True)
+
+    from ani_bot.db.search import init_search
+    init_search(engine)
+
+
+def database_stats() -> Dict[str, Any]:
+    """数据库大小统计：各表行数、占用字节数（SQLite 需支持 dbstat）以及空闲页（仅 SQLite）"""
+    stats: Dict[str, Any] = {"dialect": engine.dialect.name, "tables": {}}
+    with engine.connect() as conn:
+        for table in SQLModel.metadata.sorted_tables:
+            count = conn.execute(select(func.count()).select_from(table)).scalar_one()
+            stats["tables"][table.name] = {"rows": count}
+
+        if engine.dialect.name == "postgresql":
+            stats["size_bytes"] = conn.exec_driver_sql("SELECT pg_database_size(current_database())").scalar_one()
+            for name, table_stats in stats["tables"].items():
+                table_stats["bytes"] = conn.execute(
+                    select(func.pg_total_relation_size(name))
+                ).scalar_one()
+            return stats
+        if engine.dialect.name != "sqlite":
+            return stats
+
+        page_size = conn.exec_driver_sql("PRAGMA page_size").scalar_one()
+        page_count = conn.exec_driver_sql("PRAGMA page_count").scalar_one()
+        freelist_count = conn.exec_driver_sql("PRAGMA freelist_count").scalar_one()
+        auto_vacuum = conn.exec_driver_sql("PRAGMA auto_vacuum").scalar_one()
+        stats.update(
+            size_bytes=page_size * page_count,
+            free_bytes=page_size * freelist_count,
+            auto_vacuum={0: "none", 1: "full", 2: "incremental"}.get(auto_vacuum, str(auto_vacuum)),
+        )
+
+        try:
+            rows = conn.exec_driver_sql("SELECT name, SUM(pgsize) FROM dbstat GROUP BY name").all()
+        except OperationalError:
+            return stats  # 未编译 dbstat 扩展
+        for name, size in rows:
+            if name in stats["tables"]:
+                stats["tables"][name]["bytes"] = size
+    return stats
+
+
+def compact_database(full: bool = False, pages: Optional[int] = None) -> None:
+    """
+    回收空闲页并更新查询统计
+
+    Args:
+        full: 执行完整 VACUUM（重写整个数据库，同时切换为增量 vacuum 模式）
+        pages: 增量 vacuum 最多回收的页数，None 表示全部
+    """
+    if engine.dialect.name == "postgresql":
+        # 空闲空间由 autovacuum 回收，这里在批量清理后立即回收并更新统计；FULL 会锁表重写
+        with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+            conn.exec_driver_sql("VACUUM (FULL, ANALYZE)" if full else "VACUUM (ANALYZE)")
+        return
+    if engine.dialect.name != "sqlite":
+        return
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+        if full:
+            conn.exec_driver_sql("PRAGMA auto_vacuum=INCREMENTAL")
+            conn.exec_driver_sql("VACUUM")
+        else:
+            # incremental_vacuum 每一步回收一页，需要取完结果才会执行完毕
+            pragma = "PRAGMA incremental_vacuum" if pages is None else f"PRAGMA incremental_vacuum({int(pages)})"
+            result = conn.exec_driver_sql(pragma)
+            if result.returns_rows:
+                result.fetchall()
+        conn.exec_driver_sql("ANALYZE")
\ No newline at end of file
@@ -0,0 +1,180 @@
+import asyncio
+import html
+import logging
+import re
+import time
+from contextlib import asynccontextmanager
+from datetime import date, timedelta
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import urlencode, urljoin, urlsplit
+
+import aiohttp
+
+from ani_bot.db import crud
+from ani_bot.db.models import CrawlURL, RSSFeed
+
+
+logger = logging.getLogger(__name__)
+
+# 蜜柑计划页面中的链接，正则提取比构建完整 DOM 快一个数量级
+_BANGUMI_LINK = re.compile(r'href="/Home/Bangumi/(\d+)"')
+_BANGUMI_TITLE = re.compile(r'<p class="bangumi-title">\s*([^<]+?)\s*<')
+_PAGE_TITLE = re.compile(r'<title>\s*Mikan Project\s*-\s*([^<]+?)\s*</title>')
+_BANGUMI_RSS = re.compile(r'href="(/RSS/Bangumi\?bangumiId=\d+)"')
+
+
+def season_url(base_url: str, today: Optional[date] = None) -> str:
+    """当前季度番组列表页，如 ?year=2026&seasonStr=秋"""
+    today = today or date.today()
+    season = ["冬", "春", "夏", "秋"][(today.month - 1) // 3]
+    query = urlencode({"year": today.year, "seasonStr": season})
+    return f"{base_url.rstrip('/')}/Home/BangumiCoverFlowByDayOfWeek?{query}"
+
+
+def extract_bangumi_links(base_url: str, page: str) -> List[str]:
+    """从季度列表页提取番组页面链接"""
+    ids = dict.fromkeys(_BANGUMI_LINK.findall(page))
+    return [f"{base_url.rstrip('/')}/Home/Bangumi/{bangumi_id}" for bangumi_id in ids]
+
+
+def extract_bangumi_feed(page_url: str, page: str) -> Optional[RSSFeed]:
+    """从番组页面提取番组名称与（全字幕组）RSS 链接"""
+    rss = _BANGUMI_RSS.search(page)
+    if rss is None:
+        return None
+    title = _BANGUMI_TITLE.search(page) or _PAGE_TITLE.search(page)
+    return RSSFeed(
+        name=html.unescape(title.group(1)) if title else "",
+        url=urljoin(page_url, html.unescape(rss.group(1))),
+        site_url=page_url,
+        category="mikan",
+    )
+
+
+class HostLimiter:
+    """按主机限制并发数和请求间隔"""
+
+    def __init__(self, per_host: int = 2, delay: float = 0.1):
+        self.per_host = per_host
+        self.delay = delay
+        self._semaphores: Dict[str, asyncio.Semaphore] = {}
+        self._locks: Dict[str, asyncio.Lock] = {}
+        self._next_at: Dict[str, float] = {}
+
+    @asynccontextmanager
+    async def slot(self, url: str):
+        host = urlsplit(url).netloc
+        semaphore = self._semaphores.setdefault(host, asyncio.Semaphore(self.per_host))
+        lock = self._locks.setdefault(host, asyncio.Lock())
+        async with semaphore:
+            async with lock:
+                wait = self._next_at.get(host, 0.0) - time.monotonic()
+                if wait > 0:
+                    await asyncio.sleep(wait)
+                self._next_at[host] = time.monotonic() + self.delay
+            yield
+
+
+class MikanCrawler:
+    """
+    蜜柑计划爬虫，自动发现番组与 RSS 源
+
+    季度列表页 -> 番组页 -> RSS 链接。待抓取 URL 保存在 CrawlURL 表中，
+    重启后继续；重复抓取时带上 ETag/Last-Modified 条件请求，未变化的页面直接跳过。
+    新发现的 RSS 源按批次写入 RSSFeed 表。
+    """
+
+    def __init__(self,
+                 base_url: str = "https://mikanime.tv",
+                 seeds: Optional[List[str]] = None,
+                 concurrency: int = 8,
+                 per_host: int = 4,
+                 delay: float = 0.1,
+                 batch_size: int = 50,
+                 timeout: float = 30.0,
+                 recrawl_interval: Optional[Dict[str, float]] = None,
+                 feeds_enabled: bool = False,
+        ):
+        self.base_url = base_url.rstrip("/")
+        self.seeds = seeds
+        self.batch_size = batch_size
+        self.timeout = aiohttp.ClientTimeout(total=timeout)
+        self.limiter = HostLimiter(per_host=per_host, delay=delay)
+        self.recrawl_interval = {"season": 6 * 3600, "bangumi": 7 * 86400, **(recrawl_interval or {})}
+        self.feeds_enabled = feeds_enabled
+        self._semaphore = asyncio.Semaphore(concurrency)
+
+    async def fetch(self, session: aiohttp.ClientSession, entry: CrawlURL) -> Optional[str]:
+        """条件请求页面，未修改时返回 None"""
+        headers = {}
+        if entry.etag:
+            headers["If-None-Match"] = entry.etag
+        if entry.last_modified:
+            headers["If-Modified-Since"] = entry.last_modified
+
+        async with self._semaphore, self.limiter.slot(entry.url):
+            async with session.get(entry.url, headers=headers) as response:
+                if response.status == 304:
+                    return None
+                response.raise_for_status()
+                entry.etag = response.headers.get("ETag", "")
+                entry.last_modified = response.headers.get("Last-Modified", "")
+                return await response.text()
+
+    async def crawl(self, session: aiohttp.ClientSession, entry: CrawlURL) -> Tuple[List[str], List[RSSFeed]]:
+        """抓取单个页面，返回 (新链接, 新RSS源)，并更新 entry 的状态"""
+        now = crud.utcnow()
+        interval = self.recrawl_interval.get(entry.kind, 86400)
+        try:
+            page = await self.fetch(session, entry)
+        except Exception as e:
+            logger.warning(f"抓取 {entry.url} 失败: {e}")
+            entry.status = "failed"
+            entry.error = str(e)[:1000]
+            entry.next_crawl_at = now + timedelta(seconds=min(interval, 3600))
+            return [], []
+
+        entry.last_crawled = now
+        entry.next_crawl_at = now + timedelta(seconds=interval)
+        entry.error = ""
+        if page is None:
+            entry.status = "not_modified"
+            return [], []
+
+        entry.status = "ok"
+        if entry.kind == "season":
+            return extract_bangumi_links(self.base_url, page), []
+        if entry.kind == "bangumi":
+            feed = extract_bangumi_feed(entry.url, page)
+            return [], [feed] if feed is not None else []
+        return [], []
+
+    async def run(self):
+        """抓取所有到期页面"""
+        seeds = self.seeds or [season_url(self.base_url)]
+        await crud.add_crawl_urls({url: "season" for url in seeds}, due=True)
+
+        added = 0
+        async with aiohttp.ClientSession(timeout=self.timeout) as session:
+            while True:
+                entries = await crud.get_due_crawl_urls(self.batch_size)
+                if not entries:
+                    break
+
+                results = await asyncio.gather(*(self.crawl(session, entry) for entry in entries))
+
+                links: Dict[str, str] = {}
+                feeds: List[RSSFeed] = []
+                for links_, feeds_ in results:
+                    links.update((link, "bangumi") for link in links_)
+                    feeds.extend(feeds_)
+                for feed in feeds:
+                    feed.enabled = self.feeds_enabled
+
+                await crud.save_crawl_urls(entries)
+                await crud.add_crawl_urls(links)
+                added += await crud.add_rss_feeds(feeds)
+
+        if added:
+            logger.info(f"蜜柑爬虫发现 {added} 个新 RSS 源")
+        return added
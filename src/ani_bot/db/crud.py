@@ -1,8 +1,93 @@
-from typing import List, Optional, Sequence
-from sqlmodel import Session, select
+import functools
+import json
+import uuid
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+from sqlalchemy import and_, case, delete, or_, union_all, update
+from sqlalchemy import inspect as sa_inspect
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlmodel import Session, SQLModel, select
 
+from ani_bot import release
 from ani_bot.core.db import session_scope
-from .models import RSSFeed, Anime, Episode, Torrent
+from ani_bot.events import Event, broker
+from ani_bot.profiling import to_thread
+from .models import ParsedAnime, ParsedEpisode, ParsedTorrent
+from .models import RSSFeed, Anime, Episode, Torrent, PrunedTorrent, Lease, Job, BangumiCache, CrawlURL, OrganizeOp, FeedHealth, EventLog
+
+
+def utcnow() -> datetime:
+    """当前 UTC 时间（带时区），多节点间比较时间时统一使用"""
+    return datetime.now(timezone.utc)
+
+
+def _as_utc(value: Optional[datetime]) -> Optional[datetime]:
+    """SQLite 读回的时间不带时区，按 UTC 处理"""
+    if value is not None and value.tzinfo is None:
+        return value.replace(tzinfo=timezone.utc)
+    return value
+
+
+def _in_thread(func):
+    """
+    同步的数据库操作包装为协程，在线程中执行
+
+    会话 IO 不阻塞事件循环，并发调用各自占用连接池中的一个连接。
+    """
+    @functools.wraps(func)
+    async def wrapper(*args, **kwargs):
+        return await to_thread(func, *args, **kwargs)
+    return wrapper
+
+
+def _insert(db_session: Session, model):
+    """支持 ON CONFLICT 的 INSERT（SQLite 3.24+ 与 PostgreSQL 语法相同，按当前数据库选择方言）"""
+    dialect = postgresql if db_session.get_bind().dialect.name == "postgresql" else sqlite
+    return dialect.insert(getattr(model, "__table__", model))
+
+
+def upsert(db_session: Session, model, rows: List[Dict[str, Any]], keys: Optional[List[str]] = None,
+           update: Optional[List[str]] = None) -> int:
+    """
+    批量 INSERT ... ON CONFLICT
+
+    Args:
+        keys: 判定冲突的主键/唯一键列，为空时任何唯一约束冲突都跳过该行
+        update: 冲突时覆盖的列，None 表示跳过该行
+
+    Returns:
+        int: 插入或更新的行数
+    """
+    if not rows:
+        return 0
+    statement = _insert(db_session, model)
+    if update is None:
+        statement = statement.on_conflict_do_nothing(index_elements=keys)
+    else:
+        statement = statement.on_conflict_do_update(
+            index_elements=keys,
+            set_={column: statement.excluded[column] for column in update},
+        )
+    # 以 executemany 执行，由 SQLAlchemy 分批合并为多行语句（语句只编译一次）；
+    # 多行语句的 rowcount 并非所有驱动都支持，用 RETURNING 计数
+    statement = statement.returning(*statement.table.primary_key.columns)
+    return len(db_session.execute(statement, rows).all())
+
+
+def merge_all(db_session: Session, entries: Sequence[SQLModel]) -> int:
+    """按主键批量覆盖写入，代替逐条 merge（每条都要先查询一次）"""
+    if not entries:
+        return 0
+    model = type(entries[0])
+    keys = [column.name for column in model.__table__.primary_key]
+    columns = [column.name for column in model.__table__.columns if column.name not in keys]
+    # PostgreSQL 不允许同一条语句更新同一行两次，重复的主键只保留最后一条
+    rows = {}
+    for entry in entries:
+        row = entry.model_dump()
+        rows[tuple(row[key] for key in keys)] = row
+    return upsert(db_session, model, list(rows.values()), keys=keys, update=columns)
+
 
 def get_rss_feeds(db_session: Session, skip: int = 0, limit: int = 100) -> Sequence[RSSFeed]:
     """获取RSS源列表"""
@@ -43,93 +128,793 @@ def update_rss_feed(db_session: Session, rss_id: int, rss_feed: RSSFeed) -> Opti
     
     return existing_feed
 
-async def get_all_rss_feed_urls() -> List[str]:
-    """获取所有RSS源的URL列表"""
+@_in_thread
+def get_all_rss_feed_urls() -> List[str]:
+    """获取所有已启用RSS源的URL列表"""
     with session_scope() as db_session:
-        statement = select(RSSFeed.url)
+        statement = select(RSSFeed.url).where(RSSFeed.enabled == True)  # noqa: E712
         return [row for row in db_session.exec(statement).all()]
     
-async def save_parsed_rss_result(anime: Anime, episodes: List[Episode], torrents: List[Torrent]) -> None:
-    """保存解析结果到数据库"""
+async def save_parsed_rss_result(anime: ParsedAnime, episodes: List[ParsedEpisode], torrents: List[ParsedTorrent]) -> None:
+    """
+    保存解析结果到数据库
+
+    已存在的剧集和种子只做一次批量查询，仅为新条目创建 ORM 对象；
+    已有记录保持不变，避免覆盖下载状态和元数据。
+    """
+    _check_parsed(anime, episodes, torrents)
+    try:
+        events = await to_thread(_save_parsed_batch, [(anime, episodes, torrents)])
+    except Exception as e:
+        raise RuntimeError(f"Failed to save parsed RSS result: {str(e)}")
+    broker.publish_events(events)
+
+
+async def save_parsed_rss_results(results: List[Tuple[ParsedAnime, List[ParsedEpisode], List[ParsedTorrent]]]) -> None:
+    """
+    在一个事务中保存多个源的解析结果（group commit）
+
+    任一结果出错时整批回滚并抛出 RuntimeError，由调用方决定是否逐条重试。
+    """
+    for result in results:
+        _check_parsed(*result)
+    if not results:
+        return
+
+    try:
+        events = await to_thread(_save_parsed_batch, results)
+    except Exception as e:
+        raise RuntimeError(f"Failed to save parsed RSS results: {str(e)}")
+    broker.publish_events(events)
+
+
+def _save_parsed_batch(results: List[Tuple[ParsedAnime, List[ParsedEpisode], List[ParsedTorrent]]]) -> List[Event]:
+    """在线程中以一个事务写入；事件由调用方在事件循环中发布"""
+    episode_events: List[Dict[str, Any]] = []
+    torrent_events: List[Dict[str, Any]] = []
+    with session_scope() as db_session:
+        now = utcnow()
+        for anime, episodes, torrents in results:
+            new_episodes, new_torrents = _save_parsed(db_session, anime, episodes, torrents, now)
+            episode_events.extend(new_episodes)
+            torrent_events.extend(new_torrents)
+        events = _log_events(db_session, "episode.created", episode_events, now)
+        events += _log_events(db_session, "torrent.created", torrent_events, now)
+        db_session.commit()
+    return events
+
+
+def _log_events(db_session: Session, type: str, items: List[Dict[str, Any]], now: datetime) -> List[Event]:
+    """在当前事务中写入事件日志，返回带日志 ID 的事件"""
+    rows = [EventLog(type=type, data=json.dumps(data, ensure_ascii=False, default=str), created_at=now)
+            for data in items]
+    if not rows:
+        return []
+    db_session.add_all(rows)
+    db_session.flush()
+    return [Event(id=row.id, type=type, data=data) for row, data in zip(rows, items)]
+
+
+@_in_thread
+def get_events(after_id: Optional[int] = None, limit: int = 500) -> List[Event]:
+    """按 ID 顺序读取 after_id 之后的事件日志；after_id 为空时读取最近 limit 条"""
+    with session_scope() as db_session:
+        statement = select(EventLog)
+        if after_id is None:
+            statement = statement.order_by(EventLog.id.desc()).limit(limit)
+            rows = list(reversed(db_session.exec(statement).all()))
+        else:
+            statement = statement.where(EventLog.id > after_id).order_by(EventLog.id).limit(limit)
+            rows = db_session.exec(statement).all()
+        return [Event(id=row.id, type=row.type, data=json.loads(row.data)) for row in rows]
+
+
+def _check_parsed(anime: ParsedAnime, episodes: List[ParsedEpisode], torrents: List[ParsedTorrent]) -> None:
     if not anime:
         raise ValueError("Anime object cannot be None")
     
     if len(episodes) != len(torrents):
         raise ValueError("Episodes and torrents lists must have the same length")
+
+
+def _save_parsed(db_session: Session, anime: ParsedAnime, episodes: List[ParsedEpisode],
+                 torrents: List[ParsedTorrent], now: datetime) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
+    """在当前事务中写入一个源的解析结果，返回新剧集和新种子的事件内容"""
+    # 查找或创建动漫
+    select_anime = select(Anime).where(Anime.original_title == anime.original_title)
+    existing_anime = db_session.exec(select_anime).first()
     
-    try:
-        with session_scope() as db_session:
-            # 查找或创建动漫
-            select_anime = select(Anime).where(Anime.original_title == anime.original_title)
-            existing_anime = db_session.exec(select_anime).first()
-            
-            if existing_anime:
-                # 更新现有动漫的字段
-                existing_anime.title = anime.title
-                existing_anime.original_title = anime.original_title
-                existing_anime.air_date = anime.air_date
-                existing_anime.status = anime.status
-                existing_anime.description = anime.description
-                existing_anime.download_status = anime.download_status
-                existing_anime.download_path = anime.download_path
-                existing_anime.season = anime.season
-                existing_anime.total_episodes = anime.total_episodes
-                existing_anime.last_updated = anime.last_updated
-                existing_anime.next_air_date = anime.next_air_date
-                anime = existing_anime
+    if existing_anime:
+        if anime.description and existing_anime.description != anime.description:
+            existing_anime.description = anime.description
+        anime_row = existing_anime
+    else:
+        anime_row = Anime(original_title=anime.original_title, description=anime.description)
+        db_session.add(anime_row)
+        db_session.flush()  # 获取ID但不提交事务
+
+    # 批量查询已有剧集和种子，剧集只取编号和 ID，避免为每行构建 ORM 对象
+    episode_ids = dict(db_session.exec(
+        select(Episode.episode_number, Episode.id).where(Episode.anime_id == anime_row.id)
+    ).all())
+    urls = list({torrent.torrent_url for torrent in torrents})
+    existing_urls = set()
+    if urls:
+        # 已被清理的种子同样视为已存在，否则下一次轮询会重新创建剧集并排队下载
+        existing_urls = set(db_session.execute(union_all(
+            select(Torrent.torrent_url).where(Torrent.torrent_url.in_(urls)),
+            select(PrunedTorrent.torrent_url).where(PrunedTorrent.torrent_url.in_(urls)),
+        )).scalars().all())
+
+    new_episodes = []
+    new_torrents = []
+    for episode, torrent in zip(episodes, torrents):
+        if torrent.torrent_url in existing_urls:
+            continue
+        existing_urls.add(torrent.torrent_url)
+
+        # 查找或创建剧集
+        episode_id = episode_ids.get(episode.episode_number)
+        if episode_id is None:
+            episode_row = Episode(
+                anime_id=anime_row.id,
+                episode_number=episode.episode_number,
+                original_title=episode.original_title,
+            )
+            db_session.add(episode_row)
+            episode_id = episode_ids[episode.episode_number] = episode_row.id
+            new_episodes.append(episode_row)
+
+        torrent_row = Torrent(
+            title=episode.original_title,
+            torrent_url=torrent.torrent_url,
+            magnet_link=torrent.magnet_link,
+            size=torrent.size,
+            publish_date=torrent.publish_date,
+            anime_id=anime_row.id,
+            episode_id=episode_id,
+            created_at=now,
+            updated_at=now,
+        )
+        db_session.add(torrent_row)
+        new_torrents.append(torrent_row)
+
+    if new_torrents:
+        anime_row.last_updated = now
+    
+    # 选中的新种子进入下载队列，重启后可从队列继续而无需重新扫描
+    add_jobs(db_session, [download_job_for(torrent) for torrent in _select_releases(db_session, new_torrents, now)])
+
+    # 提交后属性会过期，先取出事件内容
+    episode_events = [_episode_event(episode, anime_row) for episode in new_episodes]
+    torrent_events = [_torrent_event(torrent) for torrent in new_torrents]
+    return episode_events, torrent_events
+
+
+def _select_releases(db_session: Session, torrents: List[Torrent], now: datetime) -> List[Torrent]:
+    """
+    同一集的多个版本择优，返回需要下载的新种子，未选中的标记为 skipped
+
+    已有版本在下载或已完成的剧集不再下载新版本；已选中但尚未开始下载的版本
+    在出现得分更高的版本时被替换，其待执行的下载任务被删除。
+    """
+    selector = release.selector
+    if selector is None:
+        return torrents
+
+    queued = []
+    by_episode: Dict[uuid.UUID, List[Torrent]] = {}
+    for torrent in torrents:
+        if release.parse_release(torrent.title).episode is None:
+            queued.append(torrent)  # 合集等无法识别集数的种子不参与择优
+        else:
+            by_episode.setdefault(torrent.episode_id, []).append(torrent)
+    if not by_episode:
+        return queued
+
+    new_ids = {torrent.id for torrent in torrents}
+    current: Dict[uuid.UUID, List[Torrent]] = {}
+    statement = select(Torrent).where(
+        Torrent.episode_id.in_(list(by_episode)),
+        Torrent.download_status.not_in(("skipped", "failed")),
+    )
+    for torrent in db_session.exec(statement).all():
+        if torrent.id not in new_ids:
+            current.setdefault(torrent.episode_id, []).append(torrent)
+
+    for episode_id, candidates in by_episode.items():
+        existing = current.get(episode_id, [])
+        winner = None
+        if all(torrent.download_status == "pending" for torrent in existing):
+            # 得分相同时保留已选中的版本
+            everything = existing + candidates
+            index = selector.best((torrent.title, torrent.size) for torrent in everything)
+            if index is not None and index >= len(existing):
+                winner = everything[index]
+                for torrent in existing:
+                    if _cancel_download(db_session, torrent):
+                        torrent.download_status = "skipped"
+                        torrent.updated_at = now
+                        db_session.add(torrent)
+                    else:
+                        winner = None  # 已开始获取种子，保留原版本
+
+        for torrent in candidates:
+            if torrent is winner:
+                queued.append(torrent)
+            else:
+                torrent.download_status = "skipped"
+    return queued
+
+
+def _cancel_download(db_session: Session, torrent: Torrent) -> bool:
+    """删除种子尚未执行的下载任务；已有任务在执行时返回 False"""
+    keys = [f"{kind}:{torrent.id}" for kind in ("fetch_torrent", "download_torrent")]
+    db_session.execute(delete(Job).where(Job.dedupe_key.in_(keys), Job.status == "pending"))
+    running = db_session.exec(select(Job.id).where(Job.dedupe_key.in_(keys), Job.status == "running")).first()
+    return running is None
+
+
+def _episode_event(episode: Episode, anime: Anime) -> Dict[str, Any]:
+    return {
+        "id": str(episode.id),
+        "anime_id": str(anime.id),
+        "anime_title": anime.title or anime.original_title,
+        "episode_number": episode.episode_number,
+        "title": episode.original_title,
+    }
+
+
+def _torrent_event(torrent: Torrent) -> Dict[str, Any]:
+    return {
+        "id": str(torrent.id),
+        "anime_id": str(torrent.anime_id),
+        "episode_id": str(torrent.episode_id),
+        "title": torrent.title,
+        "size": torrent.size,
+        "publish_date": torrent.publish_date,
+        "status": torrent.download_status,
+    }
+
+
+def _torrent_status_event(torrent: Torrent) -> Dict[str, Any]:
+    return {
+        "id": str(torrent.id),
+        "episode_id": str(torrent.episode_id),
+        "status": torrent.download_status,
+        "download_path": torrent.download_path,
+    }
+
+
+@_in_thread
+def acquire_lease(name: str, holder: str, ttl: float) -> bool:
+    """
+    获取或续约租约
+
+    仅当租约不存在、已过期或本就由 holder 持有时成功，
+    条件更新保证同一时刻只有一个持有者。
+    """
+    now = utcnow()
+    expires_at = now + timedelta(seconds=ttl)
+
+    # 插入、续约（本就由 holder 持有）和接管（原持有者已过期）合并为一条语句，
+    # 由数据库保证原子性；条件不满足时不修改任何行
+    with session_scope() as db_session:
+        statement = _insert(db_session, Lease).values(
+            name=name, holder=holder, acquired_at=now, heartbeat_at=now, expires_at=expires_at,
+        )
+        statement = statement.on_conflict_do_update(
+            index_elements=["name"],
+            set_=dict(
+                holder=holder,
+                acquired_at=case((Lease.holder == holder, Lease.acquired_at), else_=now),
+                heartbeat_at=now,
+                expires_at=expires_at,
+            ),
+            where=or_(Lease.holder == holder, Lease.expires_at < now),
+        ).returning(Lease.name)
+        return db_session.execute(statement).first() is not None
+
+
+@_in_thread
+def release_lease(name: str, holder: str) -> None:
+    """释放租约（仅当仍由 holder 持有时）"""
+    with session_scope() as db_session:
+        db_session.execute(
+            delete(Lease).where(Lease.name == name, Lease.holder == holder)
+        )
+
+
+@_in_thread
+def get_lease(name: str) -> Optional[Lease]:
+    """查询租约当前状态"""
+    with session_scope() as db_session:
+        lease = db_session.get(Lease, name)
+        if lease is not None:
+            db_session.expunge(lease)
+        return lease
+
+
+def download_job_for(torrent: Torrent) -> Job:
+    """为新种子创建下载任务：有种子文件链接时先获取种子文件，否则直接提交磁力链接"""
+    if torrent.torrent_url:
+        kind = "fetch_torrent"
+        payload = {"torrent_id": str(torrent.id), "torrent_url": torrent.torrent_url}
+    else:
+        kind = "download_torrent"
+        payload = {"torrent_id": str(torrent.id), "magnet_link": torrent.magnet_link}
+    return Job(kind=kind, payload=json.dumps(payload), dedupe_key=f"{kind}:{torrent.id}")
+
+
+def add_jobs(db_session: Session, jobs: List[Job]) -> int:
+    """
+    在当前事务中批量入队，dedupe_key 已存在的任务会被跳过
+
+    Returns:
+        int: 实际入队的任务数
+    """
+    if not jobs:
+        return 0
+    now = utcnow()
+    rows = []
+    for job in jobs:
+        job.run_at = job.run_at or now
+        job.created_at = now
+        job.updated_at = now
+        rows.append(job.model_dump())
+    # 多个节点同时入队相同任务时由唯一约束去重，不会因冲突回滚整个事务
+    return upsert(db_session, Job, rows, keys=["dedupe_key"])
+
+
+@_in_thread
+def enqueue_jobs(jobs: List[Job]) -> int:
+    """批量入队"""
+    with session_scope() as db_session:
+        return add_jobs(db_session, jobs)
+
+
+@_in_thread
+def claim_jobs(worker: str, limit: int, visibility_timeout: float) -> List[Job]:
+    """
+    原子地批量领取可执行任务
+
+    可执行任务包括到期的 pending 任务，以及可见性超时（worker 崩溃）的 running 任务。
+    领取时写入唯一凭证 locked_by，后续确认/失败只对持有该凭证的任务生效。
+    """
+    now = utcnow()
+    token = f"{worker}:{uuid.uuid4().hex}"
+    claimable = or_(
+        and_(Job.status == "pending", Job.run_at <= now),
+        and_(Job.status == "running", Job.locked_until < now),
+    )
+
+    with session_scope() as db_session:
+        # 超时且已用完重试次数的任务直接判定失败
+        db_session.execute(
+            update(Job)
+            .where(Job.status == "running", Job.locked_until < now, Job.attempts >= Job.max_attempts)
+            .values(status="failed", last_error="visibility timeout exceeded", updated_at=now)
+        )
+
+        # PostgreSQL 上跳过其他节点正在领取的行（SQLite 写事务本身串行，忽略该子句）
+        candidates = (
+            select(Job.id)
+            .where(claimable)
+            .order_by(Job.priority.desc(), Job.run_at)
+            .limit(limit)
+            .with_for_update(skip_locked=True)
+        )
+        db_session.execute(
+            update(Job)
+            .where(Job.id.in_(candidates.scalar_subquery()), claimable)
+            .values(
+                status="running",
+                locked_by=token,
+                locked_until=now + timedelta(seconds=visibility_timeout),
+                attempts=Job.attempts + 1,
+                updated_at=now,
+            )
+        )
+
+        jobs = db_session.exec(
+            select(Job).where(Job.locked_by == token).order_by(Job.priority.desc(), Job.run_at)
+        ).all()
+        for job in jobs:
+            db_session.expunge(job)
+        return list(jobs)
+
+
+@_in_thread
+def complete_job(job: Job) -> bool:
+    """确认任务完成；凭证已失效（任务被重新领取）时返回 False"""
+    with session_scope() as db_session:
+        result = db_session.execute(
+            update(Job)
+            .where(Job.id == job.id, Job.locked_by == job.locked_by, Job.status == "running")
+            .values(status="done", locked_until=None, updated_at=utcnow())
+        )
+        return bool(result.rowcount)
+
+
+@_in_thread
+def fail_job(job: Job, error: str, retry_delay: float) -> bool:
+    """记录任务失败，未超过最大次数时在 retry_delay 秒后重试"""
+    now = utcnow()
+    if job.attempts >= job.max_attempts:
+        values: Dict[str, Any] = dict(status="failed")
+    else:
+        values = dict(status="pending", run_at=now + timedelta(seconds=retry_delay))
+
+    with session_scope() as db_session:
+        result = db_session.execute(
+            update(Job)
+            .where(Job.id == job.id, Job.locked_by == job.locked_by, Job.status == "running")
+            .values(last_error=error[:1000], locked_until=None, updated_at=now, **values)
+        )
+        return bool(result.rowcount)
+
+
+async def update_torrent_download(torrent_id: uuid.UUID, download_status: str,
+                                  download_path: Optional[str] = None, torrent_hash: Optional[str] = None) -> None:
+    """更新种子下载状态"""
+    events = await to_thread(_update_torrent_download, torrent_id, download_status, download_path, torrent_hash)
+    broker.publish_events(events)
+
+
+def _update_torrent_download(torrent_id: uuid.UUID, download_status: str,
+                             download_path: Optional[str], torrent_hash: Optional[str]) -> List[Event]:
+    with session_scope() as db_session:
+        torrent = db_session.get(Torrent, torrent_id)
+        if torrent is None:
+            return []
+        torrent.download_status = download_status
+        if download_path is not None:
+            torrent.download_path = download_path
+        if torrent_hash:
+            torrent.torrent_hash = torrent_hash
+        torrent.updated_at = utcnow()
+        db_session.add(torrent)
+        return _log_events(db_session, "torrent.status", [_torrent_status_event(torrent)], torrent.updated_at)
+
+
+def _aired_since(next_air_date: Optional[datetime], fetched_at: Optional[datetime], now: datetime) -> bool:
+    """缓存获取之后 next_air_date 是否已到"""
+    next_air_date = _as_utc(next_air_date)
+    return next_air_date is not None and next_air_date <= now and (fetched_at is None or fetched_at < next_air_date)
+
+
+@_in_thread
+def get_animes_to_enrich(limit: int = 100) -> List[Anime]:
+    """
+    获取需要补全或刷新元数据的动漫，新更新的优先
+
+    - 尚未补全的动漫；关键字仍在负缓存期内的被跳过，否则未匹配的动漫会一直占满批次，之后的动漫永远轮不到
+    - 连载中的动漫：缓存已过期，或缓存获取之后 next_air_date 已到（新一集已播出）
+    """
+    from ani_bot.bangumi import anime_keyword
+
+    now = utcnow()
+    with session_scope() as db_session:
+        cached = {keyword: (subject_id, _as_utc(fetched_at)) for keyword, subject_id, fetched_at in db_session.exec(
+            select(BangumiCache.keyword, BangumiCache.subject_id, BangumiCache.fetched_at)
+            .where(BangumiCache.expires_at > now)
+        ).all()}
+        statement = (
+            select(Anime)
+            .where(or_(Anime.title == "", Anime.status == "ongoing"))
+            .order_by(Anime.last_updated.desc().nulls_last(), Anime.id)
+            .execution_options(yield_per=limit)
+        )
+        animes = []
+        for anime in db_session.exec(statement):
+            entry = cached.get(anime_keyword(anime.original_title))
+            if entry is not None:
+                subject_id, fetched_at = entry
+                if not anime.title and subject_id is None:
+                    continue
+                if anime.title and not _aired_since(anime.next_air_date, fetched_at, now):
+                    continue
+            animes.append(anime)
+            if len(animes) >= limit:
+                break
+        for anime in animes:
+            db_session.expunge(anime)
+        return animes
+
+
+@_in_thread
+def update_anime_metadata(metadata: Dict[uuid.UUID, Dict[str, Any]]) -> None:
+    """批量写入动漫元数据"""
+    if not metadata:
+        return
+    with session_scope() as db_session:
+        animes = db_session.exec(select(Anime).where(Anime.id.in_(list(metadata)))).all()
+        for anime in animes:
+            for key, value in metadata[anime.id].items():
+                setattr(anime, key, value)
+            anime.last_updated = utcnow()
+            db_session.add(anime)
+
+
+@_in_thread
+def get_bangumi_cache(keywords: List[str]) -> Dict[str, BangumiCache]:
+    """批量查询未过期的 Bangumi 缓存"""
+    if not keywords:
+        return {}
+    with session_scope() as db_session:
+        statement = select(BangumiCache).where(
+            BangumiCache.keyword.in_(keywords),
+            BangumiCache.expires_at > utcnow(),
+        )
+        entries = db_session.exec(statement).all()
+        for entry in entries:
+            db_session.expunge(entry)
+        return {entry.keyword: entry for entry in entries}
+
+
+@_in_thread
+def save_bangumi_cache(entries: List[BangumiCache]) -> None:
+    """批量写入 Bangumi 缓存（按关键字覆盖）"""
+    if not entries:
+        return
+    with session_scope() as db_session:
+        merge_all(db_session, entries)
+
+
+@_in_thread
+def get_feed_health(urls: Optional[List[str]] = None) -> Dict[str, FeedHealth]:
+    """批量查询 RSS 源健康状态，urls 为 None 时返回全部"""
+    with session_scope() as db_session:
+        statement = select(FeedHealth)
+        if urls is not None:
+            if not urls:
+                return {}
+            statement = statement.where(FeedHealth.url.in_(urls))
+        entries = db_session.exec(statement).all()
+        for entry in entries:
+            db_session.expunge(entry)
+        return {entry.url: entry for entry in entries}
+
+
+def list_feed_health(db_session: Session, skip: int = 0, limit: int = 100) -> List[Dict[str, Any]]:
+    """RSS 源健康状态列表，连续失败多的在前"""
+    statement = (
+        select(FeedHealth, RSSFeed.name, RSSFeed.enabled)
+        .join(RSSFeed, RSSFeed.url == FeedHealth.url, isouter=True)
+        .order_by(FeedHealth.consecutive_failures.desc(), FeedHealth.latency_avg.desc())
+        .offset(skip)
+        .limit(min(limit, 500))
+    )
+    return [
+        {**health.model_dump(), "name": name or "", "enabled": bool(enabled)}
+        for health, name, enabled in db_session.exec(statement).all()
+    ]
+
+
+@_in_thread
+def save_feed_health(entries: List[FeedHealth], disable_urls: Optional[List[str]] = None) -> None:
+    """批量写入健康状态，并停用 disable_urls 中的 RSS 源"""
+    if not entries and not disable_urls:
+        return
+    with session_scope() as db_session:
+        merge_all(db_session, entries)
+        if disable_urls:
+            db_session.execute(
+                update(RSSFeed)
+                .where(RSSFeed.url.in_(disable_urls))
+                .values(enabled=False, updated_at=utcnow())
+            )
+
+
+@_in_thread
+def add_rss_feeds(feeds: List[RSSFeed]) -> int:
+    """批量添加RSS源，URL 已存在的跳过，返回新增数量"""
+    if not feeds:
+        return 0
+    with session_scope() as db_session:
+        urls = [feed.url for feed in feeds]
+        existing = set(db_session.exec(select(RSSFeed.url).where(RSSFeed.url.in_(urls))).all())
+        now = utcnow()
+        added = 0
+        for feed in feeds:
+            if feed.url in existing:
+                continue
+            existing.add(feed.url)
+            feed.created_at = feed.created_at or now
+            feed.updated_at = now
+            db_session.add(feed)
+            added += 1
+        return added
+
+
+@_in_thread
+def add_crawl_urls(urls: Dict[str, str], due: bool = False) -> None:
+    """
+    向爬虫队列添加 URL（url -> kind）
+
+    Args:
+        due: 已存在的 URL 是否也立即设为可抓取（用于种子页面）
+    """
+    if not urls:
+        return
+    now = utcnow()
+    rows = [CrawlURL(url=url, kind=kind, next_crawl_at=now).model_dump() for url, kind in urls.items()]
+    with session_scope() as db_session:
+        upsert(db_session, CrawlURL, rows, keys=["url"], update=["next_crawl_at"] if due else None)
+
+
+@_in_thread
+def get_due_crawl_urls(limit: int = 100) -> List[CrawlURL]:
+    """获取到期待抓取的 URL"""
+    with session_scope() as db_session:
+        statement = (
+            select(CrawlURL)
+            .where(CrawlURL.next_crawl_at <= utcnow())
+            .order_by(CrawlURL.next_crawl_at)
+            .limit(limit)
+        )
+        entries = db_session.exec(statement).all()
+        for entry in entries:
+            db_session.expunge(entry)
+        return list(entries)
+
+
+@_in_thread
+def save_crawl_urls(entries: List[CrawlURL]) -> None:
+    """批量回写抓取结果"""
+    if not entries:
+        return
+    with session_scope() as db_session:
+        merge_all(db_session, entries)
+
+
+async def mark_torrents_completed(paths: Dict[str, str]) -> int:
+    """按 info hash 将下载中的种子标记为已完成（hash -> 下载路径）"""
+    if not paths:
+        return 0
+    events = await to_thread(_mark_torrents_completed, paths)
+    broker.publish_events(events)
+    return len(events)
+
+
+def _mark_torrents_completed(paths: Dict[str, str]) -> List[Event]:
+    with session_scope() as db_session:
+        statement = select(Torrent).where(
+            Torrent.torrent_hash.in_(list(paths)),
+            Torrent.download_status == "downloading",
+        )
+        torrents = db_session.exec(statement).all()
+        now = utcnow()
+        for torrent in torrents:
+            torrent.download_status = "completed"
+            torrent.download_path = paths[torrent.torrent_hash]
+            torrent.updated_at = now
+            db_session.add(torrent)
+        return _log_events(db_session, "torrent.status", [_torrent_status_event(torrent) for torrent in torrents], now)
+
+
+@_in_thread
+def get_completed_torrents(limit: int = 50) -> List[Tuple[Torrent, Optional[Anime]]]:
+    """获取已下载完成、待整理的种子及其动漫"""
+    with session_scope() as db_session:
+        statement = (
+            select(Torrent, Anime)
+            .join(Anime, Anime.id == Torrent.anime_id, isouter=True)
+            .where(Torrent.download_status == "completed")
+            .limit(limit)
+        )
+        rows = db_session.exec(statement).all()
+        for torrent, anime in rows:
+            db_session.expunge(torrent)
+            if anime is not None and anime in db_session:
+                db_session.expunge(anime)
+        return [(torrent, anime) for torrent, anime in rows]
+
+
+@_in_thread
+def plan_organize_ops(ops: List[OrganizeOp]) -> None:
+    """在执行前批量写入整理操作日志"""
+    if not ops:
+        return
+    now = utcnow()
+    with session_scope() as db_session:
+        for op in ops:
+            op.created_at = now
+            op.updated_at = now
+            db_session.add(op)
+        db_session.flush()
+        # 调用方随后执行并回写这些操作，提交前解除关联以免属性过期
+        for op in ops:
+            db_session.expunge(op)
+
+
+@_in_thread
+def get_planned_organize_ops(torrent_ids: Optional[List[uuid.UUID]] = None) -> List[OrganizeOp]:
+    """获取尚未完成的整理操作（崩溃恢复）"""
+    with session_scope() as db_session:
+        statement = select(OrganizeOp).where(OrganizeOp.status == "planned")
+        if torrent_ids is not None:
+            statement = statement.where(OrganizeOp.torrent_id.in_(torrent_ids))
+        ops = db_session.exec(statement).all()
+        for op in ops:
+            db_session.expunge(op)
+        return list(ops)
+
+
+async def finish_organize_ops(ops: List[OrganizeOp], library_paths: Dict[uuid.UUID, str],
+                              anime_paths: Optional[Dict[uuid.UUID, str]] = None) -> None:
+    """
+    批量回写整理结果
+
+    全部操作成功的种子标记为 organized，其剧集标记为已下载；有失败操作的种子标记为 failed。
+    """
+    events = await to_thread(_finish_organize_ops, ops, library_paths, anime_paths)
+    broker.publish_events(events)
+
+
+def _finish_organize_ops(ops: List[OrganizeOp], library_paths: Dict[uuid.UUID, str],
+                         anime_paths: Optional[Dict[uuid.UUID, str]]) -> List[Event]:
+    now = utcnow()
+    failed = {op.torrent_id for op in ops if op.status == "failed"}
+    with session_scope() as db_session:
+        for op in ops:
+            op.updated_at = now
+            db_session.merge(op)
+
+        torrents = db_session.exec(select(Torrent).where(Torrent.id.in_(list(library_paths)))).all()
+        episode_paths = {}
+        for torrent in torrents:
+            if torrent.id in failed:
+                torrent.download_status = "failed"
             else:
+                torrent.download_status = "organized"
+                torrent.download_path = library_paths[torrent.id]
+                if torrent.episode_id is not None:
+                    episode_paths[torrent.episode_id] = torrent.download_path
+            torrent.updated_at = now
+            db_session.add(torrent)
+        events = _log_events(db_session, "torrent.status", [_torrent_status_event(torrent) for torrent in torrents], now)
+
+        if episode_paths:
+            episodes = db_session.exec(select(Episode).where(Episode.id.in_(list(episode_paths)))).all()
+            for episode in episodes:
+                episode.download_status = "downloaded"
+                episode.download_path = episode_paths[episode.id]
+                db_session.add(episode)
+
+        if anime_paths:
+            animes = db_session.exec(select(Anime).where(Anime.id.in_(list(anime_paths)))).all()
+            for anime in animes:
+                anime.download_path = anime_paths[anime.id]
                 db_session.add(anime)
-                db_session.flush()  # 获取ID但不提交事务
-            
-            for episode, torrent in zip(episodes, torrents):
-                # 查找或创建剧集
-                select_episode = select(Episode).where(
-                    Episode.anime_id == anime.id,
-                    Episode.episode_number == episode.episode_number
-                )
-                existing_episode = db_session.exec(select_episode).first()
-                
-                if existing_episode:
-                    # 更新现有剧集的字段
-                    existing_episode.title = episode.title
-                    existing_episode.original_title = episode.original_title
-                    existing_episode.air_date = episode.air_date
-                    existing_episode.download_url = episode.download_url
-                    existing_episode.download_status = episode.download_status
-                    existing_episode.download_path = episode.download_path
-                    existing_episode.quality = episode.quality
-                    episode = existing_episode
-                else:
-                    episode.anime_id = anime.id
-                    db_session.add(episode)
-                    db_session.flush()  # 获取ID但不提交事务
-                
-                # 查找或创建种子
-                select_torrent = select(Torrent).where(
-                    Torrent.torrent_url == torrent.torrent_url
-                )
-                existing_torrent = db_session.exec(select_torrent).first()
-                
-                if existing_torrent:
-                    # 更新现有种子的字段
-                    existing_torrent.title = torrent.title
-                    existing_torrent.size = torrent.size
-                    existing_torrent.magnet_link = torrent.magnet_link
-                    existing_torrent.torrent_hash = torrent.torrent_hash
-                    existing_torrent.category = torrent.category
-                    existing_torrent.quality = torrent.quality
-                    existing_torrent.source = torrent.source
-                    existing_torrent.download_status = torrent.download_status
-                    existing_torrent.download_path = torrent.download_path
-                    existing_torrent.anime_id = anime.id
-                    existing_torrent.episode_id = episode.id
-                    existing_torrent.created_at = torrent.created_at
-                    existing_torrent.updated_at = torrent.updated_at
-                else:
-                    torrent.anime_id = anime.id
-                    torrent.episode_id = episode.id
-                    db_session.add(torrent)
-            
-            db_session.commit()
-    except Exception as e:
-        raise RuntimeError(f"Failed to save parsed RSS result: {str(e)}")
\ No newline at end of file
+    return events
+
+
+@_in_thread
+def delete_batch(model, *conditions, limit: int = 500) -> int:
+    """按条件删除至多 limit 行，返回删除数量；每批单独提交，避免长时间持有写锁"""
+    [key] = sa_inspect(model).primary_key
+    with session_scope() as db_session:
+        ids = db_session.exec(select(key).where(*conditions).limit(limit)).all()
+        if not ids:
+            return 0
+        db_session.execute(delete(model).where(key.in_(ids)))
+        return len(ids)
+
+
+@_in_thread
+def delete_torrents_batch(*conditions, limit: int = 500) -> int:
+    """删除一批种子，取消它们尚未执行的下载任务，并记录 URL 防止 RSS 轮询重新入库"""
+    with session_scope() as db_session:
+        rows = db_session.exec(select(Torrent.id, Torrent.torrent_url).where(*conditions).limit(limit)).all()
+        if not rows:
+            return 0
+        ids = [torrent_id for torrent_id, _ in rows]
+        now = utcnow()
+        upsert(db_session, PrunedTorrent, [
+            {"torrent_url": url, "pruned_at": now} for url in {url for _, url in rows if url}
+        ], keys=["torrent_url"])
+        keys = [f"{kind}:{torrent_id}" for torrent_id in ids for kind in ("fetch_torrent", "download_torrent")]
+        db_session.execute(delete(Job).where(Job.dedupe_key.in_(keys), Job.status == "pending"))
+        db_session.execute(delete(Torrent).where(Torrent.id.in_(ids)))
+        return len(ids)
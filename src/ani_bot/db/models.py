@@ -2,14 +2,42 @@ from dataclasses import dataclass
 from datetime import datetime
 from typing import List, Optional
 import uuid
+from sqlalchemy import BigInteger, Integer
 from sqlmodel import Field, Relationship, SQLModel
 from pydantic import BaseModel
 
+
+# RSS 解析的轻量中间结果：解析器只产出这些记录，
+# 仅当条目确实是新的时才在 crud.save_parsed_rss_result 中创建 ORM 对象
+
+@dataclass(slots=True)
+class ParsedAnime:
+    """解析出的动漫"""
+    original_title: str = ""
+    description: str = ""
+
+
+@dataclass(slots=True)
+class ParsedEpisode:
+    """解析出的剧集"""
+    original_title: str = ""
+    episode_number: int = 0
+
+
+@dataclass(slots=True)
+class ParsedTorrent:
+    """解析出的种子"""
+    torrent_url: str = ""
+    size: int = 0
+    publish_date: Optional[datetime] = None
+    magnet_link: str = ""
+
+
 class Anime(SQLModel, table=True):
     """动漫数据模型"""
     id: uuid.UUID = Field(default_factory=uuid.uuid4, primary_key=True)
     title: str = Field(default="")
-    original_title: str = Field(default="")
+    original_title: str = Field(default="", index=True)
     season: int = Field(default=1)
     total_episodes: int = Field(default=0)
     air_date: Optional[datetime] = Field(default=None)
@@ -24,7 +52,7 @@ class Anime(SQLModel, table=True):
 class Episode(SQLModel, table=True):
     """剧集数据模型"""
     id: uuid.UUID = Field(default_factory=uuid.uuid4, primary_key=True)
-    anime_id: uuid.UUID = Field(default_factory=uuid.uuid4)
+    anime_id: uuid.UUID = Field(default_factory=uuid.uuid4, index=True)
     episode_number: int = Field(default=0)
     title: str = Field(default="")
     original_title: str = Field(default="")
@@ -51,17 +79,108 @@ class Torrent(SQLModel, table=True):
     """种子数据模型"""
     id: uuid.UUID = Field(default_factory=uuid.uuid4, primary_key=True)
     title: str = Field(default="")  # 种子标题
-    size: int = Field(default=0)  # 文件大小，字节
+    size: int = Field(default=0, sa_type=BigInteger)  # 文件大小，字节（合集常超过 2GB）
     publish_date: Optional[datetime] = Field(default=None)  # 发布日期
     magnet_link: str = Field(default="")  # 磁力链接
-    torrent_url: str = Field(default="")  # 种子文件URL
+    torrent_url: str = Field(default="", index=True)  # 种子文件URL
     torrent_hash: str = Field(default="")  # 种子哈希
     category: str = Field(default="")  # 分类
     quality: str = Field(default="")  # 质量，如 720p, 1080p
     source: str = Field(default="")  # 来源
-    download_status: str = Field(default="pending")  # 下载状态: pending, downloading, completed, failed
+    download_status: str = Field(default="pending")  # 下载状态: pending, downloading, completed, organized, failed, skipped（同一集有更好的版本）
     download_path: str = Field(default="")  # 下载路径
     anime_id: Optional[uuid.UUID] = Field(default=None)  # 关联的动漫ID
-    episode_id: Optional[uuid.UUID] = Field(default=None)  # 关联的剧集ID
+    episode_id: Optional[uuid.UUID] = Field(default=None, index=True)  # 关联的剧集ID
+    created_at: Optional[datetime] = Field(default=None)  # 创建时间
+    updated_at: Optional[datetime] = Field(default=None)  # 更新时间
+
+class PrunedTorrent(SQLModel, table=True):
+    """被数据保留策略清理的种子 URL，RSS 中再次出现时不重新入库"""
+    torrent_url: str = Field(primary_key=True)  # 种子文件URL
+    pruned_at: Optional[datetime] = Field(default=None)  # 清理时间
+
+class Lease(SQLModel, table=True):
+    """后台任务租约（多进程选主）"""
+    name: str = Field(primary_key=True)  # 租约名称，如 scheduler
+    holder: str = Field(default="")  # 当前持有者标识
+    acquired_at: Optional[datetime] = Field(default=None)  # 本轮持有开始时间
+    heartbeat_at: Optional[datetime] = Field(default=None)  # 最近一次心跳时间
+    expires_at: Optional[datetime] = Field(default=None)  # 过期时间，过期后可被其他进程接管
+
+
+class Job(SQLModel, table=True):
+    """持久化任务队列（下载提交、种子文件获取等）"""
+    id: uuid.UUID = Field(default_factory=uuid.uuid4, primary_key=True)
+    kind: str = Field(default="", index=True)  # 任务类型，如 fetch_torrent, download_torrent
+    payload: str = Field(default="{}")  # JSON 参数
+    dedupe_key: Optional[str] = Field(default=None, unique=True)  # 去重键，相同键只入队一次
+    priority: int = Field(default=0)  # 优先级，数值越大越先执行
+    status: str = Field(default="pending", index=True)  # pending, running, done, failed
+    attempts: int = Field(default=0)  # 已尝试次数
+    max_attempts: int = Field(default=5)  # 最大尝试次数
+    run_at: Optional[datetime] = Field(default=None, index=True)  # 最早可执行时间
+    locked_by: str = Field(default="")  # 领取凭证
+    locked_until: Optional[datetime] = Field(default=None)  # 可见性超时，超时未完成视为 worker 崩溃
+    last_error: str = Field(default="")  # 最近一次错误
     created_at: Optional[datetime] = Field(default=None)  # 创建时间
-    updated_at: Optional[datetime] = Field(default=None)  # 更新时间
\ No newline at end of file
+    updated_at: Optional[datetime] = Field(default=None)  # 更新时间
+
+
+class BangumiCache(SQLModel, table=True):
+    """Bangumi 元数据缓存，subject_id 为空表示未匹配（负缓存）"""
+    keyword: str = Field(primary_key=True)  # 查询关键字（动漫名称）
+    subject_id: Optional[int] = Field(default=None)  # Bangumi 条目ID
+    data: str = Field(default="{}")  # 元数据 JSON
+    fetched_at: Optional[datetime] = Field(default=None)  # 获取时间
+    expires_at: Optional[datetime] = Field(default=None, index=True)  # 过期时间
+
+
+class CrawlURL(SQLModel, table=True):
+    """爬虫 URL 队列（跨重启持久化）"""
+    url: str = Field(primary_key=True)
+    kind: str = Field(default="")  # 页面类型，如 season, bangumi
+    status: str = Field(default="pending")  # pending, ok, not_modified, failed
+    etag: str = Field(default="")  # 上次响应的 ETag，用于条件请求
+    last_modified: str = Field(default="")  # 上次响应的 Last-Modified
+    last_crawled: Optional[datetime] = Field(default=None)  # 上次抓取时间
+    next_crawl_at: Optional[datetime] = Field(default=None, index=True)  # 下次可抓取时间
+    error: str = Field(default="")  # 最近一次错误
+
+
+class EventLog(SQLModel, table=True):
+    """推送事件日志，各 worker 进程按 ID 轮询并转发给本进程的 SSE 订阅者"""
+    # SQLite 只有 INTEGER PRIMARY KEY 才自增
+    id: Optional[int] = Field(default=None, primary_key=True, sa_type=BigInteger().with_variant(Integer, "sqlite"))
+    type: str = Field(default="")  # 事件类型，如 episode.created
+    data: str = Field(default="")  # 事件内容（JSON）
+    created_at: Optional[datetime] = Field(default=None, index=True)  # 创建时间
+
+
+class FeedHealth(SQLModel, table=True):
+    """RSS 源健康状态与熔断"""
+    url: str = Field(primary_key=True)
+    consecutive_failures: int = Field(default=0)  # 连续失败次数（不含站点整体故障），用于熔断退避
+    feed_failures: int = Field(default=0, sa_column_kwargs={"server_default": "0"})  # 连续的源自身故障次数（HTTP 404/410、无法解析），用于自动停用
+    total_fetches: int = Field(default=0)  # 累计抓取次数
+    total_failures: int = Field(default=0)  # 累计失败次数
+    last_error: str = Field(default="")  # 最近一次错误
+    last_success: Optional[datetime] = Field(default=None)  # 最近一次成功时间
+    last_failure: Optional[datetime] = Field(default=None)  # 最近一次失败时间
+    next_attempt_at: Optional[datetime] = Field(default=None)  # 熔断中，此时间之前不再抓取
+    disabled_at: Optional[datetime] = Field(default=None)  # 因持续失败被自动停用的时间
+    latency_avg: float = Field(default=0.0)  # 成功抓取耗时的指数移动平均，秒
+    latency_max: float = Field(default=0.0)  # 最大抓取耗时，秒
+    latency_last: float = Field(default=0.0)  # 最近一次抓取耗时，秒
+
+
+class OrganizeOp(SQLModel, table=True):
+    """媒体库整理操作日志，先记录后执行，崩溃后可恢复"""
+    id: uuid.UUID = Field(default_factory=uuid.uuid4, primary_key=True)
+    torrent_id: uuid.UUID = Field(index=True)  # 关联的种子ID
+    source: str = Field(default="")  # 源文件路径
+    target: str = Field(default="")  # 目标文件路径
+    op: str = Field(default="link")  # link: 硬链接, rename: 移动
+    status: str = Field(default="planned", index=True)  # planned, done, failed
+    error: str = Field(default="")  # 失败原因
+    created_at: Optional[datetime] = Field(default=None)  # 创建时间
+    updated_at: Optional[datetime] = Field(default=None)  # 更新时间
@@ -0,0 +1,111 @@
+import uuid
+from typing import Any, Dict, List, Tuple
+
+from sqlalchemy import text
+from sqlalchemy.engine import Engine
+from sqlmodel import Session
+
+
+# 全文索引：表名 -> 索引字段
+# 使用 trigram 分词，中日文标题无需分词即可按任意 3 字以上的片段匹配
+FTS_TABLES: Dict[str, Tuple[str, ...]] = {
+    "anime": ("title", "original_title", "description"),
+    "episode": ("title", "original_title"),
+    "torrent": ("title",),
+}
+
+# trigram 索引只能匹配 3 个字符以上的片段，更短的关键字回退为 LIKE
+MIN_FTS_TERM_LENGTH = 3
+
+
+def _fts_ddl(table: str, columns: Tuple[str, ...]) -> List[str]:
+    fts = f"{table}_fts"
+    cols = ", ".join(columns)
+    new_values = ", ".join(f"new.{col}" for col in columns)
+    old_values = ", ".join(f"old.{col}" for col in columns)
+    return [
+        f"CREATE VIRTUAL TABLE IF NOT EXISTS {fts} USING fts5("
+        f"{cols}, content='{table}', content_rowid='rowid', tokenize='trigram')",
+        # 外部内容表：由触发器同步，任何写入路径（crud、API、迁移）都不会遗漏
+        f"CREATE TRIGGER IF NOT EXISTS {fts}_ai AFTER INSERT ON {table} BEGIN "
+        f"INSERT INTO {fts}(rowid, {cols}) VALUES (new.rowid, {new_values}); END",
+        f"CREATE TRIGGER IF NOT EXISTS {fts}_ad AFTER DELETE ON {table} BEGIN "
+        f"INSERT INTO {fts}({fts}, rowid, {cols}) VALUES ('delete', old.rowid, {old_values}); END",
+        f"CREATE TRIGGER IF NOT EXISTS {fts}_au AFTER UPDATE OF {cols} ON {table} BEGIN "
+        f"INSERT INTO {fts}({fts}, rowid, {cols}) VALUES ('delete', old.rowid, {old_values}); "
+        f"INSERT INTO {fts}(rowid, {cols}) VALUES (new.rowid, {new_values}); END",
+    ]
+
+
+def init_search(engine: Engine) -> None:
+    """创建全文索引及同步触发器；首次创建时从已有数据重建索引（仅 SQLite）"""
+    if engine.dialect.name != "sqlite":
+        return
+    with engine.begin() as conn:
+        for table, columns in FTS_TABLES.items():
+            fts = f"{table}_fts"
+            exists = conn.execute(
+                text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = :name"), {"name": fts}
+            ).first()
+            for statement in _fts_ddl(table, columns):
+                conn.exec_driver_sql(statement)
+            if exists is None:
+                conn.exec_driver_sql(f"INSERT INTO {fts}({fts}) VALUES ('rebuild')")
+
+
+def fts_query(keyword: str) -> str:
+    """将用户输入转换为 FTS5 查询：每个词作为短语，词之间为 AND"""
+    terms = keyword.split()
+    return " ".join('"{}"'.format(term.replace('"', '""')) for term in terms)
+
+
+def search(db_session: Session, keyword: str, kind: str = "anime",
+           skip: int = 0, limit: int = 20) -> Tuple[List[Dict[str, Any]], int]:
+    """
+    全文搜索
+
+    Returns:
+        (按相关度排序的结果, 总数)
+    """
+    if kind not in FTS_TABLES:
+        raise ValueError(f"Unsupported search type: {kind}")
+    terms = keyword.split()
+    if not terms:
+        return [], 0
+
+    columns = FTS_TABLES[kind]
+    select_columns = ", ".join(f"t.{col}" for col in ("id",) + columns)
+    params: Dict[str, Any] = {"skip": skip, "limit": limit}
+
+    use_fts = (
+        db_session.get_bind().dialect.name == "sqlite"
+        and all(len(term) >= MIN_FTS_TERM_LENGTH for term in terms)
+    )
+    if use_fts:
+        fts = f"{kind}_fts"
+        params["query"] = fts_query(keyword)
+        source = f"{fts} JOIN {kind} t ON t.rowid = {fts}.rowid WHERE {fts} MATCH :query"
+        order = f"ORDER BY {fts}.rank"
+        rank = f", {fts}.rank AS rank"
+    else:
+        # 短关键字：逐词 LIKE 匹配任一字段（PostgreSQL 的 LIKE 区分大小写，改用 ILIKE）
+        like = "ILIKE" if db_session.get_bind().dialect.name == "postgresql" else "LIKE"
+        conditions = []
+        for i, term in enumerate(terms):
+            params[f"term{i}"] = f"%{term}%"
+            conditions.append("(" + " OR ".join(f"t.{col} {like} :term{i}" for col in columns) + ")")
+        source = f"{kind} t WHERE " + " AND ".join(conditions)
+        order = "ORDER BY t.rowid DESC" if db_session.get_bind().dialect.name == "sqlite" else ""
+        rank = ""
+
+    rows = db_session.execute(
+        text(f"SELECT {select_columns}{rank} FROM {source} {order} LIMIT :limit OFFSET :skip"), params
+    ).mappings().all()
+    count = db_session.execute(text(f"SELECT COUNT(*) FROM {source}"), params).scalar_one()
+
+    results = []
+    for row in rows:
+        item = dict(row)
+        item["id"] = str(uuid.UUID(str(item["id"])))
+        results.append(item)
+    return results, count
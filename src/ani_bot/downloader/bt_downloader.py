@@ -1,27 +1,62 @@
+import asyncio
+import base64
+import hashlib
 import os
-import time
+import re
 import logging
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, List, Tuple
 from abc import ABC, abstractmethod
-from qbittorrent import Client
+import aiohttp
+
+
+def _bencode_end(data: bytes, index: int) -> int:
+    """返回从 index 开始的 bencode 值的结束位置"""
+    token = data[index:index + 1]
+    if token == b"i":
+        return data.index(b"e", index) + 1
+    if token in (b"l", b"d"):
+        index += 1
+        while data[index:index + 1] != b"e":
+            index = _bencode_end(data, index)
+        return index + 1
+    if token.isdigit():
+        colon = data.index(b":", index)
+        return colon + 1 + int(data[index:colon])
+    raise ValueError(f"Invalid bencode at {index}")
+
+
+def torrent_info_hash(data: bytes) -> str:
+    """计算种子文件的 info hash（info 字典原始字节的 SHA1）"""
+    if data[:1] != b"d":
+        raise ValueError("Invalid torrent: not a dictionary")
+    index = 1
+    while data[index:index + 1] != b"e":
+        key_end = _bencode_end(data, index)
+        value_end = _bencode_end(data, key_end)
+        if data[index:key_end] == b"4:info":
+            return hashlib.sha1(data[key_end:value_end]).hexdigest()
+        index = value_end
+    raise ValueError("Invalid torrent: no info dictionary")
+
+
+def magnet_info_hash(magnet_link: str) -> str:
+    """从磁力链接中提取 info hash（仅支持十六进制形式）"""
+    match = re.search(r"xt=urn:btih:([0-9a-fA-F]{40})", magnet_link)
+    return match.group(1).lower() if match else ""
 
 
 class BTDownloader(ABC):
-    """、
+    """
     BT下载器抽象基类
-    TODO: 实现qBittorrent下载器
-    TODO: 实现Transmission下载器
     """
     
     def __init__(self, config):
         self.config = config
-        self.save_path = config.get('download.save_path', './downloads')
+        # 下载目录位于 BT 客户端所在主机，未配置时由客户端使用自己的默认目录
+        self.save_path = config.get('download.save_path')
         self.max_download_speed = config.get('download.max_download_speed', -1)
         self.max_upload_speed = config.get('download.max_upload_speed', -1)
         self.logger = logging.getLogger(self.__class__.__name__)
-        
-        # 确保下载目录存在
-        os.makedirs(self.save_path, exist_ok=True)
     
     @abstractmethod
     async def add_torrent(self, torrent_url: str, save_path: str = None) -> bool:
@@ -54,27 +89,362 @@ class BTDownloader(ABC):
         pass
 
 class QBittorrentDownloader(BTDownloader):
+    """
+    qBittorrent Web API v2 下载器
+
+    - 登录后复用 SID cookie，仅在 403（会话过期）时重新登录并重试
+    - 状态轮询使用 sync/maindata 的 rid 增量同步，状态字段统一为与 Transmission 相同的名称
+    """
+
+    # qBittorrent 的 state -> 与 TransmissionDownloader.STATUS_NAMES 一致的状态名
+    STATE_NAMES = {
+        "downloading": "downloading", "forcedDL": "downloading", "metaDL": "downloading",
+        "forcedMetaDL": "downloading", "stalledDL": "downloading",
+        "uploading": "seeding", "forcedUP": "seeding", "stalledUP": "seeding",
+        "queuedDL": "download_wait", "queuedUP": "seed_wait",
+        "checkingDL": "checking", "checkingUP": "checking", "checkingResumeData": "checking",
+        "pausedDL": "stopped", "pausedUP": "stopped", "stoppedDL": "stopped", "stoppedUP": "stopped",
+        "error": "error", "missingFiles": "error", "moving": "checking",
+    }
+
     def __init__(self, config):
         super().__init__(config)
-        pass
+        self.url = config.get('url', 'http://localhost:8080').rstrip("/")
+        self.username = config.get('username', '')
+        self.password = config.get('password', '')
+        self.timeout = aiohttp.ClientTimeout(total=config.get('timeout', 30))
+        self.concurrency = config.get('concurrency', 8)
+
+        self.torrents: Dict[str, Dict[str, Any]] = {}  # hash -> 状态（qBittorrent 原始字段）
+        self._rid = 0
+        self._logged_in = False
+        self._session: Optional[aiohttp.ClientSession] = None
+        self._login_lock = asyncio.Lock()
+
+    async def _get_session(self) -> aiohttp.ClientSession:
+        if self._session is None or self._session.closed:
+            # 本地地址也需要保存 cookie
+            self._session = aiohttp.ClientSession(
+                timeout=self.timeout, cookie_jar=aiohttp.CookieJar(unsafe=True),
+            )
+            self._logged_in = False
+        return self._session
+
+    async def login(self):
+        session = await self._get_session()
+        async with session.post(f"{self.url}/api/v2/auth/login",
+                                data={"username": self.username, "password": self.password}) as response:
+            response.raise_for_status()
+            if (await response.text()).strip() != "Ok.":
+                raise RuntimeError("qBittorrent login failed: invalid username or password")
+        self._logged_in = True
+
+    async def request(self, method: str, path: str, params: Optional[Dict[str, Any]] = None, data: Any = None) -> Any:
+        """调用 Web API，返回 JSON 或文本；data 为可调用对象时每次请求重新生成（上传的表单只能发送一次）"""
+        session = await self._get_session()
+        for _ in range(2):
+            if not self._logged_in:
+                async with self._login_lock:
+                    if not self._logged_in:
+                        await self.login()
+            body = data() if callable(data) else data
+            async with session.request(method, f"{self.url}/api/v2/{path}", params=params, data=body) as response:
+                if response.status == 403:
+                    # 会话过期：多个并发请求只需重新登录一次
+                    self._logged_in = False
+                    continue
+                response.raise_for_status()
+                if response.content_type == "application/json":
+                    return await response.json()
+                return await response.text()
+        raise RuntimeError(f"qBittorrent {path} failed: session rejected")
+
+    def _add_form(self, source: str, save_path: Optional[str]) -> aiohttp.FormData:
+        form = aiohttp.FormData()
+        if os.path.isfile(source):
+            # 本地种子文件直接上传，qBittorrent 可能运行在其他主机上
+            with open(source, "rb") as f:
+                form.add_field("torrents", f.read(), filename=os.path.basename(source),
+                               content_type="application/x-bittorrent")
+        else:
+            form.add_field("urls", source)
+        if save_path or self.save_path:
+            form.add_field("savepath", save_path or self.save_path)
+        return form
+
+    async def add_torrents(self, sources: List[Tuple[str, Optional[str]]]) -> List[bool]:
+        """批量添加 (种子文件/URL/磁力链接, 保存路径)，返回每项是否成功"""
+        semaphore = asyncio.Semaphore(self.concurrency)
+
+        async def add(source: str, save_path: Optional[str]) -> bool:
+            async with semaphore:
+                try:
+                    result = await self.request("POST", "torrents/add", data=lambda: self._add_form(source, save_path))
+                except Exception as e:
+                    self.logger.warning(f"添加种子失败 {source}: {e}")
+                    return False
+                if str(result).strip() == "Ok.":
+                    return True
+                # 种子已存在时同样返回 Fails.，与 Transmission 的 torrent-duplicate 一样视为成功
+                return await self._exists(source)
+
+        return list(await asyncio.gather(*(add(source, save_path) for source, save_path in sources)))
+
+    async def _exists(self, source: str) -> bool:
+        """按 info hash 查询种子是否已添加；无法得到 hash 时返回 False"""
+        try:
+            if os.path.isfile(source):
+                with open(source, "rb") as f:
+                    info_hash = torrent_info_hash(f.read())
+            else:
+                info_hash = magnet_info_hash(source)
+            if not info_hash:
+                return False
+            torrents = await self.request("GET", "torrents/info", params={"hashes": info_hash})
+        except Exception as e:
+            self.logger.warning(f"查询种子失败 {source}: {e}")
+            return False
+        return isinstance(torrents, list) and len(torrents) > 0
 
     async def add_torrent(self, torrent_url: str, save_path: str = None) -> bool:
-        pass
+        [ok] = await self.add_torrents([(torrent_url, save_path)])
+        return ok
 
-    def add_magnet(self, magnet_link: str, save_path: str = None) -> bool:
-        pass
+    async def add_magnet(self, magnet_link: str, save_path: str = None) -> bool:
+        [ok] = await self.add_torrents([(magnet_link, save_path)])
+        return ok
 
-    def get_download_status(self, torrent_id: str) -> Dict[str, Any]:
-        pass
+    def _normalize(self, torrent_hash: str, torrent: Dict[str, Any]) -> Dict[str, Any]:
+        status = dict(torrent)
+        status["hashString"] = torrent_hash
+        status["state"] = self.STATE_NAMES.get(torrent.get("state", ""), "unknown")
+        status["percentDone"] = torrent.get("progress", 0)
+        status["downloadDir"] = torrent.get("save_path", "")
+        return status
 
-    def pause_download(self, torrent_id: str) -> bool:
-        pass
+    async def poll_statuses(self) -> Dict[str, Dict[str, Any]]:
+        """
+        增量同步所有种子状态
 
-    def resume_download(self, torrent_id: str) -> bool:
-        pass
+        Returns:
+            本次有变化的种子 hash -> 状态
+        """
+        result = await self.request("GET", "sync/maindata", params={"rid": self._rid})
+        if result.get("full_update"):
+            self.torrents.clear()
+        self._rid = result.get("rid", 0)
 
-    def remove_download(self, torrent_id: str, delete_files: bool = False) -> bool:
-        pass
+        changed = {}
+        for torrent_hash, fields in (result.get("torrents") or {}).items():
+            # 增量结果只包含变化的字段
+            torrent = self.torrents.setdefault(torrent_hash, {})
+            torrent.update(fields)
+            changed[torrent_hash] = self._normalize(torrent_hash, torrent)
+        for torrent_hash in result.get("torrents_removed") or []:
+            self.torrents.pop(torrent_hash, None)
+        return changed
 
-    
-        
\ No newline at end of file
+    async def get_download_status(self, torrent_id: str) -> Dict[str, Any]:
+        torrents = await self.request("GET", "torrents/info", params={"hashes": torrent_id})
+        return self._normalize(torrent_id, torrents[0]) if torrents else {}
+
+    async def _command(self, names: Tuple[str, str], data: Dict[str, Any]) -> bool:
+        """qBittorrent 5 将 pause/resume 改名为 stop/start，旧接口返回 404 时改用新名称"""
+        for name in names:
+            try:
+                await self.request("POST", f"torrents/{name}", data=data)
+                return True
+            except aiohttp.ClientResponseError as e:
+                if e.status != 404:
+                    raise
+        return False
+
+    async def pause_download(self, torrent_id: str) -> bool:
+        return await self._command(("pause", "stop"), {"hashes": torrent_id})
+
+    async def resume_download(self, torrent_id: str) -> bool:
+        return await self._command(("resume", "start"), {"hashes": torrent_id})
+
+    async def remove_download(self, torrent_id: str, delete_files: bool = False) -> bool:
+        await self.request("POST", "torrents/delete",
+                           data={"hashes": torrent_id, "deleteFiles": "true" if delete_files else "false"})
+        self.torrents.pop(torrent_id, None)
+        return True
+
+    async def close(self):
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+
+
+class TransmissionDownloader(BTDownloader):
+    """
+    Transmission RPC 下载器
+
+    - 缓存 X-Transmission-Session-Id，仅在 409 时刷新并重试
+    - add_torrents 批量并发提交
+    - 状态轮询只请求 STATUS_FIELDS，首次全量，之后使用 recently-active 增量更新
+    """
+
+    STATUS_FIELDS = [
+        "id", "hashString", "name", "status", "percentDone",
+        "rateDownload", "rateUpload", "eta", "error", "errorString", "downloadDir",
+    ]
+
+    # torrent-get 返回的 status 数值
+    STATUS_NAMES = {
+        0: "stopped",
+        1: "check_wait",
+        2: "checking",
+        3: "download_wait",
+        4: "downloading",
+        5: "seed_wait",
+        6: "seeding",
+    }
+
+    def __init__(self, config):
+        super().__init__(config)
+        self.url = config.get('url', 'http://localhost:9091/transmission/rpc')
+        username = config.get('username')
+        self.auth = aiohttp.BasicAuth(username, config.get('password', '')) if username else None
+        self.timeout = aiohttp.ClientTimeout(total=config.get('timeout', 30))
+        self.concurrency = config.get('concurrency', 8)
+
+        self.session_id = ""
+        self.torrents: Dict[str, Dict[str, Any]] = {}  # hashString -> 状态
+        self._ids: Dict[int, str] = {}  # Transmission id -> hashString
+        self._synced = False
+        self._session: Optional[aiohttp.ClientSession] = None
+        self._session_lock = asyncio.Lock()
+
+    async def _get_session(self) -> aiohttp.ClientSession:
+        if self._session is None or self._session.closed:
+            self._session = aiohttp.ClientSession(auth=self.auth, timeout=self.timeout)
+        return self._session
+
+    async def rpc(self, method: str, arguments: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """调用 RPC 方法，返回 arguments"""
+        session = await self._get_session()
+        body = {"method": method, "arguments": arguments or {}}
+
+        for _ in range(2):
+            session_id = self.session_id
+            headers = {"X-Transmission-Session-Id": session_id}
+            async with session.post(self.url, json=body, headers=headers) as response:
+                if response.status == 409:
+                    # 会话ID过期：多个并发请求只需刷新一次
+                    async with self._session_lock:
+                        if self.session_id == session_id:
+                            self.session_id = response.headers.get("X-Transmission-Session-Id", "")
+                    continue
+                response.raise_for_status()
+                data = await response.json()
+            if data.get("result") != "success":
+                raise RuntimeError(f"Transmission {method} failed: {data.get('result')}")
+            return data.get("arguments", {})
+
+        raise RuntimeError(f"Transmission {method} failed: session id rejected")
+
+    def _add_arguments(self, source: str, save_path: Optional[str]) -> Dict[str, Any]:
+        arguments: Dict[str, Any] = {}
+        if save_path or self.save_path:
+            arguments["download-dir"] = save_path or self.save_path
+        if os.path.isfile(source):
+            # 本地种子文件以 metainfo 上传，Transmission 可能运行在其他主机上
+            with open(source, "rb") as f:
+                arguments["metainfo"] = base64.b64encode(f.read()).decode()
+        else:
+            arguments["filename"] = source
+        return arguments
+
+    async def add_torrents(self, sources: List[Tuple[str, Optional[str]]]) -> List[bool]:
+        """批量添加 (种子文件/URL/磁力链接, 保存路径)，返回每项是否成功"""
+        semaphore = asyncio.Semaphore(self.concurrency)
+
+        async def add(source: str, save_path: Optional[str]) -> bool:
+            async with semaphore:
+                try:
+                    result = await self.rpc("torrent-add", self._add_arguments(source, save_path))
+                except Exception as e:
+                    self.logger.warning(f"添加种子失败 {source}: {e}")
+                    return False
+            added = result.get("torrent-added") or result.get("torrent-duplicate")
+            if added:
+                self._ids[added["id"]] = added["hashString"]
+                self.torrents.setdefault(added["hashString"], dict(added))
+            return bool(added)
+
+        return list(await asyncio.gather(*(add(source, save_path) for source, save_path in sources)))
+
+    async def add_torrent(self, torrent_url: str, save_path: str = None) -> bool:
+        [ok] = await self.add_torrents([(torrent_url, save_path)])
+        return ok
+
+    async def add_magnet(self, magnet_link: str, save_path: str = None) -> bool:
+        [ok] = await self.add_torrents([(magnet_link, save_path)])
+        return ok
+
+    def _normalize(self, torrent: Dict[str, Any]) -> Dict[str, Any]:
+        status = dict(torrent)
+        if "status" in status:
+            status["state"] = self.STATUS_NAMES.get(status["status"], "unknown")
+        return status
+
+    async def poll_statuses(self) -> Dict[str, Dict[str, Any]]:
+        """
+        增量同步所有种子状态
+
+        Returns:
+            本次有变化的种子 hashString -> 状态
+        """
+        arguments: Dict[str, Any] = {"fields": self.STATUS_FIELDS}
+        if self._synced:
+            arguments["ids"] = "recently-active"
+        result = await self.rpc("torrent-get", arguments)
+
+        if not self._synced:
+            self.torrents.clear()
+            self._ids.clear()
+            self._synced = True
+
+        changed = {}
+        for torrent in result.get("torrents", []):
+            status = self._normalize(torrent)
+            self._ids[status["id"]] = status["hashString"]
+            self.torrents[status["hashString"]] = status
+            changed[status["hashString"]] = status
+        for torrent_id in result.get("removed", []):
+            torrent_hash = self._ids.pop(torrent_id, None)
+            if torrent_hash is not None:
+                self.torrents.pop(torrent_hash, None)
+        return changed
+
+    async def get_download_status(self, torrent_id: str) -> Dict[str, Any]:
+        result = await self.rpc("torrent-get", {"ids": [torrent_id], "fields": self.STATUS_FIELDS})
+        torrents = result.get("torrents", [])
+        return self._normalize(torrents[0]) if torrents else {}
+
+    async def pause_download(self, torrent_id: str) -> bool:
+        await self.rpc("torrent-stop", {"ids": [torrent_id]})
+        return True
+
+    async def resume_download(self, torrent_id: str) -> bool:
+        await self.rpc("torrent-start", {"ids": [torrent_id]})
+        return True
+
+    async def remove_download(self, torrent_id: str, delete_files: bool = False) -> bool:
+        """torrent_id 可以是 Transmission 的数字 id 或 hashString"""
+        await self.rpc("torrent-remove", {"ids": [torrent_id], "delete-local-data": delete_files})
+        if isinstance(torrent_id, int) or (torrent_id.isdigit() and len(torrent_id) < 40):
+            torrent_hash = self._ids.pop(int(torrent_id), None)
+        else:
+            torrent_hash = torrent_id
+            self._ids = {id_: hash_ for id_, hash_ in self._ids.items() if hash_ != torrent_hash}
+        if torrent_hash is not None:
+            self.torrents.pop(torrent_hash, None)
+        return True
+
+    async def close(self):
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
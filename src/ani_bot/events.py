@@ -0,0 +1,232 @@
+import asyncio
+import json
+import logging
+import time
+from collections import deque
+from dataclasses import dataclass
+from typing import Any, AsyncIterator, Awaitable, Callable, Deque, Dict, List, Optional, Set
+
+from ani_bot.core.config import settings
+
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(slots=True)
+class Event:
+    """推送事件"""
+    id: int
+    type: str
+    data: Dict[str, Any]
+
+    def to_sse(self) -> str:
+        """编码为 SSE 消息"""
+        data = json.dumps(self.data, ensure_ascii=False, default=str)
+        return f"id: {self.id}\nevent: {self.type}\ndata: {data}\n\n"
+
+
+class Subscription:
+    """
+    单个订阅者
+
+    每个订阅者有独立的有界队列；队列满说明消费过慢，
+    此时清空队列并断开，客户端可带上 Last-Event-ID 重连补发。
+    """
+
+    def __init__(self, broker: "EventBroker", queue_size: int,
+                 types: Optional[Set[str]] = None, replay: Optional[List[Event]] = None):
+        self.broker = broker
+        self.types = types
+        self.dropped = False
+        self._replay = deque(replay or [])
+        self._queue: asyncio.Queue[Optional[Event]] = asyncio.Queue(maxsize=queue_size)
+
+    def wants(self, event: Event) -> bool:
+        return self.types is None or event.type in self.types
+
+    def offer(self, event: Event) -> bool:
+        """投递事件，队列已满时标记为断开并返回 False"""
+        try:
+            self._queue.put_nowait(event)
+            return True
+        except asyncio.QueueFull:
+            self.dropped = True
+            while not self._queue.empty():
+                self._queue.get_nowait()
+            # 放入结束标记，唤醒正在等待的消费者
+            self._queue.put_nowait(None)
+            return False
+
+    async def get(self, timeout: Optional[float] = None) -> Optional[Event]:
+        """
+        获取下一个事件
+
+        超时返回 None；订阅已断开时抛出 ConnectionResetError。
+        """
+        if self._replay:
+            return self._replay.popleft()
+        try:
+            event = self._queue.get_nowait()
+        except asyncio.QueueEmpty:
+            try:
+                event = await asyncio.wait_for(self._queue.get(), timeout)
+            except asyncio.TimeoutError:
+                return None
+        if event is None:
+            raise ConnectionResetError("Subscriber dropped: too slow")
+        return event
+
+    def close(self):
+        self.broker.unsubscribe(self)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def __aiter__(self) -> AsyncIterator[Event]:
+        return self
+
+    async def __anext__(self) -> Event:
+        try:
+            event = await self.get()
+        except ConnectionResetError:
+            raise StopAsyncIteration
+        return event
+
+
+class EventBroker:
+    """
+    进程内事件广播
+
+    最近 history 条事件保存在环形缓冲区中，用于按 Last-Event-ID 续传；
+    未指定 ID 的事件以启动时的毫秒时间戳为起点递增，重启后 ID 仍大于之前发出的 ID。
+    crud 发布的事件使用事件日志表的 ID，由 EventRelay 转发到其他进程。
+    publish 只能在事件循环线程中调用。
+    """
+
+    def __init__(self, history: int = 1000, queue_size: int = 100):
+        self.queue_size = queue_size
+        self._history: Deque[Event] = deque(maxlen=history)
+        self._seen: Set[int] = set()
+        self._subscribers: Set[Subscription] = set()
+        self._next_id = time.time_ns() // 1_000_000
+
+    @property
+    def subscriber_count(self) -> int:
+        return len(self._subscribers)
+
+    @property
+    def history_size(self) -> int:
+        return self._history.maxlen
+
+    def publish(self, type: str, data: Dict[str, Any], id: Optional[int] = None) -> Event:
+        """发布事件，慢订阅者会被断开"""
+        if id is None:
+            self._next_id += 1
+            id = self._next_id
+        event = Event(id=id, type=type, data=data)
+        if len(self._history) == self._history.maxlen:
+            self._seen.discard(self._history[0].id)
+        self._history.append(event)
+        self._seen.add(id)
+
+        for subscriber in list(self._subscribers):
+            if subscriber.wants(event) and not subscriber.offer(event):
+                logger.warning("事件订阅者消费过慢，已断开")
+                self._subscribers.discard(subscriber)
+        return event
+
+    def publish_many(self, type: str, items: List[Dict[str, Any]]) -> None:
+        for data in items:
+            self.publish(type, data)
+
+    def publish_events(self, events: List[Event]) -> None:
+        """发布已分配 ID 的事件（事件日志）"""
+        for event in events:
+            self.publish(event.type, event.data, id=event.id)
+
+    def relay(self, events: List[Event]) -> int:
+        """转发其他进程的事件，跳过本进程已发布过的，返回转发数量"""
+        relayed = [event for event in events if event.id not in self._seen]
+        self.publish_events(relayed)
+        return len(relayed)
+
+    def subscribe(self, last_event_id: Optional[int] = None, types: Optional[Set[str]] = None) -> Subscription:
+        """
+        订阅事件
+
+        给定 last_event_id 时先补发缓冲区中更新的事件；若缓冲区已不包含
+        last_event_id 之后的全部事件，先发送一条 reset 事件，提示客户端通过 API 全量同步。
+        """
+        replay: List[Event] = []
+        if last_event_id is not None:
+            missed = [event for event in self._history if event.id > last_event_id]
+            oldest = self._history[0].id if self._history else self._next_id + 1
+            if last_event_id + 1 < oldest:
+                replay.append(Event(id=last_event_id, type="reset", data={"reason": "history truncated"}))
+            replay.extend(event for event in missed if types is None or event.type in types)
+
+        subscription = Subscription(self, self.queue_size, types=types, replay=replay)
+        self._subscribers.add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription):
+        self._subscribers.discard(subscription)
+
+
+class EventRelay:
+    """
+    跨进程事件转发
+
+    crud 在写入数据的同一事务中写入事件日志表；每个进程定期按 ID 拉取新事件转发给本进程的订阅者，
+    SSE 客户端连接到任一 worker 都能收到 leader 进程产生的事件，延迟不超过 interval 秒。
+    并发事务的提交顺序可能与 ID 顺序不同，每次回看 lookback 个 ID 并按 ID 去重。
+    """
+
+    def __init__(self, broker: EventBroker,
+                 fetch: Callable[[Optional[int], int], Awaitable[List[Event]]],
+                 interval: float = 1.0,
+                 batch_size: int = 500,
+                 lookback: int = 100,
+        ):
+        self.broker = broker
+        self.fetch = fetch
+        self.interval = interval
+        self.batch_size = batch_size
+        self.lookback = lookback
+        self.last_id = 0
+        self._task: Optional[asyncio.Task] = None
+
+    async def start(self):
+        """载入最近的事件用于续传，然后开始轮询"""
+        events = await self.fetch(None, self.broker.history_size)
+        self.broker.relay(events)
+        if events:
+            self.last_id = events[-1].id
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    async def poll(self) -> int:
+        """拉取一批新事件，返回转发数量"""
+        events = await self.fetch(max(self.last_id - self.lookback, 0), self.batch_size)
+        if events:
+            self.last_id = max(self.last_id, events[-1].id)
+        return self.broker.relay(events)
+
+    async def _run(self):
+        while True:
+            try:
+                await self.poll()
+            except Exception:
+                logger.exception("拉取事件日志失败")
+            await asyncio.sleep(self.interval)
+
+
+broker = EventBroker(history=settings.EVENT_HISTORY_SIZE, queue_size=settings.EVENT_QUEUE_SIZE)
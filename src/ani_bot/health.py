@@ -0,0 +1,158 @@
+import logging
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional, Set
+from urllib.parse import urlsplit
+
+from ani_bot.core.config import settings
+from ani_bot.db import crud
+from ani_bot.db.models import FeedHealth
+
+
+logger = logging.getLogger(__name__)
+
+# 说明源本身已失效的 HTTP 状态码，计入自动停用
+FEED_GONE_STATUSES = (404, 410)
+
+
+@dataclass(slots=True)
+class FetchOutcome:
+    """一次抓取的结果，permanent 表示源自身的故障（HTTP 404/410、无法解析）"""
+    url: str
+    ok: bool
+    latency: float = 0.0
+    error: str = ""
+    permanent: bool = False
+
+
+class FeedHealthTracker:
+    """
+    RSS 源健康统计与熔断
+
+    - 连续失败 failure_threshold 次后熔断，按 backoff_base * 2^n 退避（最长 backoff_max）后再探测一次
+    - 探测成功立即恢复；源自身故障（HTTP 404/410、无法解析）连续 disable_after 次后自动停用该 RSS 源，
+      超时、5xx 等临时故障只退避不停用
+    - 同一主机本轮抓取的源（至少两个）全部临时故障时视为站点整体故障，只记录错误，不计入各源的失败次数
+    - 被手动重新启用的源清空失败计数，重新开始统计
+    """
+
+    def __init__(self,
+                 failure_threshold: int = 3,
+                 backoff_base: float = 600.0,
+                 backoff_max: float = 6 * 3600,
+                 disable_after: Optional[int] = 20,
+                 latency_alpha: float = 0.2,
+        ):
+        self.failure_threshold = failure_threshold
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.disable_after = disable_after
+        self.latency_alpha = latency_alpha
+
+    def backoff(self, consecutive_failures: int) -> float:
+        exponent = max(consecutive_failures - self.failure_threshold, 0)
+        return min(self.backoff_base * 2 ** exponent, self.backoff_max)
+
+    async def filter_due(self, urls: List[str]) -> List[str]:
+        """去掉熔断中的 RSS 源"""
+        health = await crud.get_feed_health(urls)
+        now = crud.utcnow()
+        reenabled = []
+        due = []
+        for url in urls:
+            entry = health.get(url)
+            if entry is not None and entry.disabled_at is not None:
+                # 仍在启用列表中说明已被手动重新启用
+                entry.consecutive_failures = 0
+                entry.feed_failures = 0
+                entry.next_attempt_at = None
+                entry.disabled_at = None
+                reenabled.append(entry)
+            elif entry is not None and entry.next_attempt_at is not None and _aware(entry.next_attempt_at) > now:
+                continue
+            due.append(url)
+        await crud.save_feed_health(reenabled)
+        return due
+
+    def apply(self, entry: FeedHealth, outcome: FetchOutcome, now: datetime, outage: bool = False) -> bool:
+        """更新健康状态，返回是否应停用该源；outage 表示所在站点整体故障"""
+        entry.total_fetches += 1
+        entry.latency_last = outcome.latency
+        entry.latency_max = max(entry.latency_max, outcome.latency)
+
+        if outcome.ok:
+            if entry.latency_avg:
+                entry.latency_avg += self.latency_alpha * (outcome.latency - entry.latency_avg)
+            else:
+                entry.latency_avg = outcome.latency
+            entry.consecutive_failures = 0
+            entry.feed_failures = 0
+            entry.last_success = now
+            entry.next_attempt_at = None
+            return False
+
+        entry.total_failures += 1
+        entry.last_error = outcome.error[:1000]
+        entry.last_failure = now
+        if outage:
+            return False
+        entry.consecutive_failures += 1
+        if entry.consecutive_failures >= self.failure_threshold:
+            entry.next_attempt_at = now + timedelta(seconds=self.backoff(entry.consecutive_failures))
+        if outcome.permanent:
+            entry.feed_failures += 1
+        if self.disable_after is not None and entry.feed_failures >= self.disable_after:
+            entry.disabled_at = now
+            return True
+        return False
+
+    async def record(self, outcomes: List[FetchOutcome]) -> List[str]:
+        """批量记录一次轮询的抓取结果，返回被自动停用的源"""
+        if not outcomes:
+            return []
+        health = await crud.get_feed_health([outcome.url for outcome in outcomes])
+        now = crud.utcnow()
+        outages = _host_outages(outcomes)
+        entries: Dict[str, FeedHealth] = {}
+        disabled = []
+        for outcome in outcomes:
+            entry = entries.get(outcome.url) or health.get(outcome.url) or FeedHealth(url=outcome.url)
+            entries[outcome.url] = entry
+            if self.apply(entry, outcome, now, outage=_host(outcome.url) in outages):
+                disabled.append(outcome.url)
+        for host in outages:
+            logger.warning(f"{host} 的 RSS 源全部抓取失败，视为站点故障，不计入各源失败次数")
+
+        await crud.save_feed_health(list(entries.values()), disable_urls=disabled)
+        for url in disabled:
+            logger.warning(f"RSS 源连续 {self.disable_after} 次返回失效或无法解析，已自动停用: {url}")
+        return disabled
+
+
+def _host(url: str) -> str:
+    return urlsplit(url).netloc
+
+
+def _host_outages(outcomes: List[FetchOutcome]) -> Set[str]:
+    """本轮抓取的源（至少两个）全部临时故障的主机"""
+    by_host: Dict[str, List[FetchOutcome]] = {}
+    for outcome in outcomes:
+        by_host.setdefault(_host(outcome.url), []).append(outcome)
+    return {
+        host for host, items in by_host.items()
+        if len(items) >= 2 and all(not outcome.ok and not outcome.permanent for outcome in items)
+    }
+
+
+def _aware(value: datetime) -> datetime:
+    # SQLite 读回的时间不带时区，统一按 UTC 处理
+    return value if value.tzinfo is not None else value.replace(tzinfo=timezone.utc)
+
+
+def health_from_settings() -> FeedHealthTracker:
+    return FeedHealthTracker(
+        failure_threshold=settings.FEED_FAILURE_THRESHOLD,
+        backoff_base=settings.FEED_BACKOFF_BASE,
+        backoff_max=settings.FEED_BACKOFF_MAX,
+        disable_after=settings.FEED_DISABLE_AFTER,
+    )
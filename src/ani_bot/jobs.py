@@ -0,0 +1,182 @@
+import asyncio
+import inspect
+import json
+import logging
+import os
+import uuid
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+import aiohttp
+
+from ani_bot.db import crud
+from ani_bot.db.models import Job
+from ani_bot.downloader.bt_downloader import BTDownloader, magnet_info_hash, torrent_info_hash
+
+
+logger = logging.getLogger(__name__)
+
+JobHandler = Callable[[Dict[str, Any]], Awaitable[Any]]
+
+
+def retry_delay(attempts: int, base: float = 30.0, cap: float = 3600.0) -> float:
+    """指数退避：30s, 60s, 120s ... 最长 1 小时"""
+    return min(base * 2 ** max(attempts - 1, 0), cap)
+
+
+class JobWorkerPool:
+    """
+    持久化任务队列的异步 worker 池
+
+    一个领取协程按批次从数据库原子领取任务放入有界队列，
+    concurrency 个 worker 协程并发执行。任务状态全部落库，
+    进程崩溃后未确认的任务会在可见性超时后被重新领取。
+    """
+
+    def __init__(self,
+                 handlers: Dict[str, JobHandler],
+                 concurrency: int = 4,
+                 batch_size: int = 10,
+                 visibility_timeout: float = 300.0,
+                 poll_interval: float = 2.0,
+                 worker_id: Optional[str] = None,
+        ):
+        self.handlers = handlers
+        self.concurrency = concurrency
+        self.batch_size = batch_size
+        self.visibility_timeout = visibility_timeout
+        self.poll_interval = poll_interval
+        self.worker_id = worker_id or uuid.uuid4().hex[:8]
+
+        self._queue: asyncio.Queue[Job] = asyncio.Queue(maxsize=batch_size)
+        self._tasks: List[asyncio.Task] = []
+
+    async def run_once(self) -> int:
+        """领取一批任务并全部执行完毕，返回领取数量"""
+        jobs = await crud.claim_jobs(self.worker_id, self.batch_size, self.visibility_timeout)
+        await asyncio.gather(*(self.execute(job) for job in jobs))
+        return len(jobs)
+
+    async def execute(self, job: Job):
+        """执行单个任务并回写结果"""
+        handler = self.handlers.get(job.kind)
+        try:
+            if handler is None:
+                raise ValueError(f"Unsupported job kind: {job.kind}")
+            await handler(json.loads(job.payload))
+        except Exception as e:
+            logger.warning(f"任务 {job.kind}:{job.id} 第 {job.attempts} 次执行失败: {e}")
+            await crud.fail_job(job, str(e), retry_delay(job.attempts))
+        else:
+            await crud.complete_job(job)
+
+    async def _claim_loop(self):
+        while True:
+            try:
+                jobs = await crud.claim_jobs(self.worker_id, self.batch_size, self.visibility_timeout)
+            except Exception as e:
+                logger.warning(f"领取任务失败: {e}")
+                jobs = []
+
+            for job in jobs:
+                await self._queue.put(job)
+            if len(jobs) < self.batch_size:
+                await asyncio.sleep(self.poll_interval)
+
+    async def _worker(self):
+        while True:
+            job = await self._queue.get()
+            try:
+                await self.execute(job)
+            finally:
+                self._queue.task_done()
+
+    async def start(self):
+        """启动领取协程和 worker 协程"""
+        self._tasks.append(asyncio.create_task(self._claim_loop()))
+        for _ in range(self.concurrency):
+            self._tasks.append(asyncio.create_task(self._worker()))
+
+    async def stop(self):
+        """停止 worker；已领取未完成的任务会在可见性超时后被重新领取"""
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks.clear()
+        self._queue = asyncio.Queue(maxsize=self.batch_size)
+
+
+class DownloadJobHandlers:
+    """
+    下载相关任务
+
+    fetch_torrent: 下载 .torrent 文件到本地缓存目录，然后入队 download_torrent
+    download_torrent: 将种子文件或磁力链接提交给 BT 下载器
+    """
+
+    def __init__(self, downloader: BTDownloader, cache_dir: str, timeout: float = 30.0):
+        self.downloader = downloader
+        self.cache_dir = cache_dir
+        self.timeout = aiohttp.ClientTimeout(total=timeout)
+        self._session: Optional[aiohttp.ClientSession] = None
+
+        os.makedirs(self.cache_dir, exist_ok=True)
+
+    @property
+    def handlers(self) -> Dict[str, JobHandler]:
+        return {
+            "fetch_torrent": self.fetch_torrent,
+            "download_torrent": self.download_torrent,
+        }
+
+    async def _get_session(self) -> aiohttp.ClientSession:
+        if self._session is None or self._session.closed:
+            self._session = aiohttp.ClientSession(timeout=self.timeout)
+        return self._session
+
+    async def fetch_torrent(self, payload: Dict[str, Any]):
+        torrent_id = payload["torrent_id"]
+        path = os.path.join(self.cache_dir, f"{torrent_id}.torrent")
+
+        if not os.path.exists(path):
+            session = await self._get_session()
+            async with session.get(payload["torrent_url"]) as response:
+                if response.status != 200:
+                    raise RuntimeError(f"Failed to fetch {payload['torrent_url']}, status: {response.status}")
+                data = await response.read()
+            # 先写临时文件再改名，避免崩溃后留下半个种子文件
+            tmp_path = f"{path}.part"
+            with open(tmp_path, "wb") as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+
+        await crud.enqueue_jobs([Job(
+            kind="download_torrent",
+            payload=json.dumps({"torrent_id": torrent_id, "path": path}),
+            dedupe_key=f"download_torrent:{torrent_id}",
+        )])
+
+    async def download_torrent(self, payload: Dict[str, Any]):
+        if payload.get("path"):
+            with open(payload["path"], "rb") as f:
+                torrent_hash = torrent_info_hash(f.read())
+            ok = await self.downloader.add_torrent(payload["path"])
+        else:
+            torrent_hash = magnet_info_hash(payload["magnet_link"])
+            ok = self.downloader.add_magnet(payload["magnet_link"])
+            if inspect.isawaitable(ok):
+                ok = await ok
+
+        if not ok:
+            raise RuntimeError("Downloader rejected torrent")
+        # 记录 info hash，用于与下载器中的任务对应
+        await crud.update_torrent_download(uuid.UUID(payload["torrent_id"]), "downloading", torrent_hash=torrent_hash)
+
+    async def close(self):
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+        close = getattr(self.downloader, "close", None)
+        if close is not None:
+            result = close()
+            if inspect.isawaitable(result):
+                await result
@@ -0,0 +1,121 @@
+import asyncio
+import logging
+import os
+import socket
+import time
+import uuid
+from typing import Any, Awaitable, Callable, Optional
+
+from ani_bot.db import crud
+
+
+logger = logging.getLogger(__name__)
+
+
+def default_holder_id() -> str:
+    """进程唯一标识：主机名 + pid + 随机后缀"""
+    return f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+
+
+class LeaderElector:
+    """
+    基于数据库租约的选主
+
+    每个进程都运行一个 LeaderElector，按 ttl/3 的周期尝试获取或续约同名租约。
+    成功持有租约的进程成为 leader 并执行 on_elected；续约失败且本地租期已过时执行 on_revoked。
+    leader 进程退出或卡死后，租约过期，其他进程会在下一次心跳时接管。
+    """
+
+    def __init__(self,
+                 name: str,
+                 ttl: float,
+                 on_elected: Callable[[], Awaitable[Any]],
+                 on_revoked: Callable[[], Awaitable[Any]],
+                 holder: Optional[str] = None,
+                 acquire: Callable[[str, str, float], Awaitable[bool]] = crud.acquire_lease,
+                 release: Callable[[str, str], Awaitable[None]] = crud.release_lease,
+        ):
+        self.name = name
+        self.ttl = ttl
+        self.holder = holder or default_holder_id()
+        self.on_elected = on_elected
+        self.on_revoked = on_revoked
+        self.acquire = acquire
+        self.release = release
+
+        self.is_leader = False
+        self._deadline = 0.0  # 本地视角的租约截止时间（monotonic）
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def heartbeat_interval(self) -> float:
+        return self.ttl / 3
+
+    async def tick(self):
+        """执行一次获取/续约，并根据结果切换角色"""
+        started = time.monotonic()
+        try:
+            acquired = await self.acquire(self.name, self.holder, self.ttl)
+        except Exception as e:
+            # 数据库暂时不可用（如 database is locked）：租期内保持现状，过期则让位
+            logger.warning(f"租约 {self.name} 续约失败: {e}")
+            acquired = self.is_leader and started < self._deadline
+
+        if acquired:
+            self._deadline = started + self.ttl
+            if not self.is_leader:
+                await self._elect()
+        elif self.is_leader:
+            self.is_leader = False
+            logger.warning(f"{self.holder} 失去 leader 身份")
+            await self._revoke()
+
+    async def _elect(self):
+        self.is_leader = True
+        logger.info(f"{self.holder} 成为 leader")
+        try:
+            await self.on_elected()
+        except Exception:
+            # 后台任务只启动了一部分：先停掉已启动的，再释放租约，下一次心跳重新竞选
+            logger.exception(f"{self.holder} 启动后台任务失败，放弃 leader 身份")
+            self.is_leader = False
+            self._deadline = 0.0
+            await self._revoke()
+            await self._release()
+
+    async def _revoke(self):
+        try:
+            await self.on_revoked()
+        except Exception:
+            logger.exception(f"{self.holder} 停止后台任务失败")
+
+    async def _release(self):
+        try:
+            await self.release(self.name, self.holder)
+        except Exception as e:
+            logger.warning(f"释放租约 {self.name} 失败: {e}")
+
+    async def _run(self):
+        while True:
+            try:
+                await self.tick()
+            except Exception:
+                # 心跳循环不能退出，否则租约不再续约而后台任务仍在运行
+                logger.exception(f"租约 {self.name} 心跳异常")
+            await asyncio.sleep(self.heartbeat_interval)
+
+    async def start(self):
+        """启动心跳循环"""
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """停止心跳，若为 leader 则先停止后台任务再释放租约，便于其他进程立即接管"""
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+        if self.is_leader:
+            self.is_leader = False
+            await self._revoke()
+            await self._release()
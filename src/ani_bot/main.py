@@ -1,4 +1,5 @@
 from contextlib import asynccontextmanager
+from typing import Optional, Tuple
 import sentry_sdk
 import logging
 import sys
@@ -7,12 +8,23 @@ from fastapi.routing import APIRoute
 from starlette.middleware.cors import CORSMiddleware
 
 from ani_bot.api.main import api_router
+from ani_bot.bangumi import BangumiClient, BangumiEnricher
 from ani_bot.core.config import settings
+from ani_bot.crawler import MikanCrawler
 from ani_bot.core.db import init_db
 from ani_bot.db import crud
-from ani_bot.downloader.bt_downloader import QBittorrentDownloader
+from ani_bot.events import EventRelay, broker
+from ani_bot.downloader.bt_downloader import QBittorrentDownloader, TransmissionDownloader
+from ani_bot.health import health_from_settings
+from ani_bot.jobs import DownloadJobHandlers, JobWorkerPool
+from ani_bot.leader import LeaderElector
+from ani_bot.notify import dispatcher_from_settings
+from ani_bot.organizer import DownloadMonitor, LibraryOrganizer
+from ani_bot.profiling import RunProfiler, TraceBuffer, pipelines, rss_profiler, trace_buffer
+from ani_bot.retention import retention_from_settings
 from ani_bot.rss import RSSParseTask
 from ani_bot.scheduler import AsyncScheduler
+from ani_bot.writebehind import WriteBehindBuffer
 
 
 logging.basicConfig(
@@ -31,9 +43,134 @@ if settings.SENTRY_DSN and settings.ENVIRONMENT != "local":
 
 scheduler = AsyncScheduler()
 
-rss_parse_task = RSSParseTask(
-    get_rss_sources=crud.get_all_rss_feed_urls,
-    save_parse_result=crud.save_parsed_rss_result
+
+def rss_pipeline_from_settings(traces: Optional[TraceBuffer] = None,
+                               profiler: Optional[RunProfiler] = None) -> Tuple[RSSParseTask, WriteBehindBuffer]:
+    """按配置创建 RSS 轮询任务及其写缓冲"""
+    # 各源的解析结果合并提交，减少事务和 fsync 次数
+    write_buffer = WriteBehindBuffer(
+        flush_func=crud.save_parsed_rss_results,
+        max_items=settings.RSS_WRITE_BATCH_SIZE,
+        max_delay=settings.RSS_WRITE_DELAY,
+        fallback=crud.save_parsed_rss_result,
+    )
+    task = RSSParseTask(
+        get_rss_sources=crud.get_all_rss_feed_urls,
+        save_parse_result=write_buffer.add,
+        traces=traces,
+        profiler=profiler,
+        fetch_workers=settings.RSS_FETCH_WORKERS,
+        parse_workers=settings.RSS_PARSE_WORKERS,
+        save_workers=settings.RSS_SAVE_WORKERS,
+        queue_size=settings.RSS_QUEUE_SIZE,
+        health=health_from_settings(),
+        fetch_timeout=settings.RSS_FETCH_TIMEOUT,
+        flush_saves=write_buffer.flush,
+    )
+    return task, write_buffer
+
+
+rss_parse_task, rss_write_buffer = rss_pipeline_from_settings(traces=trace_buffer, profiler=rss_profiler)
+pipelines["rss"] = rss_parse_task.stage_stats
+pipelines["rss_write"] = rss_write_buffer.stats
+
+bangumi_client = BangumiClient(base_url=settings.BANGUMI_API_URL)
+bangumi_enricher = BangumiEnricher(
+    client=bangumi_client,
+    ttl=settings.BANGUMI_CACHE_TTL,
+    negative_ttl=settings.BANGUMI_NEGATIVE_CACHE_TTL,
+    concurrency=settings.BANGUMI_CONCURRENCY,
+)
+
+mikan_crawler = MikanCrawler(
+    base_url=settings.MIKAN_BASE_URL,
+    concurrency=settings.MIKAN_CRAWL_CONCURRENCY,
+    per_host=settings.MIKAN_CRAWL_PER_HOST,
+    delay=settings.MIKAN_CRAWL_DELAY,
+    feeds_enabled=settings.MIKAN_FEEDS_ENABLED,
+)
+
+library_organizer = LibraryOrganizer(
+    library_root=settings.LIBRARY_PATH,
+    mode=settings.ORGANIZE_MODE,
+)
+
+job_pool = None
+download_handlers = None
+notification_dispatcher = None
+
+
+def create_downloader():
+    """根据配置创建 BT 下载器"""
+    if settings.BT_CLIENT == "transmission":
+        return TransmissionDownloader(settings.transmission_config)
+    return QBittorrentDownloader(settings.qbittorrent_config)
+
+
+async def start_background_jobs():
+    """成为 leader 后启动后台任务"""
+    global job_pool, download_handlers, notification_dispatcher
+    await scheduler.start()
+
+    # 添加周期任务
+    scheduler.add_task(rss_parse_task.run, interval=1)
+    rss_profiler.attached = True
+    scheduler.add_task(bangumi_enricher.run, interval=settings.BANGUMI_ENRICH_INTERVAL)
+    scheduler.add_task(mikan_crawler.run, interval=settings.MIKAN_CRAWL_INTERVAL)
+
+    # 下载任务队列
+    downloader = create_downloader()
+    download_handlers = DownloadJobHandlers(
+        downloader=downloader,
+        cache_dir=settings.TORRENT_CACHE_DIR,
+    )
+    job_pool = JobWorkerPool(
+        handlers=download_handlers.handlers,
+        concurrency=settings.JOB_WORKERS,
+        batch_size=settings.JOB_BATCH_SIZE,
+        visibility_timeout=settings.JOB_VISIBILITY_TIMEOUT,
+        poll_interval=settings.JOB_POLL_INTERVAL,
+    )
+    await job_pool.start()
+
+    # 下载完成后整理到媒体库
+    scheduler.add_task(DownloadMonitor(downloader).run, interval=settings.DOWNLOAD_POLL_INTERVAL)
+    scheduler.add_task(library_organizer.run, interval=settings.ORGANIZE_INTERVAL)
+
+    # 数据清理与增量 vacuum
+    scheduler.add_task(retention_from_settings().run, interval=settings.RETENTION_INTERVAL)
+
+    # 新剧集通知
+    notification_dispatcher = dispatcher_from_settings()
+    await notification_dispatcher.start()
+
+
+async def stop_background_jobs():
+    """失去 leader 身份或关闭时停止后台任务"""
+    global job_pool, download_handlers, notification_dispatcher
+    rss_profiler.attached = False
+    await scheduler.stop(timeout=settings.SCHEDULER_STOP_TIMEOUT)
+    await rss_write_buffer.close()
+    await bangumi_client.close()
+    if notification_dispatcher is not None:
+        await notification_dispatcher.stop()
+        notification_dispatcher = None
+    if job_pool is not None:
+        await job_pool.stop()
+        job_pool = None
+    if download_handlers is not None:
+        await download_handlers.close()
+        download_handlers = None
+
+
+# 事件由 leader 进程产生，每个 worker 从事件日志表转发给自己的 SSE 订阅者
+event_relay = EventRelay(broker, crud.get_events, interval=settings.EVENT_POLL_INTERVAL)
+
+leader_elector = LeaderElector(
+    name=settings.LEADER_LEASE_NAME,
+    ttl=settings.LEADER_LEASE_TTL,
+    on_elected=start_background_jobs,
+    on_revoked=stop_background_jobs,
 )
 
 @asynccontextmanager
@@ -42,17 +179,17 @@ async def lifespan(app: FastAPI):
     # === 启动阶段 ===
     init_db()
     logger.info("数据库初始化完成")
+    await event_relay.start()
     
-    await scheduler.start()
-    
-    # 添加周期任务
-    scheduler.add_task(rss_parse_task.run, interval=1)
+    # 多 worker 时只有 leader 运行后台任务
+    await leader_elector.start()
     
     logger.info("应用启动完成")
     yield
     
     # === 关闭阶段 ===
-    await scheduler.stop()
+    await leader_elector.stop()
+    await event_relay.stop()
     logger.info("应用关闭完成")
 
 
@@ -0,0 +1,289 @@
+import asyncio
+import logging
+import smtplib
+import time
+from abc import ABC, abstractmethod
+from collections import defaultdict
+from email.message import EmailMessage
+from typing import Dict, List, Optional, Set, Tuple
+
+import aiohttp
+
+from ani_bot.core.config import settings
+from ani_bot.events import Event, EventBroker, broker
+from ani_bot.jobs import retry_delay
+
+
+logger = logging.getLogger(__name__)
+
+
+def render_digest(events: List[Event]) -> Tuple[str, str]:
+    """将一批事件汇总为（标题, 正文），新剧集按动漫分组"""
+    episodes: Dict[str, List[int]] = defaultdict(list)
+    others: List[str] = []
+    for event in events:
+        if event.type == "episode.created":
+            episodes[event.data.get("anime_title", "")].append(event.data.get("episode_number", 0))
+        elif event.type == "torrent.status":
+            others.append(f"{event.data.get('status')}: {event.data.get('download_path') or event.data.get('id')}")
+        else:
+            others.append(f"{event.type}: {event.data.get('title') or event.data.get('id')}")
+
+    lines = [
+        f"{title}: 第 {', '.join(str(number) for number in sorted(numbers))} 集"
+        for title, numbers in episodes.items()
+    ]
+    lines.extend(others)
+
+    if episodes and not others:
+        subject = f"{settings.PROJECT_NAME}: {sum(len(n) for n in episodes.values())} 个新剧集"
+    else:
+        subject = f"{settings.PROJECT_NAME}: {len(events)} 条通知"
+    return subject, "\n".join(lines)
+
+
+class NotificationSink(ABC):
+    """通知渠道抽象基类，send 一次发送一份摘要"""
+
+    name: str = "sink"
+
+    @abstractmethod
+    async def send(self, events: List[Event]) -> None:
+        """发送摘要，失败时抛出异常由调用方重试"""
+        pass
+
+    async def close(self):
+        pass
+
+
+class WebhookSink(NotificationSink):
+    """以 JSON POST 摘要到 webhook 地址"""
+
+    def __init__(self, url: str, timeout: float = 10.0, name: str = "webhook"):
+        self.url = url
+        self.name = name
+        self.timeout = aiohttp.ClientTimeout(total=timeout)
+        self._session: Optional[aiohttp.ClientSession] = None
+
+    async def send(self, events: List[Event]) -> None:
+        if self._session is None or self._session.closed:
+            self._session = aiohttp.ClientSession(timeout=self.timeout)
+        subject, text = render_digest(events)
+        payload = {
+            "title": subject,
+            "text": text,
+            "count": len(events),
+            "events": [{"id": event.id, "type": event.type, "data": event.data} for event in events],
+        }
+        async with self._session.post(self.url, json=payload) as response:
+            if response.status >= 300:
+                raise RuntimeError(f"Webhook {self.url} returned status {response.status}")
+
+    async def close(self):
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+
+
+class EmailSink(NotificationSink):
+    """通过 SMTP 发送摘要邮件，smtplib 在线程中执行以免阻塞事件循环"""
+
+    def __init__(self, host: str, port: int, sender: str, recipients: List[str],
+                 username: str = "", password: str = "", tls: bool = True, ssl: bool = False,
+                 timeout: float = 30.0, name: str = "email"):
+        self.host = host
+        self.port = port
+        self.sender = sender
+        self.recipients = recipients
+        self.username = username
+        self.password = password
+        self.tls = tls
+        self.ssl = ssl
+        self.timeout = timeout
+        self.name = name
+
+    def _send(self, message: EmailMessage):
+        smtp_class = smtplib.SMTP_SSL if self.ssl else smtplib.SMTP
+        with smtp_class(self.host, self.port, timeout=self.timeout) as smtp:
+            if self.tls and not self.ssl:
+                smtp.starttls()
+            if self.username:
+                smtp.login(self.username, self.password)
+            smtp.send_message(message)
+
+    async def send(self, events: List[Event]) -> None:
+        subject, text = render_digest(events)
+        message = EmailMessage()
+        message["Subject"] = subject
+        message["From"] = self.sender
+        message["To"] = ", ".join(self.recipients)
+        message.set_content(text)
+        await asyncio.to_thread(self._send, message)
+
+
+class TokenBucket:
+    """令牌桶限速：period 秒内最多 rate 次，允许突发 rate 次"""
+
+    def __init__(self, rate: int, period: float):
+        self.rate = rate
+        self.period = period
+        self.tokens = float(rate)
+        self.updated = time.monotonic()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.rate, self.tokens + (now - self.updated) * self.rate / self.period)
+        self.updated = now
+
+    def delay(self) -> float:
+        """距离下一个令牌可用还需等待的秒数"""
+        self._refill()
+        if self.tokens >= 1:
+            return 0.0
+        return (1 - self.tokens) * self.period / self.rate
+
+    async def acquire(self):
+        while (wait := self.delay()) > 0:
+            await asyncio.sleep(wait)
+        self.tokens -= 1
+
+
+class NotificationChannel:
+    """
+    单个通知渠道
+
+    收到第一条事件后等待 window 秒收集后续事件，合并为一份摘要发送；
+    限速等待期间到达的事件并入同一份摘要。发送失败按指数退避重试，
+    重试耗尽后丢弃该摘要。
+    """
+
+    def __init__(self, sink: NotificationSink, window: float = 30.0, rate: int = 10, period: float = 3600.0,
+                 max_batch: int = 200, retries: int = 3, retry_base: float = 5.0):
+        self.sink = sink
+        self.window = window
+        self.bucket = TokenBucket(rate, period)
+        self.max_batch = max_batch
+        self.retries = retries
+        self.retry_base = retry_base
+        self.sent = 0
+        self.failed = 0
+
+        self._pending: List[Event] = []
+        self._wake = asyncio.Event()
+
+    def push(self, event: Event):
+        self._pending.append(event)
+        self._wake.set()
+
+    async def send_batch(self, events: List[Event]) -> bool:
+        for attempt in range(1, self.retries + 2):
+            try:
+                await self.sink.send(events)
+                self.sent += 1
+                return True
+            except Exception as e:
+                logger.warning(f"通知渠道 {self.sink.name} 第 {attempt} 次发送失败: {e}")
+                if attempt <= self.retries:
+                    await asyncio.sleep(retry_delay(attempt, base=self.retry_base))
+        self.failed += 1
+        return False
+
+    async def flush(self):
+        """立即发送所有待发事件（不等待收集窗口和限速）"""
+        while self._pending:
+            batch, self._pending = self._pending[:self.max_batch], self._pending[self.max_batch:]
+            await self.send_batch(batch)
+
+    async def run(self):
+        while True:
+            await self._wake.wait()
+            await asyncio.sleep(self.window)
+            await self.bucket.acquire()
+
+            batch, self._pending = self._pending[:self.max_batch], self._pending[self.max_batch:]
+            if not self._pending:
+                self._wake.clear()
+            try:
+                await self.send_batch(batch)
+            except asyncio.CancelledError:
+                # 停止时放回队列，由 flush 补发
+                self._pending[:0] = batch
+                raise
+
+
+class NotificationDispatcher:
+    """
+    通知分发
+
+    订阅事件广播，将指定类型的事件分发给各渠道，各渠道独立合并、限速和重试，
+    一个渠道阻塞不影响其他渠道。
+    """
+
+    def __init__(self, channels: List[NotificationChannel], types: Optional[Set[str]] = None,
+                 event_broker: Optional[EventBroker] = None):
+        self.channels = channels
+        self.types = types
+        self.broker = event_broker or broker
+        self._tasks: List[asyncio.Task] = []
+
+    async def _consume(self):
+        last_event_id = None
+        while True:
+            with self.broker.subscribe(last_event_id=last_event_id, types=self.types) as subscription:
+                async for event in subscription:
+                    if event.type == "reset":
+                        logger.warning("通知订阅落后过多，部分事件未通知")
+                        continue
+                    last_event_id = event.id
+                    for channel in self.channels:
+                        channel.push(event)
+            # 被判定为慢消费者后从上次位置重新订阅
+            logger.warning("通知订阅被断开，重新订阅")
+
+    async def start(self):
+        if not self.channels:
+            return
+        self._tasks.append(asyncio.create_task(self._consume()))
+        for channel in self.channels:
+            self._tasks.append(asyncio.create_task(channel.run()))
+
+    async def stop(self, flush: bool = True):
+        """停止分发；flush 时将未发送的事件立即发出"""
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks.clear()
+        for channel in self.channels:
+            if flush:
+                await channel.flush()
+            await channel.sink.close()
+
+
+def dispatcher_from_settings() -> NotificationDispatcher:
+    """根据配置创建通知分发器，未配置任何渠道时不启动"""
+    sinks: List[NotificationSink] = []
+    if settings.NOTIFY_WEBHOOK_URL:
+        sinks.append(WebhookSink(settings.NOTIFY_WEBHOOK_URL))
+    if settings.SMTP_HOST and settings.NOTIFY_EMAIL_TO:
+        sinks.append(EmailSink(
+            host=settings.SMTP_HOST,
+            port=settings.SMTP_PORT,
+            sender=settings.EMAILS_FROM_EMAIL or settings.SMTP_USER,
+            recipients=settings.NOTIFY_EMAIL_TO,
+            username=settings.SMTP_USER,
+            password=settings.SMTP_PASSWORD,
+            tls=settings.SMTP_TLS,
+            ssl=settings.SMTP_SSL,
+        ))
+
+    channels = [
+        NotificationChannel(
+            sink,
+            window=settings.NOTIFY_WINDOW,
+            rate=settings.NOTIFY_RATE,
+            period=settings.NOTIFY_RATE_PERIOD,
+            retries=settings.NOTIFY_RETRIES,
+        )
+        for sink in sinks
+    ]
+    return NotificationDispatcher(channels, types=set(settings.NOTIFY_EVENTS))
@@ -0,0 +1,153 @@
+import asyncio
+import errno
+import logging
+import os
+import re
+import uuid
+from collections import defaultdict
+from typing import Dict, List, Optional
+
+from ani_bot.bangumi import anime_keyword
+from ani_bot.db import crud
+from ani_bot.db.models import Anime, OrganizeOp, Torrent
+
+
+logger = logging.getLogger(__name__)
+
+_UNSAFE_CHARS = re.compile(r'[\\/:*?"<>|]')
+
+
+def safe_name(name: str) -> str:
+    """去除文件名中的非法字符"""
+    return _UNSAFE_CHARS.sub("_", name).strip().strip(".") or "Unknown"
+
+
+class DownloadMonitor:
+    """轮询下载器状态，将下载完成的种子标记为 completed"""
+
+    def __init__(self, downloader):
+        self.downloader = downloader
+
+    async def run(self):
+        poll_statuses = getattr(self.downloader, "poll_statuses", None)
+        if poll_statuses is None:
+            return
+
+        changed = await poll_statuses()
+        completed = {
+            torrent_hash: os.path.join(status["downloadDir"], status["name"])
+            for torrent_hash, status in changed.items()
+            if status.get("percentDone", 0) >= 1 and status.get("downloadDir") and status.get("name")
+        }
+        if completed:
+            await crud.mark_torrents_completed(completed)
+
+
+class LibraryOrganizer:
+    """
+    下载完成后整理到媒体库：{library_root}/{动漫名}/S{季度}/
+
+    link 模式创建硬链接，原文件保留给 BT 客户端继续做种；rename 模式在同一文件系统内移动。
+    两种方式都不复制数据，跨文件系统时操作失败而不是退化为复制。
+    每个操作先写入 OrganizeOp 日志再执行，进程崩溃后从日志恢复。
+    """
+
+    def __init__(self, library_root: str, mode: str = "link", batch_size: int = 50):
+        if mode not in ("link", "rename"):
+            raise ValueError(f"Unsupported organize mode: {mode}")
+        self.library_root = library_root
+        self.mode = mode
+        self.batch_size = batch_size
+
+    def target_dir(self, anime: Optional[Anime]) -> str:
+        if anime is None:
+            return os.path.join(self.library_root, "Unknown")
+        title = anime.title or anime_keyword(anime.original_title)
+        return os.path.join(self.library_root, safe_name(title), f"S{anime.season}")
+
+    def plan(self, torrent: Torrent, anime: Optional[Anime]) -> List[OrganizeOp]:
+        """为种子的每个文件生成整理操作；多文件种子保留种子目录内的相对路径"""
+        source = torrent.download_path
+        target_dir = self.target_dir(anime)
+
+        if os.path.isdir(source):
+            pairs = []
+            for root, _, files in os.walk(source):
+                for name in files:
+                    path = os.path.join(root, name)
+                    pairs.append((path, os.path.join(target_dir, os.path.relpath(path, source))))
+        else:
+            pairs = [(source, os.path.join(target_dir, os.path.basename(source)))]
+
+        if not pairs or not os.path.exists(pairs[0][0]):
+            return [OrganizeOp(torrent_id=torrent.id, source=source, target=target_dir, op=self.mode,
+                               status="failed", error="source not found")]
+        return [OrganizeOp(torrent_id=torrent.id, source=src, target=dst, op=self.mode) for src, dst in pairs]
+
+    @staticmethod
+    def apply(op: OrganizeOp):
+        """执行单个操作（幂等，可在崩溃后重放）"""
+        if os.path.exists(op.target):
+            if os.path.exists(op.source) and os.path.samefile(op.source, op.target):
+                return  # 已链接
+            if op.op == "rename" and not os.path.exists(op.source):
+                return  # 已移动
+            raise FileExistsError(errno.EEXIST, "target exists", op.target)
+
+        os.makedirs(os.path.dirname(op.target), exist_ok=True)
+        if op.op == "rename":
+            os.rename(op.source, op.target)
+        else:
+            os.link(op.source, op.target)
+
+    def execute(self, ops: List[OrganizeOp]):
+        """执行一批操作，结果写回 op.status"""
+        for op in ops:
+            if op.status != "planned":
+                continue
+            try:
+                self.apply(op)
+            except OSError as e:
+                op.status = "failed"
+                op.error = str(e)[:1000]
+                logger.warning(f"整理失败 {op.source} -> {op.target}: {e}")
+            else:
+                op.status = "done"
+
+    @staticmethod
+    def library_path(ops: List[OrganizeOp]) -> str:
+        """种子在媒体库中的路径：单文件为文件本身，多文件为公共目录"""
+        targets = [op.target for op in ops]
+        return targets[0] if len(targets) == 1 else os.path.commonpath(targets)
+
+    async def _finish(self, ops: List[OrganizeOp], anime_paths: Optional[Dict[uuid.UUID, str]] = None):
+        by_torrent: Dict[uuid.UUID, List[OrganizeOp]] = defaultdict(list)
+        for op in ops:
+            by_torrent[op.torrent_id].append(op)
+        library_paths = {torrent_id: self.library_path(items) for torrent_id, items in by_torrent.items()}
+        await crud.finish_organize_ops(ops, library_paths, anime_paths)
+
+    async def recover(self) -> int:
+        """重放上次中断时尚未完成的操作"""
+        ops = await crud.get_planned_organize_ops()
+        if ops:
+            await asyncio.to_thread(self.execute, ops)
+            await self._finish(ops)
+        return len(ops)
+
+    async def run(self) -> int:
+        """整理一批已完成的种子，返回处理的种子数"""
+        await self.recover()
+
+        rows = await crud.get_completed_torrents(self.batch_size)
+        if not rows:
+            return 0
+
+        plans = await asyncio.to_thread(lambda: [self.plan(torrent, anime) for torrent, anime in rows])
+        ops = [op for items in plans for op in items]
+        await crud.plan_organize_ops(ops)
+
+        await asyncio.to_thread(self.execute, ops)
+        anime_paths = {anime.id: os.path.dirname(self.target_dir(anime)) for _, anime in rows if anime is not None}
+        await self._finish(ops, anime_paths)
+        return len(rows)
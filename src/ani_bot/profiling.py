@@ -0,0 +1,217 @@
+import asyncio
+import cProfile
+import io
+import pstats
+import time
+import uuid
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Any, Callable, Deque, Dict, List, Optional
+
+import sentry_sdk
+
+from ani_bot.core.config import settings
+
+
+@dataclass(slots=True)
+class FeedTrace:
+    """单个 RSS 源在一次轮询中的各阶段耗时（秒）"""
+    url: str
+    stages: Dict[str, float] = field(default_factory=dict)
+    items: int = 0
+    error: Optional[str] = None
+
+    def add(self, stage: str, seconds: float):
+        self.stages[stage] = self.stages.get(stage, 0.0) + seconds
+
+
+class RunTrace:
+    """
+    一次 RSSParseTask.run 的阶段耗时报告
+
+    每个阶段同时作为 Sentry span 上报（未启用 Sentry 时为空操作）。
+    """
+
+    def __init__(self, name: str = "rss.poll"):
+        self.id = uuid.uuid4().hex[:12]
+        self.name = name
+        self.started_at = time.time()
+        self.duration = 0.0
+        self.feeds: Dict[str, FeedTrace] = {}
+        self.queue_peaks: Dict[str, int] = {}
+        self._start = time.perf_counter()
+
+    def feed(self, url: str) -> FeedTrace:
+        if url not in self.feeds:
+            self.feeds[url] = FeedTrace(url=url)
+        return self.feeds[url]
+
+    @contextmanager
+    def stage(self, name: str, url: str):
+        """记录某个源某个阶段的耗时"""
+        feed = self.feed(url)
+        start = time.perf_counter()
+        with sentry_sdk.start_span(op=f"rss.{name}", name=url):
+            try:
+                yield feed
+            finally:
+                feed.add(name, time.perf_counter() - start)
+
+    def observe_queue(self, stage: str, depth: int):
+        """记录阶段输入队列的峰值深度"""
+        if depth > self.queue_peaks.get(stage, 0):
+            self.queue_peaks[stage] = depth
+
+    def finish(self):
+        self.duration = time.perf_counter() - self._start
+
+    def totals(self) -> Dict[str, float]:
+        totals: Dict[str, float] = {}
+        for feed in self.feeds.values():
+            for stage, seconds in feed.stages.items():
+                totals[stage] = totals.get(stage, 0.0) + seconds
+        return totals
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "id": self.id,
+            "name": self.name,
+            "started_at": self.started_at,
+            "duration": round(self.duration, 6),
+            "stages": {stage: round(seconds, 6) for stage, seconds in self.totals().items()},
+            "queue_peaks": dict(self.queue_peaks),
+            "feeds": [
+                {
+                    "url": feed.url,
+                    "stages": {stage: round(seconds, 6) for stage, seconds in feed.stages.items()},
+                    "items": feed.items,
+                    "error": feed.error,
+                }
+                for feed in sorted(self.feeds.values(), key=lambda f: -sum(f.stages.values()))
+            ],
+        }
+
+
+class TraceBuffer:
+    """最近 N 次运行报告的环形缓冲区"""
+
+    def __init__(self, size: int = 100):
+        self._traces: Deque[RunTrace] = deque(maxlen=size)
+
+    def add(self, trace: RunTrace):
+        self._traces.append(trace)
+
+    def recent(self, limit: int = 20) -> List[RunTrace]:
+        """最近的运行报告，新的在前"""
+        return list(reversed(self._traces))[:limit]
+
+    def __len__(self):
+        return len(self._traces)
+
+
+# 采样中的运行里通过 to_thread 执行的线程各自的 cProfile，随任务上下文传递给子任务
+_thread_profiles: ContextVar[Optional[List[cProfile.Profile]]] = ContextVar("thread_profiles", default=None)
+
+
+async def to_thread(func: Callable[..., Any], /, *args, **kwargs) -> Any:
+    """
+    与 asyncio.to_thread 相同；在 RunProfiler.profile() 中调用时线程内的执行也计入采样
+
+    cProfile 只统计调用 enable() 的线程，解析和写库都在线程中执行，需要在线程内单独采样。
+    """
+    profiles = _thread_profiles.get()
+    if profiles is None:
+        return await asyncio.to_thread(func, *args, **kwargs)
+
+    def run():
+        profile = cProfile.Profile()
+        try:
+            profile.enable()
+        except ValueError:
+            # 解释器级别的 profiler（Python 3.12+ 的 sys.monitoring）已经覆盖所有线程
+            return func(*args, **kwargs)
+        try:
+            return func(*args, **kwargs)
+        finally:
+            profile.disable()
+            profiles.append(profile)
+
+    return await asyncio.to_thread(run)
+
+
+class RunProfiler:
+    """
+    按需 cProfile
+
+    request(runs) 后接下来 runs 次运行在 cProfile 下执行，完成后返回 pstats 文本。
+    cProfile 统计的是整个线程，运行期间其他协程的耗时也会计入；
+    运行中经 to_thread 在线程里执行的解析和写库单独采样后合并到报告中。
+    同一时刻只允许一个采样请求。
+    """
+
+    def __init__(self):
+        self.attached = False  # 本进程是否在运行被采样的任务（RSS 轮询只在 leader 中运行）
+        self._profile: Optional[cProfile.Profile] = None
+        self._thread_profiles: List[cProfile.Profile] = []
+        self._remaining = 0
+        self._future: Optional[asyncio.Future] = None
+        self._sort = "cumulative"
+        self._limit = 50
+
+    @property
+    def active(self) -> bool:
+        return self._future is not None and not self._future.done()
+
+    def request(self, runs: int = 1, sort: str = "cumulative", limit: int = 50) -> asyncio.Future:
+        if self.active:
+            raise RuntimeError("Profiling already in progress")
+        self._profile = cProfile.Profile()
+        self._thread_profiles = []
+        self._remaining = runs
+        self._sort = sort
+        self._limit = limit
+        self._future = asyncio.get_running_loop().create_future()
+        return self._future
+
+    def cancel(self):
+        if self.active:
+            self._future.cancel()
+        self._profile = None
+        self._thread_profiles = []
+        self._remaining = 0
+
+    @contextmanager
+    def profile(self):
+        """包裹一次运行；未请求采样时不做任何事"""
+        if not self.active:
+            yield
+            return
+
+        profile, thread_profiles = self._profile, self._thread_profiles
+        token = _thread_profiles.set(thread_profiles)
+        profile.enable()
+        try:
+            yield
+        finally:
+            profile.disable()
+            _thread_profiles.reset(token)
+            self._remaining -= 1
+            if self._remaining <= 0 and self.active:
+                self._future.set_result(self.report(profile, *thread_profiles))
+                self._profile = None
+                self._thread_profiles = []
+
+    def report(self, profile: cProfile.Profile, *thread_profiles: cProfile.Profile) -> str:
+        output = io.StringIO()
+        stats = pstats.Stats(profile, *thread_profiles, stream=output)
+        stats.strip_dirs().sort_stats(self._sort).print_stats(self._limit)
+        return output.getvalue()
+
+
+trace_buffer = TraceBuffer(size=settings.TRACE_HISTORY_SIZE)
+rss_profiler = RunProfiler()
+
+# 流水线名称 -> 返回各阶段队列深度的函数
+pipelines: Dict[str, Callable[[], Dict[str, Any]]] = {}
@@ -0,0 +1,142 @@
+import re
+from dataclasses import dataclass
+from typing import Iterable, List, Optional, Sequence, Tuple
+
+from ani_bot.core.config import settings
+
+
+@dataclass(slots=True)
+class ReleaseInfo:
+    """从种子标题解析出的发布信息"""
+    group: str = ""
+    episode: Optional[int] = None  # 合集或无法识别时为 None
+    resolution: int = 0  # 如 1080，未知为 0
+    version: int = 1  # v2 等修正版
+
+
+_GROUP = re.compile(r"^\s*[\[【]([^\]】]+)[\]】]")
+# 按可靠程度依次尝试：第05话、 - 05、[05]、EP05；05-12 之类的合集不匹配
+_EPISODES = [
+    re.compile(r"第\s*(\d{1,4})\s*[话話集]"),
+    re.compile(r"\s-\s(\d{1,4})(?:v\d)?(?=\s|\[|$|END)", re.IGNORECASE),
+    re.compile(r"[\[【](\d{1,4})(?:v\d)?(?:\s?END)?[\]】]", re.IGNORECASE),
+    re.compile(r"\b(?:EP|E)(\d{1,4})(?:v\d)?\b", re.IGNORECASE),
+]
+_VERSION = re.compile(r"(?:\d|\[)v(\d)\b", re.IGNORECASE)
+_RESOLUTION = re.compile(r"(?<!\d)(\d{3,4})[pP]\b|\d{3,4}[xX×](\d{3,4})\b|\b(4K)\b", re.IGNORECASE)
+# 方括号里的分辨率和年份不是集数
+_NOT_EPISODE = {480, 540, 720, 1080, 2160}
+
+
+def parse_release(title: str) -> ReleaseInfo:
+    """解析种子标题，如 [ANi] GNOSIA - 13 [1080P][Baha][WEB-DL] 或 【喵萌奶茶屋】[间谍过家家][05v2][1080p]"""
+    info = ReleaseInfo()
+
+    match = _GROUP.match(title)
+    if match:
+        info.group = match.group(1).strip()
+
+    for pattern in _EPISODES:
+        for match in pattern.finditer(title):
+            number = int(match.group(1))
+            if number in _NOT_EPISODE or 1900 <= number <= 2100:
+                continue
+            info.episode = number
+            break
+        if info.episode is not None:
+            break
+
+    match = _RESOLUTION.search(title)
+    if match:
+        info.resolution = 2160 if match.group(3) else int(match.group(1) or match.group(2))
+
+    match = _VERSION.search(title)
+    if match:
+        info.version = int(match.group(1))
+    return info
+
+
+Score = Tuple[int, ...]
+
+
+class ReleaseSelector:
+    """
+    同一剧集多个版本的择优
+
+    按 priority 中的顺序逐项比较（分数越大越好）：
+    - group: 在 groups 中越靠前越好，未列出的最低
+    - resolution: 在 resolutions 中越靠前越好，未列出的最低
+    - version: 版本号越大越好（v2 修正版优于原版）
+    - size: 默认越大越好，prefer_smaller 时越小越好
+    excluded_groups 中的字幕组以及大小超出 [min_size, max_size] 的种子不会被选中（大小未知时不限制）。
+    """
+
+    FIELDS = ("group", "resolution", "version", "size")
+
+    def __init__(self,
+                 groups: Sequence[str] = (),
+                 resolutions: Sequence[int] = (1080, 2160, 720),
+                 priority: Sequence[str] = ("resolution", "group", "version", "size"),
+                 prefer_smaller: bool = False,
+                 excluded_groups: Sequence[str] = (),
+                 min_size: int = 0,
+                 max_size: Optional[int] = None,
+        ):
+        unknown = set(priority) - set(self.FIELDS)
+        if unknown:
+            raise ValueError(f"Unsupported release priority: {sorted(unknown)}")
+        self.groups = [group.lower() for group in groups]
+        self.resolutions = list(resolutions)
+        self.priority = list(priority)
+        self.prefer_smaller = prefer_smaller
+        self.excluded_groups = {group.lower() for group in excluded_groups}
+        self.min_size = min_size
+        self.max_size = max_size
+
+    @staticmethod
+    def _rank(value, preferred: List) -> int:
+        return len(preferred) - preferred.index(value) if value in preferred else 0
+
+    def score(self, title: str, size: int = 0) -> Optional[Score]:
+        """计算得分，不可接受时返回 None"""
+        info = parse_release(title)
+        group = info.group.lower()
+        if group in self.excluded_groups:
+            return None
+        if size and (size < self.min_size or (self.max_size is not None and size > self.max_size)):
+            return None
+
+        values = {
+            "group": self._rank(group, self.groups),
+            "resolution": self._rank(info.resolution, self.resolutions),
+            "version": info.version,
+            "size": -size if self.prefer_smaller else size,
+        }
+        return tuple(values[field] for field in self.priority)
+
+    def best(self, candidates: Iterable[Tuple[str, int]]) -> Optional[int]:
+        """从 (标题, 大小) 中选出得分最高的一个，返回其下标；都不可接受时返回 None"""
+        best_index, best_score = None, None
+        for index, (title, size) in enumerate(candidates):
+            score = self.score(title, size)
+            if score is not None and (best_score is None or score > best_score):
+                best_index, best_score = index, score
+        return best_index
+
+
+def selector_from_settings() -> Optional[ReleaseSelector]:
+    if not settings.RELEASE_SELECTION:
+        return None
+    return ReleaseSelector(
+        groups=settings.RELEASE_GROUPS,
+        resolutions=settings.RELEASE_RESOLUTIONS,
+        priority=settings.RELEASE_PRIORITY,
+        prefer_smaller=settings.RELEASE_PREFER_SMALLER,
+        excluded_groups=settings.RELEASE_EXCLUDED_GROUPS,
+        min_size=settings.RELEASE_MIN_SIZE,
+        max_size=settings.RELEASE_MAX_SIZE,
+    )
+
+
+# 为 None 时不做择优，所有新种子都进入下载队列
+selector = selector_from_settings()
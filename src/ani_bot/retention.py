@@ -0,0 +1,133 @@
+import asyncio
+import logging
+from datetime import timedelta
+from functools import partial
+from typing import Dict, Optional
+
+from sqlalchemy import func
+from sqlmodel import select
+
+from ani_bot.core import db as core_db
+from ani_bot.core.config import settings
+from ani_bot.db import crud
+from ani_bot.db.models import Anime, Episode, EventLog, Job, OrganizeOp, PrunedTorrent, Torrent
+
+
+logger = logging.getLogger(__name__)
+
+# 仍在下载器中处理的种子不会被清理
+_ACTIVE_TORRENT_STATUSES = ("downloading", "completed")
+
+
+class RetentionManager:
+    """
+    数据保留与压缩
+
+    - superseded_torrents: 剧集已下载后，删除该剧集其余未下载（pending/failed/skipped）的种子
+    - dropped_after_days: 弃番（status=dropped）的种子在 N 天后删除，没有种子的未下载剧集一并删除
+    - history_after_days: 已完成/失败的任务、整理日志与事件日志在 N 天后删除
+    - tombstone_after_days: 已清理种子的 URL 记录（PrunedTorrent）在 N 天后删除，此时 RSS 中早已不再包含这些条目
+    删除按 batch_size 分批提交，批次之间让出事件循环；清理后执行增量 vacuum 和 ANALYZE。
+    """
+
+    def __init__(self,
+                 superseded_torrents: bool = True,
+                 dropped_after_days: Optional[int] = 90,
+                 history_after_days: Optional[int] = 7,
+                 tombstone_after_days: Optional[int] = 180,
+                 batch_size: int = 500,
+                 vacuum_pages: Optional[int] = None,
+        ):
+        self.superseded_torrents = superseded_torrents
+        self.dropped_after_days = dropped_after_days
+        self.history_after_days = history_after_days
+        self.tombstone_after_days = tombstone_after_days
+        self.batch_size = batch_size
+        self.vacuum_pages = vacuum_pages
+
+    async def _drain(self, delete_batch, *conditions) -> int:
+        total = 0
+        while True:
+            deleted = await delete_batch(*conditions, limit=self.batch_size)
+            total += deleted
+            if deleted < self.batch_size:
+                return total
+            await asyncio.sleep(0)
+
+    async def prune(self) -> Dict[str, int]:
+        """按策略删除过期数据，返回各类删除数量"""
+        now = crud.utcnow()
+        result: Dict[str, int] = {}
+
+        if self.superseded_torrents:
+            downloaded = select(Episode.id).where(Episode.download_status == "downloaded")
+            result["superseded_torrents"] = await self._drain(
+                crud.delete_torrents_batch,
+                Torrent.episode_id.in_(downloaded),
+                Torrent.download_status.in_(("pending", "failed", "skipped")),
+            )
+
+        if self.dropped_after_days is not None:
+            cutoff = now - timedelta(days=self.dropped_after_days)
+            dropped = select(Anime.id).where(Anime.status == "dropped")
+            result["dropped_torrents"] = await self._drain(
+                crud.delete_torrents_batch,
+                Torrent.anime_id.in_(dropped),
+                Torrent.created_at < cutoff,
+                Torrent.download_status.not_in(_ACTIVE_TORRENT_STATUSES),
+            )
+            with_torrents = select(Torrent.episode_id).where(Torrent.episode_id.is_not(None))
+            result["dropped_episodes"] = await self._drain(
+                partial(crud.delete_batch, Episode),
+                Episode.anime_id.in_(dropped),
+                Episode.download_status != "downloaded",
+                Episode.id.not_in(with_torrents),
+            )
+
+        if self.history_after_days is not None:
+            cutoff = now - timedelta(days=self.history_after_days)
+            result["jobs"] = await self._drain(
+                partial(crud.delete_batch, Job),
+                Job.status.in_(("done", "failed")),
+                Job.updated_at < cutoff,
+            )
+            result["organize_ops"] = await self._drain(
+                partial(crud.delete_batch, OrganizeOp),
+                OrganizeOp.status.in_(("done", "failed")),
+                OrganizeOp.updated_at < cutoff,
+            )
+            # 保留 ID 最大的一行：SQLite 的 INTEGER PRIMARY KEY 在表清空后会从 1 重新分配 ID，
+            # 各进程 EventRelay 的游标和 Last-Event-ID 都依赖 ID 单调递增
+            result["events"] = await self._drain(
+                partial(crud.delete_batch, EventLog),
+                EventLog.created_at < cutoff,
+                EventLog.id < select(func.max(EventLog.id)).scalar_subquery(),
+            )
+
+        if self.tombstone_after_days is not None:
+            cutoff = now - timedelta(days=self.tombstone_after_days)
+            result["tombstones"] = await self._drain(
+                partial(crud.delete_batch, PrunedTorrent),
+                PrunedTorrent.pruned_at < cutoff,
+            )
+
+        return result
+
+    async def run(self, full_vacuum: bool = False) -> Dict[str, int]:
+        """清理数据并压缩数据库"""
+        result = await self.prune()
+        await asyncio.to_thread(core_db.compact_database, full_vacuum, self.vacuum_pages)
+        if any(result.values()):
+            logger.info(f"数据清理完成: {result}")
+        return result
+
+
+def retention_from_settings() -> RetentionManager:
+    return RetentionManager(
+        superseded_torrents=settings.RETENTION_SUPERSEDED_TORRENTS,
+        dropped_after_days=settings.RETENTION_DROPPED_DAYS,
+        history_after_days=settings.RETENTION_HISTORY_DAYS,
+        tombstone_after_days=settings.RETENTION_TOMBSTONE_DAYS,
+        batch_size=settings.RETENTION_BATCH_SIZE,
+        vacuum_pages=settings.RETENTION_VACUUM_PAGES,
+    )
@@ -1,22 +1,49 @@
 import asyncio
-from datetime import datetime
-from typing import Awaitable, Callable, List, Tuple
+import time
+from contextlib import contextmanager, nullcontext
+from datetime import datetime, timedelta, timezone
+from typing import Any, Awaitable, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
 import aiohttp
+import sentry_sdk
 import xml.etree.ElementTree as ET
-from ani_bot.db.models import Anime, Episode, Torrent
+try:
+    from lxml import etree as lxml_etree
+except ImportError:  # lxml 为可选依赖
+    lxml_etree = None
+from ani_bot.db.models import ParsedAnime, ParsedEpisode, ParsedTorrent
 from ani_bot.downloader.bt_downloader import BTDownloader
+from ani_bot.health import FEED_GONE_STATUSES, FeedHealthTracker, FetchOutcome
+from ani_bot.profiling import RunProfiler, RunTrace, TraceBuffer, to_thread
+from ani_bot.release import parse_release
 
 
-async def fetch_rss_feed(session, url):
+class FeedFetchError(Exception):
+    """RSS 源抓取失败，status 为 HTTP 状态码（网络错误、超时为 None）"""
+
+    def __init__(self, message: str, status: Optional[int] = None):
+        super().__init__(message)
+        self.status = status
+
+
+async def fetch_feed(session, url) -> str:
+    """下载 RSS 源，失败时抛出 FeedFetchError"""
     try:
         async with session.get(url) as response:
-            if response.status == 200:
-                return await response.text()
-            else:
-                print(f"Failed to fetch {url}, status: {response.status}")
-                return None
+            if response.status != 200:
+                raise FeedFetchError(f"HTTP {response.status}", status=response.status)
+            return await response.text()
+    except FeedFetchError:
+        raise
+    except asyncio.TimeoutError:
+        raise FeedFetchError("timeout")
     except Exception as e:
-        print(f"Error fetching {url}: {e}")
+        raise FeedFetchError(f"{type(e).__name__}: {e}")
+
+async def fetch_rss_feed(session, url):
+    try:
+        return await fetch_feed(session, url)
+    except FeedFetchError as e:
+        print(f"Failed to fetch {url}: {e}")
         return None
 
 async def fetch_all_rss(urls):
@@ -54,91 +81,150 @@ def register_parser(rss_type: str):
     return decorator
 
 
-@register_parser('mikan')
-def parse_mikan_rss(data: str) -> Tuple[Anime, List[Episode], List[Torrent]]:
+MIKAN_NAMESPACES = {'torrent': 'https://mikanime.tv/0.1/'}
+
+# 预先展开的命名空间标签，避免每次 find 时解析前缀
+_MIKAN_TORRENT = '{https://mikanime.tv/0.1/}torrent'
+_MIKAN_LINK = '{https://mikanime.tv/0.1/}link'
+_MIKAN_CONTENT_LENGTH = '{https://mikanime.tv/0.1/}contentLength'
+_MIKAN_PUB_DATE = '{https://mikanime.tv/0.1/}pubDate'
+
+# 蜜柑计划的 pubDate 为北京时间且不带时区
+MIKAN_TIMEZONE = timezone(timedelta(hours=8))
+
+
+ParseResult = Tuple[ParsedAnime, List[ParsedEpisode], List[ParsedTorrent]]
+
+
+def _build_mikan_result(channel_title: str, channel_description: str,
+                        items: Iterable[Tuple[str, str, str, str, str]]) -> ParseResult:
     """
-    Mikan 网站的 RSS 解析
+    由各 XML 后端提取出的原始字段构建解析结果
+
+    items 中每项为 (标题, <torrent:link>, <enclosure url>, contentLength, pubDate)，缺失时为空字符串
     """
     torrent_list = []
     episode_list = []
 
+    anime = ParsedAnime(original_title=channel_title, description=channel_description)
+
+    for title, torrent_link, enclosure_url, content_length, pub_date in items:
+        # 集数无法识别（如合集）时为 0
+        episode_list.append(ParsedEpisode(original_title=title, episode_number=parse_release(title).episode or 0))
+
+        # 如果 <torrent> 中没有链接，回退到 <enclosure> 中的链接
+        torrent_url = torrent_link or enclosure_url
+
+        # 解析 contentLength
+        size = 0
+        if content_length:
+            try:
+                size = int(content_length)
+            except ValueError:
+                pass
+
+        # 解析 pubDate
+        publish_date = None
+        if pub_date:
+            try:
+                publish_date = datetime.fromisoformat(pub_date)
+            except ValueError:
+                pass
+            else:
+                if publish_date.tzinfo is None:
+                    publish_date = publish_date.replace(tzinfo=MIKAN_TIMEZONE)
+                # 与 created_at 等字段一样以 UTC 存储，SQLite 和 PostgreSQL 读回的值一致
+                publish_date = publish_date.astimezone(timezone.utc)
+
+        torrent_list.append(ParsedTorrent(torrent_url, size, publish_date))
+
+    return anime, episode_list, torrent_list
+
+
+def _iter_mikan_items_etree(channel) -> Iterator[Tuple[str, str, str, str, str]]:
+    for item in channel.iterfind('item'):
+        title = item.findtext('title') or ""
+        torrent_elem = item.find(_MIKAN_TORRENT)
+        torrent_link = content_length = pub_date = ""
+        if torrent_elem is not None:
+            torrent_link = torrent_elem.findtext(_MIKAN_LINK) or ""
+            content_length = torrent_elem.findtext(_MIKAN_CONTENT_LENGTH) or ""
+            pub_date = torrent_elem.findtext(_MIKAN_PUB_DATE) or ""
+        enclosure = item.find('enclosure')
+        enclosure_url = enclosure.get('url', "") if enclosure is not None else ""
+        yield title, torrent_link, enclosure_url, content_length, pub_date
+
+
+@register_parser('mikan:etree')
+def parse_mikan_rss_etree(data: str) -> ParseResult:
+    """
+    Mikan 网站的 RSS 解析（标准库 xml.etree 后端）
+    """
     root = ET.fromstring(data)
     channel = root.find('channel')
     if channel is None:
         raise ValueError("Invalid RSS: no <channel> found")
-    
-    anime_title = channel.find('title')
-    anime_title_text = (anime_title.text if anime_title is not None else "") or ""
-    anime_description = channel.find('description')
-    anime_description_text = (anime_description.text if anime_description is not None else "") or ""
 
-    anime = Anime(original_title=anime_title_text, description=anime_description_text)
+    return _build_mikan_result(
+        channel.findtext('title') or "",
+        channel.findtext('description') or "",
+        _iter_mikan_items_etree(channel),
+    )
 
-    # 定义命名空间
-    namespaces = {'torrent': 'https://mikanime.tv/0.1/'}
 
-    for item in channel.findall('item'):
-        episode_title = item.find('title')
-        episode_title_text = (episode_title.text if episode_title is not None else "") or ""
-        episode = Episode(original_title=episode_title_text)
-        episode_list.append(episode)
-    
-        # 从 <torrent> 标签中获取信息
-        torrent_elem = item.find('torrent:torrent', namespaces)
-        torrent_url = ""
-        size = 0
-        publish_date = None
-        
-        if torrent_elem is not None:
-            # 获取 torrent 链接
-            torrent_link = torrent_elem.find('torrent:link', namespaces)
-            if torrent_link is not None and torrent_link.text:
-                torrent_url = torrent_link.text
-        
-        # 如果 <torrent> 中没有链接，回退到 <enclosure> 中的链接
-        if not torrent_url:
-            enclosure = item.find('enclosure')
-            if enclosure is not None and 'url' in enclosure.attrib:
-                torrent_url = enclosure.attrib['url']
-        
-        # 解析 contentLength
-        if torrent_elem is not None:
-            content_length = torrent_elem.find('torrent:contentLength', namespaces)
-            if content_length is not None and content_length.text:
-                try:
-                    size = int(content_length.text)
-                except ValueError:
-                    pass
-        
-        # 解析 pubDate
-        if torrent_elem is not None:
-            pub_date = torrent_elem.find('torrent:pubDate', namespaces)
-            if pub_date is not None and pub_date.text:
-                try:
-                    publish_date = datetime.fromisoformat(pub_date.text)
-                except ValueError:
-                    pass
-        
-        torrent = Torrent(
-            torrent_url=torrent_url,
-            size=size,
-            publish_date=publish_date
+if lxml_etree is not None:
+    _lxml_parser = lxml_etree.XMLParser(resolve_entities=False, no_network=True)
+
+    # 编译后的 XPath，命名空间映射只构建一次
+    _xpath_item_fields = [
+        lxml_etree.XPath(path, namespaces=MIKAN_NAMESPACES, smart_strings=False)
+        for path in (
+            'string(title)',
+            'string(torrent:torrent/torrent:link)',
+            'string(enclosure/@url)',
+            'string(torrent:torrent/torrent:contentLength)',
+            'string(torrent:torrent/torrent:pubDate)',
         )
-        torrent_list.append(torrent)
+    ]
 
-    return anime, episode_list, torrent_list
+    def _iter_mikan_items_lxml(channel) -> Iterator[Tuple[str, str, str, str, str]]:
+        for item in channel.iterfind('item'):
+            yield tuple(xpath(item) for xpath in _xpath_item_fields)
+
+    @register_parser('mikan:lxml')
+    def parse_mikan_rss_lxml(data: str) -> ParseResult:
+        """
+        Mikan 网站的 RSS 解析（lxml 后端）
+        """
+        # lxml 不接受带编码声明的 str，统一按 bytes 解析
+        raw = data.encode('utf-8') if isinstance(data, str) else data
+        root = lxml_etree.fromstring(raw, _lxml_parser)
+        channel = root.find('channel')
+        if channel is None:
+            raise ValueError("Invalid RSS: no <channel> found")
 
+        return _build_mikan_result(
+            channel.findtext('title') or "",
+            channel.findtext('description') or "",
+            _iter_mikan_items_lxml(channel),
+        )
+
+
+# 默认使用标准库后端：解析结果不再构建 SQLModel 对象后，逐条提取字段时
+# lxml 的元素代理开销超过其解析速度优势（见 benchmarks/bench_parse.py），lxml 仍可通过 'mikan:lxml' 选用
+parse_mikan_rss = register_parser('mikan')(parse_mikan_rss_etree)
 
-def parse_torrent(data: str, rss_type: str = 'mikan') -> Tuple[Anime, List[Episode], List[Torrent]]:
+
+def parse_torrent(data: str, rss_type: str = 'mikan') -> ParseResult:
     """
     RSS 解析函数，根据类型选择不同的解析器
     
     Args:
         data: RSS 数据
-        rss_type: RSS 源类型，默认为 'mikan'
+        rss_type: RSS 源类型，默认为 'mikan'；可用 'mikan:lxml' / 'mikan:etree' 指定 XML 后端
     
     Returns:
-        Tuple[Anime, List[Episode], List[Torrent]]: 解析结果
+        Tuple[ParsedAnime, List[ParsedEpisode], List[ParsedTorrent]]: 解析结果
     
     Raises:
         ValueError: 如果指定的 RSS 类型没有对应的解析器
@@ -151,7 +237,7 @@ def parse_torrent(data: str, rss_type: str = 'mikan') -> Tuple[Anime, List[Episo
 
 # 示例：如何添加新的解析器
 # @register_parser('other_rss_source')
-# def parse_other_rss(data: str) -> Tuple[Anime, List[Episode], List[Torrent]]:
+# def parse_other_rss(data: str) -> ParseResult:
 #     """
 #     其他 RSS 源的解析
 #     """
@@ -170,26 +256,194 @@ class RSSParseTask:
     rss解析任务
     TODO: 解析ani元数据、解析torrent文件
     TODO: 将解析添加到数据库,分为RSS解析任务和 rss下载任务
+
+    每次轮询是一条 fetch -> parse -> save 流水线，阶段之间用有界队列连接：
+    下游变慢时上游在 put 处等待，内存中最多缓存 queue_size + fetch_workers 个响应体；
+    解析在线程中执行，网络、解析和写库可以同时进行。
+
+    save_parse_result 返回 Future 时（写缓冲），本轮结束前调用 flush_saves 立即提交并等待完成，
+    提交结果才计入运行报告的条目数/错误和源健康统计。
     """
 
+    STAGES = ("fetch", "parse", "save")
+
     def __init__(self,
                  get_rss_sources: Callable[[], Awaitable[List[str]]],
-                 save_parse_result: Callable[[Anime, List[Episode], List[Torrent]], Awaitable[None]]
+                 save_parse_result: Callable[[ParsedAnime, List[ParsedEpisode], List[ParsedTorrent]], Awaitable[Any]],
+                 traces: Optional[TraceBuffer] = None,
+                 profiler: Optional[RunProfiler] = None,
+                 fetch_workers: int = 8,
+                 parse_workers: int = 2,
+                 save_workers: int = 1,
+                 queue_size: int = 16,
+                 health: Optional[FeedHealthTracker] = None,
+                 fetch_timeout: float = 30.0,
+                 flush_saves: Optional[Callable[[], Awaitable[Any]]] = None,
         ):
 
         self.get_rss_sources = get_rss_sources
         self.save_parse_result = save_parse_result  
+        self.traces = traces
+        self.profiler = profiler
+        self.workers = {"fetch": fetch_workers, "parse": parse_workers, "save": save_workers}
+        self.queue_size = queue_size
+        self.health = health
+        self.fetch_timeout = aiohttp.ClientTimeout(total=fetch_timeout)
+        self.flush_saves = flush_saves
+
+        self._queues: Dict[str, asyncio.Queue] = {}
+        self._busy = dict.fromkeys(self.STAGES, 0)
+
+    def stage_stats(self) -> Dict[str, Dict[str, int]]:
+        """各阶段当前的排队数量和正在处理的数量"""
+        return {
+            stage: {
+                "queued": self._queues[stage].qsize() if stage in self._queues else 0,
+                "busy": self._busy[stage],
+                "workers": self.workers[stage],
+            }
+            for stage in self.STAGES
+        }
 
     async def run(self):
+        """执行一次轮询；配置了 traces 时记录各源各阶段耗时，profiler 被请求时在 cProfile 下执行"""
+        if self.profiler is None:
+            return await self._run()
+        with self.profiler.profile():
+            return await self._run()
+
+    async def _run(self):
         rss_urls = await self.get_rss_sources()
+        if rss_urls and self.health is not None:
+            # 熔断中的源跳过本轮
+            rss_urls = await self.health.filter_due(rss_urls)
         if not rss_urls:
             return
 
-        async for result in fetch_all_rss(rss_urls):
-            if result is not None:
+        trace = RunTrace() if self.traces is not None else None
+        outcomes: Dict[str, FetchOutcome] = {}
+        commits: List[Tuple[str, int, asyncio.Future]] = []
+        urls: asyncio.Queue = asyncio.Queue()
+        for url in rss_urls:
+            urls.put_nowait(url)
+        fetched: asyncio.Queue = asyncio.Queue(maxsize=self.queue_size)
+        parsed: asyncio.Queue = asyncio.Queue(maxsize=self.queue_size)
+        self._queues = {"fetch": urls, "parse": fetched, "save": parsed}
+
+        with sentry_sdk.start_transaction(op="task", name="rss.poll"):
+            async with aiohttp.ClientSession(timeout=self.fetch_timeout) as session:
+                fetchers = [asyncio.create_task(self._fetch_worker(session, urls, fetched, trace, outcomes))
+                            for _ in range(min(self.workers["fetch"], len(rss_urls)))]
+                parsers = [asyncio.create_task(self._parse_worker(fetched, parsed, trace, outcomes))
+                           for _ in range(self.workers["parse"])]
+                savers = [asyncio.create_task(self._save_worker(parsed, trace, commits))
+                          for _ in range(self.workers["save"])]
+                try:
+                    # 上游全部结束后向下游发送结束标记，逐级关闭
+                    await asyncio.gather(*fetchers)
+                    for _ in parsers:
+                        await fetched.put(None)
+                    await asyncio.gather(*parsers)
+                    for _ in savers:
+                        await parsed.put(None)
+                    await asyncio.gather(*savers)
+                finally:
+                    # 被取消（调度器停止）时一并取消各阶段 worker
+                    workers = fetchers + parsers + savers
+                    for worker in workers:
+                        worker.cancel()
+                    await asyncio.gather(*workers, return_exceptions=True)
+                    self._queues = {}
+            await self._wait_commits(commits, trace, outcomes)
+
+        if self.health is not None:
+            await self.health.record(list(outcomes.values()))
+        if trace is not None:
+            trace.finish()
+            self.traces.add(trace)
+
+    @contextmanager
+    def _stage(self, trace: Optional[RunTrace], name: str, url: str):
+        self._busy[name] += 1
+        try:
+            with (trace.stage(name, url) if trace is not None else nullcontext()) as feed:
+                yield feed
+        finally:
+            self._busy[name] -= 1
+
+    async def _fetch_worker(self, session, urls: asyncio.Queue, fetched: asyncio.Queue,
+                            trace: Optional[RunTrace], outcomes: Dict[str, FetchOutcome]):
+        while True:
+            try:
+                url = urls.get_nowait()
+            except asyncio.QueueEmpty:
+                return
+            start = time.perf_counter()
+            with self._stage(trace, "fetch", url) as feed:
                 try:
-                    anime, episode_list, torrent_list = parse_torrent(result)
-                    await self.save_parse_result(anime, episode_list, torrent_list)
-                except Exception as e:
-                    print(f"解析失败: {e}")
-                    continue
\ No newline at end of file
+                    body = await fetch_feed(session, url)
+                except FeedFetchError as e:
+                    outcomes[url] = FetchOutcome(url, ok=False, latency=time.perf_counter() - start, error=str(e),
+                                                 permanent=e.status in FEED_GONE_STATUSES)
+                    if feed is not None:
+                        feed.error = str(e)
+                    print(f"Error fetching {url}: {e}")
+                    continue
+            outcomes[url] = FetchOutcome(url, ok=True, latency=time.perf_counter() - start)
+            await fetched.put((url, body))
+            if trace is not None:
+                trace.observe_queue("parse", fetched.qsize())
+
+    async def _parse_worker(self, fetched: asyncio.Queue, parsed: asyncio.Queue,
+                            trace: Optional[RunTrace], outcomes: Dict[str, FetchOutcome]):
+        while (item := await fetched.get()) is not None:
+            url, body = item
+            try:
+                with self._stage(trace, "parse", url):
+                    result = await to_thread(parse_torrent, body)
+            except Exception as e:
+                # 返回了无法解析的内容（如错误页）同样视为源故障
+                outcomes[url].ok = False
+                outcomes[url].error = f"parse: {e}"
+                outcomes[url].permanent = True
+                self._record_error(trace, url, e)
+                continue
+            await parsed.put((url, result))
+            if trace is not None:
+                trace.observe_queue("save", parsed.qsize())
+
+    async def _save_worker(self, parsed: asyncio.Queue, trace: Optional[RunTrace],
+                           commits: List[Tuple[str, int, asyncio.Future]]):
+        while (item := await parsed.get()) is not None:
+            url, (anime, episode_list, torrent_list) = item
+            try:
+                with self._stage(trace, "save", url) as feed:
+                    result = await self.save_parse_result(anime, episode_list, torrent_list)
+                    if isinstance(result, asyncio.Future):
+                        # 只是放入了写缓冲，提交结果在本轮结束前统一等待
+                        commits.append((url, len(torrent_list), result))
+                    elif feed is not None:
+                        feed.items = len(torrent_list)
+            except Exception as e:
+                self._record_error(trace, url, e)
+
+    async def _wait_commits(self, commits: List[Tuple[str, int, asyncio.Future]],
+                            trace: Optional[RunTrace], outcomes: Dict[str, FetchOutcome]):
+        """等待写缓冲提交，把结果记入运行报告和源健康统计"""
+        if commits and self.flush_saves is not None:
+            # 本轮不会再有新的结果，不必等到写缓冲的定时提交
+            await self.flush_saves()
+        results = await asyncio.gather(*(future for _, _, future in commits), return_exceptions=True)
+        for (url, items, _), result in zip(commits, results):
+            if isinstance(result, BaseException):
+                outcomes[url].ok = False
+                outcomes[url].error = f"save: {result}"
+                self._record_error(trace, url, result)
+            elif trace is not None:
+                trace.feed(url).items = items
+
+    @staticmethod
+    def _record_error(trace: Optional[RunTrace], url: str, error: Exception):
+        if trace is not None:
+            trace.feed(url).error = str(error)
+        print(f"解析失败: {url}: {error}")
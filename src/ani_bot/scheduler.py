@@ -7,12 +7,21 @@ class AsyncScheduler:
     def __init__(self):
         self.tasks = []
         self._running = False
+        self._stopping = asyncio.Event()
 
     async def _run_periodic(self, coro_func: Callable[[], Coroutine[Any, Any, Any]], interval: float):
         try:
             while self._running:
-                await coro_func()
-                await asyncio.sleep(interval)
+                try:
+                    await coro_func()
+                except Exception as e:
+                    # 单次执行失败不影响后续周期
+                    print(f"Task {coro_func.__name__} failed: {e}")
+                # 停止时立即结束等待
+                try:
+                    await asyncio.wait_for(self._stopping.wait(), interval)
+                except asyncio.TimeoutError:
+                    pass
         except asyncio.CancelledError:
             # 任务被取消时的清理逻辑
             print(f"Task {coro_func.__name__} cancelled")
@@ -26,14 +35,23 @@ class AsyncScheduler:
     async def start(self):
         """启动调度器"""
         self._running = True
+        self._stopping = asyncio.Event()
         print("Scheduler started.")
 
-    async def stop(self):
-        """优雅停止调度器"""
+    async def stop(self, timeout: float = 0):
+        """
+        优雅停止调度器
+
+        先等待正在执行的任务最多 timeout 秒（空闲任务立即退出），超时后再取消。
+        """
         self._running = False
+        self._stopping.set()
+        if self.tasks and timeout > 0:
+            await asyncio.wait(self.tasks, timeout=timeout)
         for task in self.tasks:
             task.cancel()
         # 修复：需要 await asyncio.gather
         await asyncio.gather(*self.tasks, return_exceptions=True)
+        self.tasks.clear()
         print("Scheduler stopped.")
 
@@ -0,0 +1,130 @@
+import asyncio
+import inspect
+import logging
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+
+logger = logging.getLogger(__name__)
+
+Item = Tuple[Any, ...]
+
+
+class WriteBehindBuffer:
+    """
+    写缓冲（group commit）
+
+    add() 只把参数放入缓冲区，达到 max_items 条或最早一条已等待 max_delay 秒时，
+    调用 flush_func 在一个事务中写入整批。缓冲区满时 add() 等待写入完成，形成背压。
+
+    - add() 返回的 Future 在该条数据提交后完成，需要确认落库的调用方可以 await 它
+    - on_commit(items) 在每批提交后调用（持久化钩子，可为协程函数）
+    - 整批失败时，如提供 fallback 则逐条重试，避免一条坏数据拖累整批
+    - 关闭前调用 close() 写入剩余数据；进程崩溃时缓冲区内未提交的数据会丢失，
+      RSS 场景下这些条目会在下次轮询时重新抓取
+    """
+
+    def __init__(self,
+                 flush_func: Callable[[List[Item]], Awaitable[None]],
+                 max_items: int = 50,
+                 max_delay: float = 1.0,
+                 fallback: Optional[Callable[..., Awaitable[None]]] = None,
+                 on_commit: Optional[Callable[[List[Item]], Any]] = None,
+        ):
+        self.flush_func = flush_func
+        self.max_items = max_items
+        self.max_delay = max_delay
+        self.fallback = fallback
+        self.on_commit = on_commit
+
+        self.flushes = 0
+        self.committed = 0
+        self.failed = 0
+
+        self._items: List[Item] = []
+        self._futures: List[asyncio.Future] = []
+        self._lock = asyncio.Lock()
+        self._timer: Optional[asyncio.Task] = None
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "buffered": len(self._items),
+            "flushes": self.flushes,
+            "committed": self.committed,
+            "failed": self.failed,
+        }
+
+    async def add(self, *item) -> asyncio.Future:
+        """放入一条数据，返回其提交完成的 Future"""
+        future = asyncio.get_running_loop().create_future()
+        self._items.append(item)
+        self._futures.append(future)
+
+        if len(self._items) >= self.max_items:
+            await self.flush()
+        elif self._timer is None:
+            self._timer = asyncio.create_task(self._flush_later())
+        return future
+
+    async def _flush_later(self):
+        await asyncio.sleep(self.max_delay)
+        self._timer = None
+        await self.flush()
+
+    async def flush(self) -> int:
+        """立即写入缓冲区中的全部数据，返回成功提交的条数"""
+        async with self._lock:
+            if self._timer is not None and self._timer is not asyncio.current_task():
+                self._timer.cancel()
+            self._timer = None
+
+            items, futures = self._items, self._futures
+            self._items, self._futures = [], []
+            if not items:
+                return 0
+
+            try:
+                await self.flush_func(items)
+                errors: List[Optional[Exception]] = [None] * len(items)
+            except Exception as e:
+                logger.warning(f"批量写入 {len(items)} 条失败: {e}")
+                errors = await self._retry_each(items, e)
+
+            committed = [item for item, error in zip(items, errors) if error is None]
+            self.flushes += 1
+            self.committed += len(committed)
+            self.failed += len(items) - len(committed)
+
+            for future, error in zip(futures, errors):
+                if future.done():
+                    continue
+                if error is None:
+                    future.set_result(None)
+                else:
+                    future.set_exception(error)
+                    future.exception()  # 已记录日志，调用方不 await 时不再告警
+
+            if committed and self.on_commit is not None:
+                result = self.on_commit(committed)
+                if inspect.isawaitable(result):
+                    await result
+            return len(committed)
+
+    async def _retry_each(self, items: List[Item], error: Exception) -> List[Optional[Exception]]:
+        if self.fallback is None:
+            return [error] * len(items)
+        errors: List[Optional[Exception]] = []
+        for item in items:
+            try:
+                await self.fallback(*item)
+                errors.append(None)
+            except Exception as e:
+                logger.warning(f"逐条写入失败: {e}")
+                errors.append(e)
+        return errors
+
+    async def close(self):
+        """停止定时写入并写入剩余数据"""
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        await self.flush()
@@ -0,0 +1,432 @@
+"""
+API 负载测试：在本地启动 main.py 中的应用，用并发客户端压测只读接口，同时后台 RSS 轮询持续写库
+
+- 预置一个大数据库（动漫、剧集、种子、RSS 源、源健康状态），默认使用临时 SQLite
+- 本地 feed 服务器模拟蜜柑 RSS，每次抓取每个源多出 1 个新条目；
+  轮询与生产环境配置相同（main.rss_pipeline_from_settings），每 --poll-interval 秒运行一次，结果经写缓冲入库；
+  轮询任务、写缓冲和调度器是压测专用的实例，不修改 main 中的全局对象
+- 每个客户端按权重随机请求接口，收到响应后立即发下一个请求（闭环）
+- 输出各接口的 p50/p95/p99 延迟和吞吐，超出 SLO 时退出码为 1
+
+用法（在 src 目录下，需安装 uvicorn）:
+    python -m benchmarks.bench_api --torrents 200000 --clients 32 --duration 30
+    python -m benchmarks.bench_api --database postgresql://postgres@localhost/ani_load --slo-p99 500
+    python -m benchmarks.bench_api --weight maintenance.db=1 --json report.json
+"""
+import argparse
+import asyncio
+import json
+import random
+import sys
+import tempfile
+import threading
+import time
+import uuid
+from collections import Counter
+from dataclasses import asdict, dataclass
+from typing import Any, Callable, Dict, List, Optional
+
+import aiohttp
+from aiohttp import web
+from sqlalchemy import func, make_url, select
+
+import ani_bot.core.db as core_db
+from ani_bot.core.config import settings
+from ani_bot.db import crud
+from ani_bot.db.models import Anime, Episode, FeedHealth, RSSFeed, Torrent
+from ani_bot.profiling import TraceBuffer, pipelines
+from ani_bot.scheduler import AsyncScheduler
+from benchmarks.bench_search import QUERIES, WORDS, random_title, series_pool
+
+
+FEED = '''<?xml version="1.0" encoding="utf-8"?>
+<rss version="2.0">
+    <channel>
+        <title>Mikan Project - 负载测试 {feed}</title>
+        <link>http://mikanime.tv/RSS/Bangumi?bangumiId={feed}</link>
+        <description>Mikan Project - 负载测试 {feed}</description>{items}
+    </channel>
+</rss>'''
+
+ITEM = '''
+        <item>
+            <guid isPermaLink="false">{title}</guid>
+            <link>https://mikanime.tv/Home/Episode/{key}</link>
+            <title>{title}</title>
+            <description>{title}[461.1 MB]</description>
+            <torrent xmlns="https://mikanime.tv/0.1/">
+                <link>https://mikanime.tv/Home/Episode/{key}</link>
+                <contentLength>483498400</contentLength>
+                <pubDate>2026-01-11T00:31:24.196106</pubDate>
+            </torrent>
+            <enclosure type="application/x-bittorrent" length="483498400"
+                url="https://mikanime.tv/Download/{key}.torrent" />
+        </item>'''
+
+
+@dataclass
+class Route:
+    name: str
+    path: str
+    weight: int
+    params: Callable[[random.Random], Dict[str, Any]]
+
+
+ROUTES = [
+    Route("rss", "/rss", 4, lambda rng: {"skip": rng.randrange(0, 200, 20), "limit": 100}),
+    Route("rss.health", "/rss/health", 2, lambda rng: {"limit": 100}),
+    Route("search.anime", "/search", 3, lambda rng: {"q": rng.choice(WORDS), "type": "anime"}),
+    Route("search.torrent", "/search", 3, lambda rng: {"q": rng.choice(QUERIES), "type": "torrent"}),
+    Route("profiling.traces", "/profiling/traces", 1, lambda rng: {"limit": 5}),
+    Route("profiling.pipelines", "/profiling/pipelines", 1, lambda rng: {}),
+    # 全表计数和 dbstat 扫描，属于管理接口，默认不压测
+    Route("maintenance.db", "/maintenance/db", 0, lambda rng: {}),
+]
+
+
+@dataclass
+class SLO:
+    """延迟阈值为毫秒，对每个接口分别检查；None 表示不检查"""
+    p50: Optional[float] = None
+    p95: Optional[float] = None
+    p99: Optional[float] = None
+    max_error_rate: float = 0.0
+    min_throughput: Optional[float] = None  # 所有接口合计，请求/秒
+
+
+@dataclass
+class RouteStats:
+    requests: int
+    errors: int
+    throughput: float
+    p50: float
+    p95: float
+    p99: float
+    max: float
+
+
+def percentile(samples: List[float], q: float) -> float:
+    """最近秩法，samples 需已排序"""
+    if not samples:
+        return 0.0
+    rank = max(int(len(samples) * q / 100 + 0.999999), 1)
+    return samples[min(rank, len(samples)) - 1]
+
+
+def summarize(samples: Dict[str, List[float]], errors: Counter, elapsed: float) -> Dict[str, RouteStats]:
+    """各接口及合计（all）的延迟分位数（毫秒）和吞吐"""
+    groups = dict(samples)
+    groups["all"] = [value for values in samples.values() for value in values]
+    report = {}
+    for name, values in groups.items():
+        values = sorted(value * 1000 for value in values)
+        report[name] = RouteStats(
+            requests=len(values),
+            errors=sum(errors.values()) if name == "all" else errors[name],
+            throughput=len(values) / elapsed if elapsed > 0 else 0.0,
+            p50=percentile(values, 50),
+            p95=percentile(values, 95),
+            p99=percentile(values, 99),
+            max=values[-1] if values else 0.0,
+        )
+    return report
+
+
+def check_slo(report: Dict[str, RouteStats], slo: SLO) -> List[str]:
+    """返回违反 SLO 的描述，为空表示全部达标"""
+    violations = []
+    for name, stats in report.items():
+        if not stats.requests:
+            continue
+        for field in ("p50", "p95", "p99"):
+            limit = getattr(slo, field)
+            if limit is not None and getattr(stats, field) > limit:
+                violations.append(f"{name}: {field} {getattr(stats, field):.1f}ms > {limit:.1f}ms")
+        if stats.errors / stats.requests > slo.max_error_rate:
+            violations.append(f"{name}: error rate {stats.errors / stats.requests:.2%} > {slo.max_error_rate:.2%}")
+    total = report.get("all")
+    if slo.min_throughput is not None and total is not None and total.throughput < slo.min_throughput:
+        violations.append(f"all: throughput {total.throughput:.1f} req/s < {slo.min_throughput:.1f} req/s")
+    return violations
+
+
+def seed(engine, feed_url: str, feeds: int, poll_feeds: int, anime: int, torrents: int, batch: int = 20000):
+    """
+    写入测试数据：poll_feeds 个启用的源指向本地 feed 服务器，其余为停用的源；
+    每个种子对应一个剧集，标题与 bench_search 相同（长尾的番名分布）
+    """
+    rng = random.Random(42)
+    pool = series_pool(rng, max(anime, len(WORDS)))
+    now = crud.utcnow()
+    with engine.begin() as conn:
+        if conn.execute(select(func.count()).select_from(Torrent)).scalar_one():
+            raise SystemExit("数据库中已有种子数据，请使用空数据库")
+
+        conn.execute(RSSFeed.__table__.insert(), [
+            {**RSSFeed().model_dump(), "id": uuid.uuid4(), "name": f"负载测试 {i}",
+             "url": f"{feed_url}/RSS/{i}" if i < poll_feeds else f"https://mikanime.tv/RSS/Bangumi?bangumiId={i}",
+             "enabled": i < poll_feeds, "created_at": now}
+            for i in range(feeds)
+        ])
+        conn.execute(FeedHealth.__table__.insert(), [
+            {**FeedHealth(url=f"https://mikanime.tv/RSS/Bangumi?bangumiId={i}").model_dump(),
+             "total_fetches": rng.randint(10, 1000), "last_success": now, "latency_avg": rng.random()}
+            for i in range(poll_feeds, feeds)
+        ])
+
+        anime_rows = [
+            {**Anime().model_dump(), "id": uuid.uuid4(), "original_title": name, "title": name, "last_updated": now}
+            for name in pool[:anime]
+        ]
+        conn.execute(Anime.__table__.insert(), anime_rows)
+
+        episode_template, torrent_template = Episode().model_dump(), Torrent().model_dump()
+        for offset in range(0, torrents, batch):
+            episodes, rows = [], []
+            for _ in range(min(batch, torrents - offset)):
+                title = random_title(rng, pool)
+                episode = {**episode_template, "id": uuid.uuid4(), "anime_id": rng.choice(anime_rows)["id"],
+                           "original_title": title, "episode_number": rng.randint(1, 24)}
+                episodes.append(episode)
+                rows.append({**torrent_template, "id": uuid.uuid4(), "title": title, "size": 483498400,
+                             "anime_id": episode["anime_id"], "episode_id": episode["id"],
+                             "download_status": "completed", "created_at": now})
+            conn.execute(Episode.__table__.insert(), episodes)
+            conn.execute(Torrent.__table__.insert(), rows)
+
+
+class FeedServer:
+    """模拟蜜柑 RSS：每个源保留最近 items 个条目，每次被抓取时新增 1 集"""
+
+    def __init__(self, items: int = 20):
+        self.items = items
+        self.fetches: Counter = Counter()
+        self.url = ""
+        self._runner: Optional[web.AppRunner] = None
+
+    async def feed(self, request: web.Request) -> web.Response:
+        feed = int(request.match_info["feed"])
+        self.fetches[feed] += 1
+        latest = self.fetches[feed] + self.items
+        items = "".join(
+            ITEM.format(
+                title=f"[ANi] 负载测试{feed} - {n:02d} [1080P][Baha][WEB-DL][AAC AVC][CHT][MP4]",
+                key=f"{feed:08x}{n:032x}",
+            )
+            for n in range(latest, latest - self.items, -1)
+        )
+        return web.Response(text=FEED.format(feed=feed, items=items), content_type="application/xml")
+
+    async def start(self):
+        app = web.Application()
+        app.router.add_get("/RSS/{feed}", self.feed)
+        self._runner = web.AppRunner(app, access_log=None)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, "127.0.0.1", 0)
+        await site.start()
+        port = self._runner.addresses[0][1]
+        self.url = f"http://127.0.0.1:{port}"
+
+    async def stop(self):
+        if self._runner is not None:
+            await self._runner.cleanup()
+
+
+class AppServer:
+    """
+    在后台线程中用 uvicorn 运行应用（不执行 lifespan，不参与 leader 选举）
+
+    后台轮询通过 submit 提交到同一个事件循环，与生产环境中 leader 进程的调度方式一致。
+    """
+
+    def __init__(self, app, host: str = "127.0.0.1", port: int = 0):
+        import uvicorn
+
+        config = uvicorn.Config(app, host=host, port=port, lifespan="off", log_level="warning", access_log=False)
+        self.server = uvicorn.Server(config)
+        self.host = host
+        self.url = ""
+        self.loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread = threading.Thread(target=lambda: asyncio.run(self._serve()), daemon=True)
+
+    async def _serve(self):
+        self.loop = asyncio.get_running_loop()
+        await self.server.serve()
+
+    def start(self, timeout: float = 10.0):
+        self._thread.start()
+        deadline = time.monotonic() + timeout
+        while not self.server.started:
+            if not self._thread.is_alive() or time.monotonic() > deadline:
+                raise RuntimeError("API server failed to start")
+            time.sleep(0.01)
+        port = self.server.servers[0].sockets[0].getsockname()[1]
+        self.url = f"http://{self.host}:{port}{settings.API_V1_STR}"
+
+    async def call(self, coro):
+        """在服务端事件循环中执行协程并等待结果"""
+        return await asyncio.wrap_future(asyncio.run_coroutine_threadsafe(coro, self.loop))
+
+    def stop(self):
+        self.server.should_exit = True
+        self._thread.join()
+
+
+async def client(session: aiohttp.ClientSession, base_url: str, routes: List[Route], rng: random.Random,
+                 measure_from: float, until: float, samples: Dict[str, List[float]], errors: Counter):
+    weights = [route.weight for route in routes]
+    while time.perf_counter() < until:
+        route = rng.choices(routes, weights)[0]
+        started = time.perf_counter()
+        try:
+            async with session.get(base_url + route.path, params=route.params(rng)) as resp:
+                await resp.read()
+                ok = resp.status == 200
+        except (aiohttp.ClientError, asyncio.TimeoutError):
+            ok = False
+        if started < measure_from:
+            continue  # 预热阶段不计入
+        samples[route.name].append(time.perf_counter() - started)
+        if not ok:
+            errors[route.name] += 1
+
+
+async def run_load(base_url: str, routes: List[Route], clients: int, duration: float,
+                   warmup: float = 0.0, seed: int = 0) -> Dict[str, RouteStats]:
+    routes = [route for route in routes if route.weight > 0]
+    samples: Dict[str, List[float]] = {route.name: [] for route in routes}
+    errors: Counter = Counter()
+    measure_from = time.perf_counter() + warmup
+    until = measure_from + duration
+    connector = aiohttp.TCPConnector(limit=clients)
+    async with aiohttp.ClientSession(connector=connector, timeout=aiohttp.ClientTimeout(total=60)) as session:
+        await asyncio.gather(*(
+            client(session, base_url, routes, random.Random(seed + i), measure_from, until, samples, errors)
+            for i in range(clients)
+        ))
+    return summarize(samples, errors, duration)
+
+
+async def run(database: str, routes: List[Route], clients: int, duration: float, warmup: float,
+              feeds: int, poll_feeds: int, anime: int, torrents: int, poll_interval: Optional[float]):
+    """准备数据库并启动应用和后台轮询，返回 (各接口统计, 写入统计)；结束后恢复原来的数据库 engine"""
+    from ani_bot import main as app_main
+
+    feed_server = FeedServer()
+    await feed_server.start()
+    app_engine = core_db.engine
+    core_db.engine = core_db.create_db_engine(database)
+    saved_pipelines = dict(pipelines)
+    try:
+        core_db.init_db()
+        started = time.perf_counter()
+        seed(core_db.engine, feed_server.url, feeds, poll_feeds, anime, torrents)
+        print(f"seeded {torrents} torrents, {anime} anime, {feeds} feeds in {time.perf_counter() - started:.1f}s")
+
+        traces = TraceBuffer(size=settings.TRACE_HISTORY_SIZE)
+        task, write_buffer = app_main.rss_pipeline_from_settings(traces=traces)
+        scheduler = AsyncScheduler()
+        pipelines.update(rss=task.stage_stats, rss_write=write_buffer.stats)
+
+        async def start_polling():
+            # 首次轮询会写入各源的全部现有条目，先执行一次，压测期间每轮每个源只有 1 个新条目
+            await task.run()
+            await write_buffer.flush()
+            await scheduler.start()
+            scheduler.add_task(task.run, interval=poll_interval)
+
+        async def stop_polling():
+            await scheduler.stop(timeout=settings.SCHEDULER_STOP_TIMEOUT)
+            await write_buffer.close()
+
+        server = AppServer(app_main.app)
+        server.start()
+        try:
+            if poll_interval is not None:
+                await server.call(start_polling())
+            report = await run_load(server.url, routes, clients, duration, warmup)
+        finally:
+            if poll_interval is not None:
+                await server.call(stop_polling())
+            server.stop()
+
+        with core_db.session_scope() as db_session:
+            written = db_session.scalar(select(func.count()).select_from(Torrent)) - torrents
+        polls = [trace.duration for trace in traces.recent(settings.TRACE_HISTORY_SIZE)]
+        writer = {
+            "polls": len(polls),
+            "poll_avg_s": sum(polls) / len(polls) if polls else 0.0,
+            "poll_max_s": max(polls, default=0.0),
+            "torrents_written": written,
+            **write_buffer.stats(),
+        }
+    finally:
+        pipelines.clear()
+        pipelines.update(saved_pipelines)
+        core_db.engine.dispose()
+        core_db.engine = app_engine
+        await feed_server.stop()
+    return report, writer
+
+
+def main():
+    parser = argparse.ArgumentParser(description="API 负载测试与延迟 SLO 检查")
+    parser.add_argument("--database", default="", help="空数据库的 URL，默认使用临时 SQLite；会写入大量测试数据")
+    parser.add_argument("--torrents", type=int, default=100_000)
+    parser.add_argument("--anime", type=int, default=3000)
+    parser.add_argument("--feeds", type=int, default=500)
+    parser.add_argument("--poll-feeds", type=int, default=50, help="后台轮询的源数量")
+    parser.add_argument("--poll-interval", type=float, default=1.0, help="轮询间隔，秒；<=0 时不运行后台写入")
+    parser.add_argument("--clients", type=int, default=8)
+    parser.add_argument("--duration", type=float, default=20.0)
+    parser.add_argument("--warmup", type=float, default=2.0)
+    parser.add_argument("--weight", action="append", default=[], metavar="ROUTE=N",
+                        help=f"调整接口权重，0 为不压测；可选: {', '.join(r.name for r in ROUTES)}")
+    parser.add_argument("--slo-p50", type=float, default=None, help="毫秒")
+    parser.add_argument("--slo-p95", type=float, default=200.0, help="毫秒")
+    parser.add_argument("--slo-p99", type=float, default=500.0, help="毫秒")
+    parser.add_argument("--slo-error-rate", type=float, default=0.0)
+    parser.add_argument("--slo-throughput", type=float, default=None, help="合计请求/秒下限")
+    parser.add_argument("--json", help="将结果写入 JSON 文件")
+    args = parser.parse_args()
+
+    weights = dict(item.split("=", 1) for item in args.weight)
+    unknown = set(weights) - {route.name for route in ROUTES}
+    if unknown:
+        parser.error(f"unknown route: {', '.join(sorted(unknown))}")
+    routes = [Route(r.name, r.path, int(weights.get(r.name, r.weight)), r.params) for r in ROUTES]
+    slo = SLO(p50=args.slo_p50, p95=args.slo_p95, p99=args.slo_p99,
+              max_error_rate=args.slo_error_rate, min_throughput=args.slo_throughput)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        database = args.database or f"sqlite:///{tmp}/load.db"
+        report, writer = asyncio.run(run(
+            database, routes, args.clients, args.duration, args.warmup,
+            args.feeds, args.poll_feeds, args.anime, args.torrents,
+            args.poll_interval if args.poll_interval > 0 else None,
+        ))
+
+    print(f"{args.clients} clients, {args.duration:.0f}s, {make_url(database).get_backend_name()}")
+    print(f"{'route':<20} {'requests':>9} {'errors':>7} {'req/s':>8} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'max ms':>8}")
+    for name, stats in report.items():
+        print(f"{name:<20} {stats.requests:>9} {stats.errors:>7} {stats.throughput:>8.1f} "
+              f"{stats.p50:>8.1f} {stats.p95:>8.1f} {stats.p99:>8.1f} {stats.max:>8.1f}")
+    print(f"writer: {writer['polls']} polls, avg {writer['poll_avg_s']:.2f}s, max {writer['poll_max_s']:.2f}s, "
+          f"{writer['torrents_written']} torrents written, {writer['flushes']} flushes")
+
+    violations = check_slo(report, slo)
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({
+                "routes": {name: asdict(stats) for name, stats in report.items()},
+                "writer": writer,
+                "slo": asdict(slo),
+                "violations": violations,
+            }, f, ensure_ascii=False, indent=2)
+    for violation in violations:
+        print(f"SLO violated: {violation}")
+    sys.exit(1 if violations else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+"""
+写库吞吐基准：每个源单独提交 vs 写缓冲合并提交（group commit）
+
+模拟一次轮询 --feeds 个源、每个源 --items 个条目：
+  new          全新数据库，所有条目都是新的
+  incremental  重复轮询，每个源只有 1 个新条目
+
+用法（在 src 目录下）:
+    python -m benchmarks.bench_group_commit --feeds 300 --items 20
+"""
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+from dataclasses import replace
+
+from sqlalchemy import event
+from sqlmodel import SQLModel, create_engine
+
+import ani_bot.core.db as core_db
+from ani_bot.db import crud
+from ani_bot.db.search import init_search
+from ani_bot.rss import parse_torrent
+from ani_bot.writebehind import WriteBehindBuffer
+from benchmarks.bench_parse import make_feed
+
+
+def make_results(feeds: int, items: int, poll: int):
+    """每个源一部动漫；第 poll 次轮询时每个源比上一次多 1 个新条目"""
+    anime, episodes, torrents = parse_torrent(make_feed(items + poll))
+    results = []
+    for feed in range(feeds):
+        window = slice(poll, poll + items)
+        results.append((
+            replace(anime, original_title=f"{anime.original_title} #{feed}"),
+            [replace(e, original_title=f"{e.original_title} #{feed}") for e in episodes[window]],
+            [replace(t, torrent_url=f"{t.torrent_url}?feed={feed}") for t in torrents[window]],
+        ))
+    return results
+
+
+async def per_feed(results):
+    for result in results:
+        await crud.save_parsed_rss_result(*result)
+
+
+async def group_commit(results, batch_size: int):
+    buffer = WriteBehindBuffer(crud.save_parsed_rss_results, max_items=batch_size, max_delay=1.0)
+    for result in results:
+        await buffer.add(*result)
+    await buffer.close()
+
+
+async def run(mode: str, feeds: int, items: int, batch_size: int, synchronous: str):
+    timings = {}
+    for name in ("per-feed", "group"):
+        with tempfile.TemporaryDirectory() as tmp:
+            engine = create_engine(f"sqlite:///{os.path.join(tmp, 'bench.db')}")
+
+            @event.listens_for(engine, "connect")
+            def set_pragmas(conn, _):
+                conn.execute(f"PRAGMA synchronous={synchronous}")
+
+            SQLModel.metadata.create_all(engine)
+            init_search(engine)
+            core_db.engine = engine
+
+            if mode == "incremental":
+                await group_commit(make_results(feeds, items, poll=0), batch_size)
+            results = make_results(feeds, items, poll=1 if mode == "incremental" else 0)
+
+            started = time.perf_counter()
+            if name == "per-feed":
+                await per_feed(results)
+            else:
+                await group_commit(results, batch_size)
+            timings[name] = time.perf_counter() - started
+            engine.dispose()
+    return timings
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--feeds", type=int, default=300)
+    parser.add_argument("--items", type=int, default=20)
+    parser.add_argument("--batch-size", type=int, default=50)
+    parser.add_argument("--synchronous", default="FULL", choices=["OFF", "NORMAL", "FULL"])
+    args = parser.parse_args()
+
+    print(f"{args.feeds} feeds x {args.items} items, batch {args.batch_size}, synchronous={args.synchronous}")
+    print(f"{'mode':<12} {'per-feed s':>11} {'group s':>9} {'feeds/s per-feed':>17} {'feeds/s group':>14}")
+    for mode in ("new", "incremental"):
+        t = asyncio.run(run(mode, args.feeds, args.items, args.batch_size, args.synchronous))
+        print(f"{mode:<12} {t['per-feed']:>11.2f} {t['group']:>9.2f} "
+              f"{args.feeds / t['per-feed']:>17.0f} {args.feeds / t['group']:>14.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+"""
+RSS 解析后端基准测试
+
+用法（在 src 目录下）:
+    python -m benchmarks.bench_parse
+"""
+import timeit
+
+from ani_bot.rss import _parsers, parse_torrent
+
+
+ITEM = '''
+        <item>
+            <guid isPermaLink="false">[ANi] GNOSIA / GNOSIA - {n:02d} [1080P][Baha][WEB-DL][AAC AVC][CHT][MP4]</guid>
+            <link>https://mikanime.tv/Home/Episode/{n:040x}</link>
+            <title>[ANi] GNOSIA / GNOSIA - {n:02d} [1080P][Baha][WEB-DL][AAC AVC][CHT][MP4]</title>
+            <description>[ANi] GNOSIA / GNOSIA - {n:02d} [1080P][Baha][WEB-DL][AAC AVC][CHT][MP4][461.1 MB]</description>
+            <torrent xmlns="https://mikanime.tv/0.1/">
+                <link>https://mikanime.tv/Home/Episode/{n:040x}</link>
+                <contentLength>483498400</contentLength>
+                <pubDate>2026-01-11T00:31:24.196106</pubDate>
+            </torrent>
+            <enclosure type="application/x-bittorrent" length="483498400"
+                url="https://mikanime.tv/Download/20260111/{n:040x}.torrent" />
+        </item>'''
+
+
+def make_feed(items: int) -> str:
+    body = "".join(ITEM.format(n=n) for n in range(items))
+    return f'''<?xml version="1.0" encoding="utf-8"?>
+<rss version="2.0">
+    <channel>
+        <title>Mikan Project - 古诺希亚</title>
+        <link>http://mikanime.tv/RSS/Bangumi?bangumiId=3780&amp;subgroupid=583</link>
+        <description>Mikan Project - 古诺希亚</description>{body}
+    </channel>
+</rss>'''
+
+
+def bench(rss_type: str, data: str, seconds: float = 1.0) -> float:
+    """返回单次解析耗时（毫秒）"""
+    timer = timeit.Timer(lambda: parse_torrent(data, rss_type))
+    number, _ = timer.autorange()
+    number = max(int(number * seconds / 0.2), 1)
+    return min(timer.repeat(repeat=3, number=number)) / number * 1000
+
+
+def main():
+    backends = [name for name in ("mikan:etree", "mikan:lxml") if name in _parsers]
+    if "mikan:lxml" not in _parsers:
+        print("lxml 未安装，仅测试标准库后端")
+
+    print(f"{'items':>6} {'backend':<12} {'ms/feed':>10} {'us/item':>10}")
+    for items in (10, 1000):
+        data = make_feed(items)
+        for backend in backends:
+            ms = bench(backend, data)
+            print(f"{items:>6} {backend:<12} {ms:>10.3f} {ms * 1000 / items:>10.2f}")
+
+
+if __name__ == "__main__":
+    main()
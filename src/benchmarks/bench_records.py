@@ -0,0 +1,56 @@
+"""
+解析中间结果基准：轻量记录 vs SQLModel 对象
+
+用法（在 src 目录下）:
+    python -m benchmarks.bench_records
+"""
+import gc
+import time
+import tracemalloc
+
+from ani_bot.db.models import Anime, Episode, Torrent
+from ani_bot.rss import parse_torrent
+from benchmarks.bench_parse import make_feed
+
+
+def parse_to_orm(data: str):
+    """旧做法：为每个条目构建完整的 SQLModel 对象"""
+    anime, episodes, torrents = parse_torrent(data)
+    return (
+        Anime(original_title=anime.original_title, description=anime.description),
+        [Episode(original_title=episode.original_title) for episode in episodes],
+        [Torrent(torrent_url=t.torrent_url, size=t.size, publish_date=t.publish_date) for t in torrents],
+    )
+
+
+def measure(func, data: str, repeat: int = 5):
+    """返回 (最短耗时 ms, 分配峰值 KB, 存活对象占用 KB)"""
+    best = float("inf")
+    for _ in range(repeat):
+        gc.collect()
+        started = time.perf_counter()
+        func(data)
+        best = min(best, time.perf_counter() - started)
+
+    gc.collect()
+    tracemalloc.start()
+    result = func(data)
+    retained, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del result
+    return best * 1000, peak / 1024, retained / 1024
+
+
+def main():
+    data = make_feed(1000)
+    print("1000 items")
+    print(f"{'variant':<10} {'ms':>8} {'peak KB':>10} {'retained KB':>12} {'gc gen0':>8}")
+    for name, func in (("records", parse_torrent), ("sqlmodel", parse_to_orm)):
+        before = gc.get_stats()[0]["collections"]
+        ms, peak, retained = measure(func, data)
+        collections = gc.get_stats()[0]["collections"] - before
+        print(f"{name:<10} {ms:>8.1f} {peak:>10.0f} {retained:>12.0f} {collections:>8}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+"""
+全文搜索延迟基准：FTS5 trigram 索引 vs LIKE 全表扫描
+
+用法（在 src 目录下）:
+    python -m benchmarks.bench_search --rows 1000000
+"""
+import argparse
+import os
+import random
+import statistics
+import tempfile
+import time
+import uuid
+
+from sqlmodel import Session, SQLModel, create_engine
+from sqlalchemy import text
+
+from ani_bot.db.models import Torrent
+from ani_bot.db import search as db_search
+from ani_bot.db.search import init_search
+
+
+GROUPS = ["ANi", "LoliHouse", "Nekomoe kissaten", "喵萌奶茶屋", "桜都字幕组", "北宇治字幕组"]
+WORDS = [
+    "鬼灭之刃", "间谍过家家", "葬送的芙莉莲", "古诺希亚", "药屋少女的呢喃", "我推的孩子", "咒术回战",
+    "GNOSIA", "Frieren", "SPY×FAMILY", "Kusuriya no Hitorigoto", "Oshi no Ko", "Jujutsu Kaisen",
+    "グノーシア", "葬送のフリーレン", "薬屋のひとりごと",
+]
+QUERIES = ["葬送的芙莉莲", "frieren", "グノーシア", "LoliHouse 咒术回战", "1080p 间谍过家家", "不存在的番剧"]
+
+
+def series_pool(rng: random.Random, size: int = 3000):
+    """已知番名 + 随机生成的番名，使每个番名的命中数接近真实的长尾分布"""
+    names = list(WORDS)
+    while len(names) < size:
+        names.append("".join(chr(rng.randint(0x4E00, 0x9FA5)) for _ in range(rng.randint(3, 6))))
+    return names
+
+
+def random_title(rng: random.Random, pool) -> str:
+    group = rng.choice(GROUPS)
+    name = " ".join(rng.sample(pool, 2))
+    resolution = rng.choice(["1080P", "720p", "2160p"])
+    return f"[{group}] {name} - {rng.randint(1, 24):02d} [{resolution}][WEB-DL][CHS]"
+
+
+def populate(engine, rows: int, batch: int = 50000):
+    rng = random.Random(42)
+    pool = series_pool(rng)
+    template = Torrent().model_dump()
+    started = time.perf_counter()
+    with engine.begin() as conn:
+        for offset in range(0, rows, batch):
+            values = [
+                {**template, "id": uuid.uuid4(), "title": random_title(rng, pool)}
+                for _ in range(min(batch, rows - offset))
+            ]
+            conn.execute(Torrent.__table__.insert(), values)
+    return time.perf_counter() - started
+
+
+def like_search(session: Session, keyword: str, limit: int = 20):
+    """对照组：不走索引的 LIKE 查询"""
+    params = {f"t{i}": f"%{term}%" for i, term in enumerate(keyword.split())}
+    where = " AND ".join(f"title LIKE :t{i}" for i in range(len(params)))
+    rows = session.execute(text(f"SELECT id, title FROM torrent WHERE {where} LIMIT {limit}"), params).all()
+    count = session.execute(text(f"SELECT COUNT(*) FROM torrent WHERE {where}"), params).scalar_one()
+    return rows, count
+
+
+def timed(func, repeat: int):
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        samples.append((time.perf_counter() - started) * 1000)
+    return statistics.median(samples), max(samples)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_engine(f"sqlite:///{os.path.join(tmp, 'bench.db')}")
+        SQLModel.metadata.create_all(bind=engine)
+        init_search(engine)
+
+        elapsed = populate(engine, args.rows)
+        print(f"inserted {args.rows} torrents (with FTS triggers) in {elapsed:.1f}s")
+
+        print(f"{'query':<24} {'hits':>8} {'fts p50':>9} {'fts max':>9} {'like p50':>9}")
+        with Session(engine) as session:
+            for query in QUERIES:
+                _, hits = db_search.search(session, query, kind="torrent")
+                fts_p50, fts_max = timed(lambda: db_search.search(session, query, kind="torrent"), args.repeat)
+                like_p50, _ = timed(lambda: like_search(session, query), max(args.repeat // 2, 1))
+                print(f"{query:<24} {hits:>8} {fts_p50:>8.1f}ms {fts_max:>8.1f}ms {like_p50:>8.1f}ms")
+        engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,27 @@
+import os
+
+import pytest
+from sqlmodel import SQLModel, create_engine
+
+import ani_bot.core.db as core_db
+from ani_bot.db.search import init_search
+
+
+@pytest.fixture
+def db_engine(tmp_path, monkeypatch):
+    """
+    使用临时 SQLite 数据库替换全局 engine，避免污染 resources/anime.db
+
+    设置 TEST_DATABASE_URL 时改用该数据库（如本地 PostgreSQL），每个测试前清空全部表
+    """
+    url = os.environ.get("TEST_DATABASE_URL")
+    if url:
+        engine = core_db.create_db_engine(url)
+        SQLModel.metadata.drop_all(bind=engine)
+    else:
+        engine = create_engine(f"sqlite:///{tmp_path / 'test.db'}")
+    SQLModel.metadata.create_all(bind=engine)
+    init_search(engine)
+    monkeypatch.setattr(core_db, "engine", engine)
+    yield engine
+    engine.dispose()
@@ -0,0 +1,52 @@
+from collections import Counter
+
+import pytest
+
+import ani_bot.core.db as core_db
+from ani_bot.db import crud
+from ani_bot.events import EventBroker
+from ani_bot.main import rss_write_buffer
+from ani_bot.profiling import pipelines, trace_buffer
+from benchmarks.bench_api import ROUTES, SLO, check_slo, percentile, run, summarize
+
+
+def test_percentile():
+    samples = [float(i) for i in range(1, 101)]
+    assert (percentile(samples, 50), percentile(samples, 95), percentile(samples, 99)) == (50, 95, 99)
+    assert percentile([7.0], 99) == 7.0
+    assert percentile([], 50) == 0.0
+
+
+def test_check_slo():
+    report = summarize({"rss": [0.01] * 98 + [0.4, 0.9], "search": [0.02] * 10}, Counter(search=1), elapsed=1.0)
+    assert report["all"].requests == 110 and report["all"].throughput == 110
+
+    assert check_slo(report, SLO(p99=1000, max_error_rate=0.2)) == []
+    violations = check_slo(report, SLO(p95=100, p99=300, max_error_rate=0.05, min_throughput=200))
+    assert violations == [
+        "rss: p99 400.0ms > 300.0ms",
+        "search: error rate 10.00% > 5.00%",
+        "all: p99 400.0ms > 300.0ms",
+        "all: throughput 110.0 req/s < 200.0 req/s",
+    ]
+
+
+@pytest.mark.asyncio
+async def test_read_routes_under_poll(tmp_path, monkeypatch):
+    """小规模压测：后台轮询写入期间各接口都能正常响应；延迟只在 benchmarks.bench_api 中检查"""
+    pytest.importorskip("uvicorn")
+    # 轮询写入的事件发布到独立的 broker，不留在全局事件历史中
+    monkeypatch.setattr(crud, "broker", EventBroker())
+    engine = core_db.engine
+    saved_pipelines = dict(pipelines)
+
+    report, writer = await run(
+        f"sqlite:///{tmp_path / 'load.db'}", ROUTES, clients=4, duration=1.0, warmup=0.0,
+        feeds=20, poll_feeds=5, anime=50, torrents=1000, poll_interval=0.2,
+    )
+    assert all(report[route.name].requests for route in ROUTES if route.weight)
+    assert report["all"].errors == 0
+    assert writer["polls"] > 0 and writer["torrents_written"] > 0 and writer["failed"] == 0
+    # 全局状态恢复原样
+    assert core_db.engine is engine and pipelines == saved_pipelines
+    assert len(trace_buffer) == 0 and rss_write_buffer.stats()["flushes"] == 0
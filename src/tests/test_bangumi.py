@@ -0,0 +1,191 @@
+import time
+from collections import Counter
+from datetime import timedelta
+
+import pytest
+import pytest_asyncio
+from aiohttp import web
+from sqlalchemy import text
+from sqlmodel import Session, select
+
+from ani_bot.bangumi import BangumiClient, BangumiEnricher, LRUCache, anime_keyword
+from ani_bot.db import crud
+from ani_bot.db.models import Anime, BangumiCache, ParsedAnime, ParsedEpisode, ParsedTorrent
+
+
+SUBJECTS = {
+    "古诺希亚": {"id": 3780, "name": "グノーシア", "name_cn": "古诺希亚", "date": "2025-10-11", "eps": 21},
+}
+
+
+@pytest_asyncio.fixture
+async def fake_bangumi():
+    """本地 Bangumi API"""
+    calls = Counter()
+
+    async def search(request):
+        body = await request.json()
+        calls[body["keyword"]] += 1
+        subject = SUBJECTS.get(body["keyword"])
+        return web.json_response({"data": [subject] if subject else [], "total": int(bool(subject))})
+
+    async def episodes(request):
+        return web.json_response({"data": [
+            {"ep": 1, "airdate": "2025-10-11"},
+            {"ep": 21, "airdate": "2999-01-01"},
+        ]})
+
+    app = web.Application()
+    app.router.add_post("/v0/search/subjects", search)
+    app.router.add_get("/v0/episodes", episodes)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+
+    client = BangumiClient(base_url=f"http://127.0.0.1:{runner.addresses[0][1]}")
+    yield client, calls
+    await client.close()
+    await runner.cleanup()
+
+
+def test_anime_keyword():
+    assert anime_keyword("Mikan Project - 古诺希亚") == "古诺希亚"
+    assert anime_keyword("古诺希亚") == "古诺希亚"
+
+
+def test_lru_eviction():
+    cache = LRUCache(maxsize=2)
+    cache.set("a", 1, ttl=60)
+    cache.set("b", 2, ttl=60)
+    cache.get("a")
+    cache.set("c", 3, ttl=60)
+    assert cache.get("b", None) is None
+    assert cache.get("a") == 1
+    cache.set("d", 4, ttl=-1)
+    assert cache.get("d", None) is None
+
+
+class TestBangumiEnricher:
+
+    @pytest.mark.asyncio
+    async def test_resolve_once(self, db_engine, fake_bangumi):
+        """同一关键字只查询一次 API，包括未匹配的关键字"""
+        client, calls = fake_bangumi
+        enricher = BangumiEnricher(client)
+
+        result = await enricher.resolve_many(["古诺希亚", "古诺希亚", "不存在"])
+        assert result["古诺希亚"]["id"] == 3780
+        assert result["古诺希亚"]["next_air_date"] == "2999-01-01"
+        assert result["不存在"] is None
+
+        await enricher.resolve_many(["古诺希亚", "不存在"])
+        # 新实例（如进程重启）从 SQLite 缓存读取
+        await BangumiEnricher(client).resolve_many(["古诺希亚", "不存在"])
+        assert calls == {"古诺希亚": 1, "不存在": 1}
+
+    @pytest.mark.asyncio
+    async def test_run_fills_anime(self, db_engine, fake_bangumi):
+        client, calls = fake_bangumi
+        parsed = ParsedAnime(original_title="Mikan Project - 古诺希亚")
+        await crud.save_parsed_rss_result(parsed, [ParsedEpisode()], [ParsedTorrent(torrent_url="x")])
+        [anime] = await crud.get_animes_to_enrich()
+        anime_id = anime.id
+
+        await BangumiEnricher(client).run()
+        # 后续轮询的解析结果不应覆盖已补全的元数据
+        await crud.save_parsed_rss_result(parsed, [], [])
+
+        with Session(db_engine) as session:
+            stored = session.get(Anime, anime_id)
+            assert stored.title == "古诺希亚"
+            assert stored.total_episodes == 21
+            assert stored.air_date.year == 2025
+            assert stored.next_air_date.year == 2999
+        assert await crud.get_animes_to_enrich() == []
+
+    @pytest.mark.asyncio
+    async def test_cache_expiry_is_utc(self, db_engine, fake_bangumi, monkeypatch):
+        """旧数据中不带时区的过期时间按 UTC 计算剩余时间，与本地时区无关"""
+        client, calls = fake_bangumi
+        expires_at = crud.utcnow().replace(tzinfo=None) + timedelta(hours=1)
+        with Session(db_engine) as session:
+            session.execute(text("INSERT INTO bangumicache (keyword, data, expires_at) VALUES ('不存在', '{}', :expires_at)"),
+                            {"expires_at": expires_at.isoformat(sep=" ")})
+            session.commit()
+
+        monkeypatch.setenv("TZ", "Asia/Shanghai")
+        time.tzset()
+        try:
+            enricher = BangumiEnricher(client)
+            assert await enricher.resolve_many(["不存在"]) == {"不存在": None}
+            _, lru_expires_at = enricher.lru._data["不存在"]
+        finally:
+            monkeypatch.undo()
+            time.tzset()
+        assert abs(lru_expires_at - time.time() - 3600) < 60
+        assert calls == {}
+
+    @pytest.mark.asyncio
+    async def test_unmatched_anime_do_not_block_batch(self, db_engine, fake_bangumi):
+        """未匹配的动漫超过一批时，之后的动漫仍会被补全"""
+        client, calls = fake_bangumi
+        for title in ["不存在1", "不存在2", "不存在3", "古诺希亚"]:
+            await crud.save_parsed_rss_result(ParsedAnime(original_title=f"Mikan Project - {title}"), [], [])
+
+        enricher = BangumiEnricher(client, batch_size=2)
+        for _ in range(3):
+            await enricher.run()
+
+        with Session(db_engine) as session:
+            titles = {anime.original_title: anime.title for anime in session.exec(select(Anime)).all()}
+        assert titles["Mikan Project - 古诺希亚"] == "古诺希亚"
+        assert sum(calls.values()) == 4
+        assert await crud.get_animes_to_enrich() == []
+
+    @pytest.mark.asyncio
+    async def test_refresh_ongoing_anime(self, db_engine, fake_bangumi):
+        """连载中的动漫在新一集播出或缓存过期后重新查询"""
+        client, calls = fake_bangumi
+        await crud.save_parsed_rss_result(ParsedAnime(original_title="Mikan Project - 古诺希亚"), [], [])
+        enricher = BangumiEnricher(client)
+        await enricher.run()
+        assert await crud.get_animes_to_enrich() == []
+
+        # 缓存获取之后 next_air_date 已到
+        now = crud.utcnow()
+        with Session(db_engine) as session:
+            anime = session.exec(select(Anime)).one()
+            anime.next_air_date = now - timedelta(hours=1)
+            session.add(anime)
+            cache = session.get(BangumiCache, "古诺希亚")
+            cache.fetched_at = now - timedelta(days=1)
+            session.add(cache)
+            session.commit()
+        [anime] = await crud.get_animes_to_enrich()
+        await enricher.run()
+        assert calls["古诺希亚"] == 2
+        with Session(db_engine) as session:
+            anime = session.exec(select(Anime)).one()
+            assert anime.next_air_date.year == 2999
+        assert await crud.get_animes_to_enrich() == []
+
+        # 缓存过期
+        with Session(db_engine) as session:
+            cache = session.get(BangumiCache, "古诺希亚")
+            cache.expires_at = now - timedelta(seconds=1)
+            session.add(cache)
+            session.commit()
+        await enricher.run()
+        assert calls["古诺希亚"] == 3
+
+        # 已完结的动漫不再刷新
+        with Session(db_engine) as session:
+            anime = session.exec(select(Anime)).one()
+            anime.status = "finished"
+            session.add(anime)
+            cache = session.get(BangumiCache, "古诺希亚")
+            cache.expires_at = now - timedelta(seconds=1)
+            session.add(cache)
+            session.commit()
+        assert await crud.get_animes_to_enrich() == []
@@ -0,0 +1,108 @@
+import asyncio
+import hashlib
+import os
+from collections import Counter
+from datetime import date
+
+import pytest
+import pytest_asyncio
+from aiohttp import web
+from sqlmodel import Session, select
+
+from ani_bot.crawler import HostLimiter, MikanCrawler, extract_bangumi_feed, extract_bangumi_links, season_url
+from ani_bot.db.models import RSSFeed
+
+
+FIXTURES = os.path.join(os.path.dirname(__file__), "fixtures", "mikan")
+
+
+def read_fixture(name: str) -> str:
+    with open(os.path.join(FIXTURES, name), encoding="utf-8") as f:
+        return f.read()
+
+
+@pytest_asyncio.fixture
+async def mikan_server():
+    """本地蜜柑页面服务器，支持 ETag 条件请求"""
+    stats = Counter()
+    active = {"now": 0, "max": 0}
+
+    async def serve(request, body):
+        stats[request.path] += 1
+        active["now"] += 1
+        active["max"] = max(active["max"], active["now"])
+        try:
+            await asyncio.sleep(0.01)
+            etag = '"%s"' % hashlib.md5(body.encode()).hexdigest()
+            if request.headers.get("If-None-Match") == etag:
+                stats["304"] += 1
+                return web.Response(status=304)
+            return web.Response(text=body, content_type="text/html", headers={"ETag": etag})
+        finally:
+            active["now"] -= 1
+
+    async def season(request):
+        return await serve(request, read_fixture("season.html"))
+
+    async def bangumi(request):
+        return await serve(request, read_fixture(f"bangumi_{request.match_info['id']}.html"))
+
+    app = web.Application()
+    app.router.add_get("/Home/BangumiCoverFlowByDayOfWeek", season)
+    app.router.add_get("/Home/Bangumi/{id}", bangumi)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    yield f"http://127.0.0.1:{runner.addresses[0][1]}", stats, active
+    await runner.cleanup()
+
+
+def test_season_url():
+    url = season_url("https://mikanime.tv", date(2026, 1, 5))
+    assert url == "https://mikanime.tv/Home/BangumiCoverFlowByDayOfWeek?year=2026&seasonStr=%E5%86%AC"
+
+
+def test_extract():
+    links = extract_bangumi_links("https://mikanime.tv", read_fixture("season.html"))
+    assert links == ["https://mikanime.tv/Home/Bangumi/3780", "https://mikanime.tv/Home/Bangumi/3781"]
+
+    feed = extract_bangumi_feed("https://mikanime.tv/Home/Bangumi/3780", read_fixture("bangumi_3780.html"))
+    assert feed.name == "古诺希亚"
+    assert feed.url == "https://mikanime.tv/RSS/Bangumi?bangumiId=3780"
+
+
+@pytest.mark.asyncio
+async def test_host_limiter():
+    limiter = HostLimiter(per_host=1, delay=0.05)
+    loop = asyncio.get_running_loop()
+    started = []
+
+    async def hit():
+        async with limiter.slot("http://a.test/x"):
+            started.append(loop.time())
+
+    await asyncio.gather(*(hit() for _ in range(3)))
+    assert started[2] - started[0] >= 0.09
+
+
+class TestMikanCrawler:
+
+    @pytest.mark.asyncio
+    async def test_crawl_and_recrawl(self, db_engine, mikan_server):
+        base_url, stats, active = mikan_server
+        crawler = MikanCrawler(base_url=base_url, per_host=2, delay=0)
+
+        assert await crawler.run() == 2
+        assert active["max"] <= 2
+        with Session(db_engine) as session:
+            feeds = session.exec(select(RSSFeed).order_by(RSSFeed.name)).all()
+            assert [feed.name for feed in feeds] == ["古诺希亚", "间谍过家家 第三季"]
+            assert feeds[0].url == f"{base_url}/RSS/Bangumi?bangumiId=3780"
+            assert not feeds[0].enabled
+
+        # 新实例（重启）：番组页面未到期不再抓取，季度页通过条件请求返回 304
+        assert await MikanCrawler(base_url=base_url, delay=0).run() == 0
+        assert stats["/Home/BangumiCoverFlowByDayOfWeek"] == 2
+        assert stats["/Home/Bangumi/3780"] == 1
+        assert stats["304"] == 1
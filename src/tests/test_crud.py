@@ -0,0 +1,50 @@
+import os
+
+import pytest
+from sqlmodel import Session, select
+
+from ani_bot.db import crud
+from ani_bot.db.models import Anime, Episode, Job, Torrent
+from ani_bot.rss import parse_torrent
+
+
+BANGUMI_XML = os.path.join(os.path.dirname(__file__), '..', 'ani_bot', 'resources', 'Bangumi.xml')
+
+
+def read_feed() -> str:
+    with open(BANGUMI_XML, encoding='utf-8') as f:
+        return f.read()
+
+
+class TestSaveParsedRSSResult:
+
+    @pytest.mark.asyncio
+    async def test_only_new_items_are_created(self, db_engine):
+        """重复轮询只为新种子建行，已有记录（包括下载状态）保持不变"""
+        result = parse_torrent(read_feed())
+        torrent_count = len(result[2])
+
+        await crud.save_parsed_rss_result(*result)
+        with Session(db_engine) as session:
+            torrents = session.exec(select(Torrent)).all()
+            assert len(torrents) == torrent_count
+            assert all(t.publish_date is not None and t.title for t in torrents)
+            torrents[0].download_status = "downloading"
+            session.add(torrents[0])
+            session.commit()
+            changed_id = torrents[0].id
+
+        await crud.save_parsed_rss_result(*parse_torrent(read_feed()))
+        with Session(db_engine) as session:
+            assert len(session.exec(select(Torrent)).all()) == torrent_count
+            assert len(session.exec(select(Anime)).all()) == 1
+            # 每集一行
+            assert len(session.exec(select(Episode)).all()) == torrent_count
+            assert len(session.exec(select(Job)).all()) == torrent_count
+            assert session.get(Torrent, changed_id).download_status == "downloading"
+
+    @pytest.mark.asyncio
+    async def test_length_mismatch(self, db_engine):
+        anime, episodes, torrents = parse_torrent(read_feed())
+        with pytest.raises(ValueError):
+            await crud.save_parsed_rss_result(anime, episodes, torrents[:-1])
@@ -0,0 +1,140 @@
+import asyncio
+import json
+import uuid
+
+import pytest
+
+from ani_bot.api.routers.events import event_stream
+from ani_bot.db import crud
+from ani_bot.events import EventBroker, EventRelay, broker
+from ani_bot.rss import parse_torrent
+from tests.test_crud import read_feed
+
+
+class TestEventBroker:
+
+    @pytest.mark.asyncio
+    async def test_fanout_and_type_filter(self):
+        events = EventBroker()
+        all_events = events.subscribe()
+        status_only = events.subscribe(types={"torrent.status"})
+
+        events.publish("episode.created", {"id": "e1"})
+        events.publish("torrent.status", {"id": "t1", "status": "completed"})
+
+        assert [(await all_events.get(0)).type for _ in range(2)] == ["episode.created", "torrent.status"]
+        assert (await status_only.get(0)).data["id"] == "t1"
+        assert await status_only.get(0.01) is None
+
+    @pytest.mark.asyncio
+    async def test_slow_subscriber_dropped(self):
+        events = EventBroker(queue_size=2)
+        slow = events.subscribe()
+        fast = events.subscribe()
+
+        for i in range(2):
+            events.publish("torrent.created", {"i": i})
+            await fast.get(0)
+        events.publish("torrent.created", {"i": 2})
+        assert (await fast.get(0)).data == {"i": 2}
+
+        # 队列满后断开，不再阻塞发布者
+        assert slow.dropped and events.subscriber_count == 1
+        with pytest.raises(ConnectionResetError):
+            await slow.get(0)
+
+    @pytest.mark.asyncio
+    async def test_resume_from_last_event_id(self):
+        events = EventBroker(history=3)
+        published = [events.publish("torrent.created", {"i": i}) for i in range(5)]
+
+        resumed = events.subscribe(last_event_id=published[3].id)
+        assert (await resumed.get(0)).id == published[4].id
+
+        # 缓冲区已丢弃 published[1]，先收到 reset
+        stale = events.subscribe(last_event_id=published[0].id)
+        assert [(await stale.get(0)).type for _ in range(4)] == ["reset"] + ["torrent.created"] * 3
+
+
+class FakeRequest:
+
+    def __init__(self):
+        self.disconnected = False
+
+    async def is_disconnected(self):
+        return self.disconnected
+
+
+@pytest.mark.asyncio
+async def test_sse_stream_format():
+    events = EventBroker()
+    request = FakeRequest()
+    stream = event_stream(request, events.subscribe(), heartbeat=0.01)
+
+    assert await anext(stream) == "retry: 3000\n\n"
+    assert await anext(stream) == ": ping\n\n"
+
+    event = events.publish("episode.created", {"title": "葬送的芙莉莲 - 01"})
+    message = await anext(stream)
+    assert message.startswith(f"id: {event.id}\nevent: episode.created\ndata: ")
+    assert json.loads(message.splitlines()[2][len("data: "):]) == {"title": "葬送的芙莉莲 - 01"}
+
+    request.disconnected = True
+    with pytest.raises(StopAsyncIteration):
+        await anext(stream)
+    assert events.subscriber_count == 0
+
+
+@pytest.mark.asyncio
+async def test_crud_publishes_new_items(db_engine):
+    """仅新插入的剧集和种子产生事件，下载状态变化产生 torrent.status"""
+    result = parse_torrent(read_feed())
+    with broker.subscribe() as subscription:
+        await crud.save_parsed_rss_result(*result)
+        await crud.save_parsed_rss_result(*parse_torrent(read_feed()))
+
+        received = []
+        while (event := await subscription.get(0)) is not None:
+            received.append(event)
+        types = [event.type for event in received]
+        assert types.count("episode.created") == len(result[1])
+        assert types.count("torrent.created") == len(result[2])
+
+        torrent_id = received[-1].data["id"]
+        await crud.update_torrent_download(uuid.UUID(torrent_id), "downloading", torrent_hash="abc")
+        await crud.mark_torrents_completed({"abc": "/downloads/x.mkv"})
+        statuses = [(await subscription.get(0)).data for _ in range(2)]
+        assert [s["status"] for s in statuses] == ["downloading", "completed"]
+        assert statuses[1]["download_path"] == "/downloads/x.mkv"
+
+
+@pytest.mark.asyncio
+async def test_relay_to_other_workers(db_engine):
+    """leader 进程写入的事件经事件日志表转发到其他 worker，ID 一致，可在任一 worker 续传"""
+    result = parse_torrent(read_feed())
+    worker = EventBroker()
+    relay = EventRelay(worker, crud.get_events, interval=0.01)
+    await relay.start()
+    try:
+        with broker.subscribe() as local, worker.subscribe() as remote:
+            await crud.save_parsed_rss_result(*result)
+            expected = []
+            while (event := await local.get(0)) is not None:
+                expected.append((event.id, event.type, event.data["id"]))
+
+            received = []
+            while (event := await remote.get(0.2)) is not None:
+                received.append((event.id, event.type, event.data["id"]))
+            assert received == expected and len(expected) == len(result[1]) + len(result[2])
+
+        # 新启动的 worker 载入最近的事件，客户端带 Last-Event-ID 重连后补发
+        restarted = EventBroker()
+        restarted_relay = EventRelay(restarted, crud.get_events)
+        await restarted_relay.start()
+        await restarted_relay.stop()
+        with restarted.subscribe(last_event_id=expected[0][0]) as resumed:
+            assert (await resumed.get(0)).id == expected[1][0]
+        # 已转发过的事件不会重复
+        assert await relay.poll() == 0
+    finally:
+        await relay.stop()
@@ -0,0 +1,141 @@
+from datetime import timedelta
+from unittest.mock import AsyncMock, patch
+
+import pytest
+from sqlmodel import Session, select
+
+from ani_bot.db import crud
+from ani_bot.db.models import FeedHealth, RSSFeed
+from ani_bot.health import FeedHealthTracker, FetchOutcome
+from ani_bot.rss import FeedFetchError, RSSParseTask
+from tests.test_crud import read_feed
+
+
+GOOD = "https://mikanani.me/RSS/Bangumi?bangumiId=1"
+DEAD = "https://mikanani.me/RSS/Bangumi?bangumiId=2"
+
+
+@pytest.fixture
+def feeds(db_engine):
+    with Session(db_engine) as session:
+        session.add_all([RSSFeed(name="good", url=GOOD), RSSFeed(name="dead", url=DEAD)])
+        session.commit()
+
+
+def expire_backoff(db_engine, url):
+    """模拟退避时间已过"""
+    with Session(db_engine) as session:
+        entry = session.get(FeedHealth, url)
+        entry.next_attempt_at = crud.utcnow() - timedelta(seconds=1)
+        session.add(entry)
+        session.commit()
+
+
+class TestFeedHealthTracker:
+
+    def test_backoff(self):
+        tracker = FeedHealthTracker(failure_threshold=3, backoff_base=60, backoff_max=300)
+        assert [tracker.backoff(n) for n in (3, 4, 5, 6)] == [60, 120, 240, 300]
+
+    @pytest.mark.asyncio
+    async def test_circuit_opens_probes_and_disables(self, db_engine, feeds):
+        tracker = FeedHealthTracker(failure_threshold=2, backoff_base=60, disable_after=3)
+        gone = FetchOutcome(DEAD, ok=False, error="HTTP 404", permanent=True)
+
+        await tracker.record([FetchOutcome(GOOD, ok=True, latency=0.2), gone])
+        assert await tracker.filter_due([GOOD, DEAD]) == [GOOD, DEAD]
+
+        # 连续失败达到阈值后熔断
+        await tracker.record([FetchOutcome(DEAD, ok=False, error="timeout")])
+        assert await tracker.filter_due([GOOD, DEAD]) == [GOOD]
+
+        # 退避结束后探测，仍失败则退避加倍；临时故障不计入自动停用
+        expire_backoff(db_engine, DEAD)
+        assert await tracker.filter_due([GOOD, DEAD]) == [GOOD, DEAD]
+        assert await tracker.record([FetchOutcome(DEAD, ok=False, error="HTTP 502")]) == []
+        health = (await crud.get_feed_health([DEAD]))[DEAD]
+        assert health.consecutive_failures == 3 and health.feed_failures == 1 and health.last_error == "HTTP 502"
+        assert timedelta(seconds=119) < health.next_attempt_at - health.last_failure <= timedelta(seconds=120)
+
+        expire_backoff(db_engine, DEAD)
+        assert await tracker.record([gone]) == []
+        expire_backoff(db_engine, DEAD)
+        assert await tracker.record([gone]) == [DEAD]
+        assert await crud.get_all_rss_feed_urls() == [GOOD]
+
+        # 手动重新启用后重新计数
+        with Session(db_engine) as session:
+            feed = session.exec(select(RSSFeed).where(RSSFeed.url == DEAD)).one()
+            feed.enabled = True
+            session.add(feed)
+            session.commit()
+        assert await tracker.filter_due(await crud.get_all_rss_feed_urls()) == [GOOD, DEAD]
+        await tracker.record([FetchOutcome(DEAD, ok=True, latency=1.0)])
+        health = (await crud.get_feed_health([DEAD]))[DEAD]
+        assert health.consecutive_failures == 0 and health.feed_failures == 0 and health.disabled_at is None
+        assert health.total_fetches == 6 and health.total_failures == 5
+
+    @pytest.mark.asyncio
+    async def test_site_outage_not_counted(self, db_engine, feeds):
+        """同一站点的源同时临时故障视为站点故障，不熔断也不停用；只有单个源失败时才计入"""
+        tracker = FeedHealthTracker(failure_threshold=1, disable_after=1)
+        for _ in range(3):
+            disabled = await tracker.record([
+                FetchOutcome(GOOD, ok=False, error="timeout"),
+                FetchOutcome(DEAD, ok=False, error="HTTP 503"),
+            ])
+            assert disabled == []
+        health = await crud.get_feed_health()
+        assert health[DEAD].consecutive_failures == 0 and health[DEAD].total_failures == 3
+        assert await tracker.filter_due([GOOD, DEAD]) == [GOOD, DEAD]
+
+        # 站点正常时源自身失效才停用
+        await tracker.record([FetchOutcome(GOOD, ok=True), FetchOutcome(DEAD, ok=False, error="timeout")])
+        assert await tracker.filter_due([GOOD, DEAD]) == [GOOD]
+        assert await tracker.record([FetchOutcome(GOOD, ok=False, error="HTTP 410", permanent=True),
+                                     FetchOutcome(DEAD, ok=False, error="timeout")]) == [GOOD]
+
+    @pytest.mark.asyncio
+    async def test_latency_stats(self, db_engine, feeds):
+        tracker = FeedHealthTracker(latency_alpha=0.5)
+        for latency in (1.0, 3.0):
+            await tracker.record([FetchOutcome(GOOD, ok=True, latency=latency)])
+        health = (await crud.get_feed_health([GOOD]))[GOOD]
+        assert health.latency_avg == 2.0 and health.latency_max == 3.0 and health.latency_last == 3.0
+
+        with Session(db_engine) as session:
+            [row] = crud.list_feed_health(session)
+        assert row["name"] == "good" and row["enabled"]
+
+
+@pytest.mark.asyncio
+async def test_poll_skips_open_circuits(db_engine, feeds):
+    """熔断中的源不再抓取，无法解析的响应也计为失败"""
+    calls = []
+
+    async def fetch(session, url):
+        calls.append(url)
+        if url == DEAD:
+            raise FeedFetchError("timeout")
+        return read_feed()
+
+    task = RSSParseTask(crud.get_all_rss_feed_urls, AsyncMock(),
+                        health=FeedHealthTracker(failure_threshold=2, backoff_base=60))
+    with patch("ani_bot.rss.fetch_feed", side_effect=fetch):
+        for _ in range(3):
+            await task.run()
+    assert calls.count(DEAD) == 2 and calls.count(GOOD) == 3
+
+    health = await crud.get_feed_health()
+    assert health[DEAD].last_error == "timeout" and health[DEAD].next_attempt_at is not None
+    assert health[GOOD].last_success is not None and health[GOOD].consecutive_failures == 0
+
+    with patch("ani_bot.rss.fetch_feed", AsyncMock(return_value="<html>rate limited</html>")):
+        await task.run()
+    health = (await crud.get_feed_health([GOOD]))[GOOD]
+    assert health.last_error.startswith("parse:") and health.feed_failures == 1
+
+    # 返回 404 计为源自身故障
+    with patch("ani_bot.rss.fetch_feed", AsyncMock(side_effect=FeedFetchError("HTTP 404", status=404))):
+        await task.run()
+    assert (await crud.get_feed_health([GOOD]))[GOOD].feed_failures == 2
@@ -0,0 +1,122 @@
+import json
+from datetime import timedelta
+
+import pytest
+from unittest.mock import AsyncMock, Mock
+from aiohttp import web
+from sqlmodel import Session, select
+
+from ani_bot.db import crud
+from ani_bot.db.models import Job, ParsedAnime, ParsedEpisode, ParsedTorrent, Torrent
+from ani_bot.jobs import DownloadJobHandlers, JobWorkerPool
+
+
+@pytest.fixture
+def mock_downloader():
+    """创建mock的BTDownloader"""
+    downloader = Mock()
+    downloader.add_torrent = AsyncMock(return_value=True)
+    return downloader
+
+
+def make_job(key: str, priority: int = 0) -> Job:
+    return Job(kind="noop", payload=json.dumps({"key": key}), dedupe_key=key, priority=priority)
+
+
+class TestJobQueue:
+
+    @pytest.mark.asyncio
+    async def test_enqueue_dedupe(self, db_engine):
+        """相同 dedupe_key 只入队一次"""
+        assert await crud.enqueue_jobs([make_job("a"), make_job("b"), make_job("a")]) == 2
+        assert await crud.enqueue_jobs([make_job("a")]) == 0
+
+    @pytest.mark.asyncio
+    async def test_claim_is_exclusive_and_ordered(self, db_engine):
+        """批量领取互不重叠，并按优先级排序"""
+        await crud.enqueue_jobs([make_job(str(i), priority=i) for i in range(5)])
+
+        first = await crud.claim_jobs("w1", 3, visibility_timeout=60)
+        second = await crud.claim_jobs("w2", 3, visibility_timeout=60)
+
+        assert [job.dedupe_key for job in first] == ["4", "3", "2"]
+        assert [job.dedupe_key for job in second] == ["1", "0"]
+        assert all(job.attempts == 1 for job in first + second)
+
+    @pytest.mark.asyncio
+    async def test_retry_and_visibility_timeout(self, db_engine):
+        """失败任务延迟重试；可见性超时的任务可被重新领取"""
+        await crud.enqueue_jobs([make_job("a")])
+        [job] = await crud.claim_jobs("w1", 10, visibility_timeout=60)
+
+        assert await crud.fail_job(job, "boom", retry_delay=3600)
+        assert await crud.claim_jobs("w1", 10, visibility_timeout=60) == []
+
+        with Session(db_engine) as session:
+            stored = session.get(Job, job.id)
+            assert stored.status == "pending" and stored.last_error == "boom"
+            stored.run_at = crud.utcnow() - timedelta(seconds=1)
+            session.add(stored)
+            session.commit()
+
+        [job] = await crud.claim_jobs("w1", 10, visibility_timeout=-1)
+        # 模拟 worker 崩溃：可见性超时后被其他 worker 领取，旧凭证失效
+        [reclaimed] = await crud.claim_jobs("w2", 10, visibility_timeout=60)
+        assert reclaimed.id == job.id and reclaimed.attempts == 3
+        assert not await crud.complete_job(job)
+        assert await crud.complete_job(reclaimed)
+
+
+class TestJobWorkerPool:
+
+    @pytest.mark.asyncio
+    async def test_run_once(self, db_engine):
+        seen = []
+
+        async def noop(payload):
+            seen.append(payload["key"])
+
+        async def broken(payload):
+            raise RuntimeError("broken")
+
+        await crud.enqueue_jobs([make_job("a"), make_job("b"), Job(kind="broken", payload="{}")])
+        pool = JobWorkerPool({"noop": noop, "broken": broken}, batch_size=10)
+        assert await pool.run_once() == 3
+        assert sorted(seen) == ["a", "b"]
+
+        with Session(db_engine) as session:
+            statuses = {job.kind: job.status for job in session.exec(select(Job)).all()}
+        assert statuses == {"noop": "done", "broken": "pending"}
+
+    @pytest.mark.asyncio
+    async def test_download_flow(self, db_engine, tmp_path, mock_downloader):
+        """新种子入队 -> 获取种子文件 -> 提交下载"""
+        async def torrent_file(request):
+            return web.Response(body=b"d4:infod4:name1:xee")
+
+        app = web.Application()
+        app.router.add_get("/t.torrent", torrent_file)
+        runner = web.AppRunner(app)
+        await runner.setup()
+        site = web.TCPSite(runner, "127.0.0.1", 0)
+        await site.start()
+        port = runner.addresses[0][1]
+
+        try:
+            torrent = ParsedTorrent(torrent_url=f"http://127.0.0.1:{port}/t.torrent")
+            await crud.save_parsed_rss_result(ParsedAnime(original_title="A"), [ParsedEpisode()], [torrent])
+            with Session(db_engine) as session:
+                torrent_id = session.exec(select(Torrent.id)).one()
+
+            handlers = DownloadJobHandlers(mock_downloader, cache_dir=str(tmp_path / "torrents"))
+            pool = JobWorkerPool(handlers.handlers)
+            assert await pool.run_once() == 1  # fetch_torrent
+            assert await pool.run_once() == 1  # download_torrent
+            await handlers.close()
+        finally:
+            await runner.cleanup()
+
+        path = str(tmp_path / "torrents" / f"{torrent_id}.torrent")
+        mock_downloader.add_torrent.assert_awaited_once_with(path)
+        with Session(db_engine) as session:
+            assert session.get(Torrent, torrent_id).download_status == "downloading"
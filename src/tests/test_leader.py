@@ -0,0 +1,85 @@
+from datetime import timedelta
+
+import pytest
+from sqlmodel import Session
+
+from ani_bot.db import crud
+from ani_bot.db.models import Lease
+from ani_bot.leader import LeaderElector
+
+
+class TestLease:
+
+    @pytest.mark.asyncio
+    async def test_only_one_holder(self, db_engine):
+        """同一租约同一时刻只有一个持有者"""
+        assert await crud.acquire_lease("scheduler", "a", ttl=30)
+        assert not await crud.acquire_lease("scheduler", "b", ttl=30)
+        # 持有者可以续约
+        assert await crud.acquire_lease("scheduler", "a", ttl=30)
+
+    @pytest.mark.asyncio
+    async def test_takeover_after_expiry(self, db_engine):
+        """租约过期后可被其他进程接管"""
+        assert await crud.acquire_lease("scheduler", "a", ttl=30)
+        with Session(db_engine) as session:
+            lease = session.get(Lease, "scheduler")
+            lease.expires_at = crud.utcnow() - timedelta(seconds=1)
+            session.add(lease)
+            session.commit()
+
+        assert await crud.acquire_lease("scheduler", "b", ttl=30)
+        lease = await crud.get_lease("scheduler")
+        assert lease.holder == "b"
+
+    @pytest.mark.asyncio
+    async def test_release(self, db_engine):
+        """释放后其他进程可立即获取"""
+        assert await crud.acquire_lease("scheduler", "a", ttl=30)
+        await crud.release_lease("scheduler", "a")
+        assert await crud.acquire_lease("scheduler", "b", ttl=30)
+
+
+class TestLeaderElector:
+
+    @pytest.mark.asyncio
+    async def test_failover(self, db_engine):
+        """leader 停止后另一个进程接管后台任务"""
+        events = []
+
+        def make(holder):
+            async def elected():
+                events.append(("elected", holder))
+
+            async def revoked():
+                events.append(("revoked", holder))
+
+            return LeaderElector("scheduler", 30, elected, revoked, holder=holder)
+
+        first, second = make("a"), make("b")
+        await first.tick()
+        await second.tick()
+        assert first.is_leader and not second.is_leader
+
+        await first.stop()
+        await second.tick()
+        assert second.is_leader
+        assert events == [("elected", "a"), ("revoked", "a"), ("elected", "b")]
+
+    @pytest.mark.asyncio
+    async def test_failed_start_releases_lease(self, db_engine):
+        """启动后台任务失败时停止已启动的部分并释放租约，其他进程可接管"""
+        events = []
+
+        async def elected():
+            events.append("elected")
+            raise RuntimeError("downloader unavailable")
+
+        async def revoked():
+            events.append("revoked")
+
+        first = LeaderElector("scheduler", 30, elected, revoked, holder="a")
+        await first.tick()
+        assert not first.is_leader
+        assert events == ["elected", "revoked"]
+        assert await crud.acquire_lease("scheduler", "b", ttl=30)
@@ -0,0 +1,95 @@
+import asyncio
+
+import pytest
+import pytest_asyncio
+from aiohttp import web
+
+from ani_bot.events import EventBroker
+from ani_bot.notify import NotificationChannel, NotificationDispatcher, TokenBucket, WebhookSink, render_digest
+
+
+@pytest_asyncio.fixture
+async def webhook_receiver():
+    """本地 webhook 接收端，前 fail_first 次请求返回 500"""
+    received = []
+    state = {"fail_first": 0}
+
+    async def hook(request):
+        if state["fail_first"] > 0:
+            state["fail_first"] -= 1
+            return web.Response(status=500)
+        received.append(await request.json())
+        return web.json_response({"ok": True})
+
+    app = web.Application()
+    app.router.add_post("/hook", hook)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+
+    yield f"http://127.0.0.1:{runner.addresses[0][1]}/hook", received, state
+    await runner.cleanup()
+
+
+def publish_episodes(events: EventBroker, count: int, title: str = "葬送的芙莉莲"):
+    for number in range(1, count + 1):
+        events.publish("episode.created", {"anime_title": title, "episode_number": number})
+
+
+def test_render_digest_groups_by_anime():
+    events = EventBroker()
+    publish_episodes(events, 3)
+    publish_episodes(events, 1, title="GNOSIA")
+    subject, text = render_digest(list(events._history))
+    assert subject.endswith("4 个新剧集")
+    assert text.splitlines() == ["葬送的芙莉莲: 第 1, 2, 3 集", "GNOSIA: 第 1 集"]
+
+
+@pytest.mark.asyncio
+async def test_burst_is_coalesced(webhook_receiver):
+    """一次突发的 50 个新剧集只发送一份摘要"""
+    url, received, _ = webhook_receiver
+    events = EventBroker()
+    channel = NotificationChannel(WebhookSink(url), window=0.05)
+    dispatcher = NotificationDispatcher([channel], types={"episode.created"}, event_broker=events)
+    await dispatcher.start()
+
+    await asyncio.sleep(0)
+    publish_episodes(events, 50)
+    events.publish("torrent.created", {"title": "ignored"})
+    await asyncio.sleep(0.2)
+    await dispatcher.stop()
+
+    assert len(received) == 1
+    assert received[0]["count"] == 50
+    assert received[0]["text"] == "葬送的芙莉莲: 第 " + ", ".join(str(i) for i in range(1, 51)) + " 集"
+
+
+@pytest.mark.asyncio
+async def test_retry_then_rate_limit(webhook_receiver):
+    url, received, state = webhook_receiver
+    state["fail_first"] = 2
+    events = EventBroker()
+    channel = NotificationChannel(WebhookSink(url), window=0.01, rate=1, period=3600, retries=2, retry_base=0.01)
+    dispatcher = NotificationDispatcher([channel], event_broker=events)
+    await dispatcher.start()
+    await asyncio.sleep(0)
+
+    publish_episodes(events, 1)
+    await asyncio.sleep(0.2)
+    assert len(received) == 1 and channel.sent == 1
+
+    # 令牌已用完：后续事件留在队列中，关闭时一次性发出
+    publish_episodes(events, 2, title="GNOSIA")
+    await asyncio.sleep(0.1)
+    assert len(received) == 1
+    await dispatcher.stop()
+    assert len(received) == 2 and received[1]["count"] == 2
+
+
+def test_token_bucket_delay():
+    bucket = TokenBucket(rate=2, period=10)
+    assert bucket.delay() == 0
+    bucket.tokens = 0
+    assert 4.9 < bucket.delay() <= 5
@@ -0,0 +1,109 @@
+import os
+
+import pytest
+from sqlmodel import Session, select
+
+from ani_bot.db import crud
+from ani_bot.db.models import Anime, Episode, OrganizeOp, Torrent
+from ani_bot.organizer import DownloadMonitor, LibraryOrganizer, safe_name
+
+
+def seed(engine, tmp_path):
+    """一个单文件种子和一个多文件种子，均已下载完成"""
+    downloads = tmp_path / "downloads"
+    (downloads / "batch" / "sub").mkdir(parents=True)
+    (downloads / "ep01.mkv").write_bytes(b"video")
+    (downloads / "batch" / "ep02.mkv").write_bytes(b"video2")
+    (downloads / "batch" / "sub" / "ep02.ass").write_bytes(b"subs")
+
+    anime = Anime(title="鬼灭之刃", season=2)
+    episode = Episode(anime_id=anime.id, episode_number=1)
+    single = Torrent(anime_id=anime.id, episode_id=episode.id, download_status="completed",
+                     download_path=str(downloads / "ep01.mkv"))
+    multi = Torrent(anime_id=anime.id, download_status="completed", download_path=str(downloads / "batch"))
+    ids = (anime.id, episode.id, single.id, multi.id)
+    with Session(engine) as session:
+        session.add_all([anime, episode, single, multi])
+        session.commit()
+    return ids
+
+
+def test_safe_name():
+    assert safe_name("Re:Zero / 第三季") == "Re_Zero _ 第三季"
+
+
+class TestLibraryOrganizer:
+
+    @pytest.mark.asyncio
+    async def test_hard_link_layout(self, db_engine, tmp_path):
+        anime_id, episode_id, single_id, multi_id = seed(db_engine, tmp_path)
+        library = tmp_path / "library"
+
+        assert await LibraryOrganizer(str(library)).run() == 2
+
+        season_dir = library / "鬼灭之刃" / "S2"
+        # 硬链接：与下载目录中的文件是同一个 inode，原文件保留用于做种
+        assert os.path.samefile(season_dir / "ep01.mkv", tmp_path / "downloads" / "ep01.mkv")
+        assert os.path.samefile(season_dir / "sub" / "ep02.ass", tmp_path / "downloads" / "batch" / "sub" / "ep02.ass")
+
+        with Session(db_engine) as session:
+            single = session.get(Torrent, single_id)
+            assert single.download_status == "organized"
+            assert single.download_path == str(season_dir / "ep01.mkv")
+            assert session.get(Torrent, multi_id).download_path == str(season_dir)
+            assert session.get(Episode, episode_id).download_status == "downloaded"
+            assert session.get(Anime, anime_id).download_path == str(library / "鬼灭之刃")
+            assert {op.status for op in session.exec(select(OrganizeOp)).all()} == {"done"}
+
+        assert await LibraryOrganizer(str(library)).run() == 0
+
+    @pytest.mark.asyncio
+    async def test_rename_and_recover(self, db_engine, tmp_path):
+        _, _, single_id, _ = seed(db_engine, tmp_path)
+        organizer = LibraryOrganizer(str(tmp_path / "library"), mode="rename")
+
+        # 模拟崩溃：操作日志已写入，执行到一半
+        rows = await crud.get_completed_torrents()
+        ops = [op for torrent, anime in rows for op in organizer.plan(torrent, anime)]
+        await crud.plan_organize_ops(ops)
+        organizer.apply(ops[0])
+
+        assert await organizer.recover() == len(ops)
+        assert not (tmp_path / "downloads" / "ep01.mkv").exists()
+        assert (tmp_path / "library" / "鬼灭之刃" / "S2" / "ep01.mkv").read_bytes() == b"video"
+        with Session(db_engine) as session:
+            assert session.get(Torrent, single_id).download_status == "organized"
+
+    @pytest.mark.asyncio
+    async def test_missing_source(self, db_engine, tmp_path):
+        torrent = Torrent(download_status="completed", download_path=str(tmp_path / "missing.mkv"))
+        torrent_id = torrent.id
+        with Session(db_engine) as session:
+            session.add(torrent)
+            session.commit()
+
+        await LibraryOrganizer(str(tmp_path / "library")).run()
+        with Session(db_engine) as session:
+            assert session.get(Torrent, torrent_id).download_status == "failed"
+
+
+@pytest.mark.asyncio
+async def test_download_monitor(db_engine):
+    torrent = Torrent(torrent_hash="abc", download_status="downloading")
+    torrent_id = torrent.id
+    with Session(db_engine) as session:
+        session.add(torrent)
+        session.commit()
+
+    class FakeDownloader:
+        async def poll_statuses(self):
+            return {
+                "abc": {"percentDone": 1.0, "downloadDir": "/downloads", "name": "ep01.mkv"},
+                "def": {"percentDone": 0.5, "downloadDir": "/downloads", "name": "ep02.mkv"},
+            }
+
+    await DownloadMonitor(FakeDownloader()).run()
+    with Session(db_engine) as session:
+        stored = session.get(Torrent, torrent_id)
+        assert stored.download_status == "completed"
+        assert stored.download_path == os.path.join("/downloads", "ep01.mkv")
@@ -0,0 +1,127 @@
+import asyncio
+from unittest.mock import AsyncMock, Mock, patch
+
+import pytest
+from fastapi import HTTPException
+
+from ani_bot.api.routers.profiling import profile_rss
+from ani_bot.db import crud
+from ani_bot.profiling import RunProfiler, TraceBuffer, rss_profiler
+from ani_bot.rss import FeedFetchError, RSSParseTask
+from ani_bot.writebehind import WriteBehindBuffer
+from tests.test_crud import read_feed
+
+
+URLS = ["https://mikanani.me/RSS/Bangumi?bangumiId=1", "https://mikanani.me/RSS/Bangumi?bangumiId=2"]
+
+
+async def fake_fetch_feed(session, url):
+    await asyncio.sleep(0.01)
+    if url != URLS[0]:
+        raise FeedFetchError("HTTP 404")
+    return read_feed()
+
+
+def make_task(traces=None, profiler=None, save=None):
+    return RSSParseTask(
+        get_rss_sources=AsyncMock(return_value=URLS),
+        save_parse_result=save or AsyncMock(),
+        traces=traces,
+        profiler=profiler,
+    )
+
+
+@pytest.mark.asyncio
+async def test_stage_timing_per_feed():
+    traces = TraceBuffer(size=2)
+    task = make_task(traces=traces)
+
+    with patch("ani_bot.rss.fetch_feed", side_effect=fake_fetch_feed):
+        for _ in range(3):
+            await task.run()
+
+    # 环形缓冲区只保留最近 2 次
+    assert len(traces) == 2
+    report = traces.recent(1)[0].to_dict()
+    feeds = {feed["url"]: feed for feed in report["feeds"]}
+    assert set(feeds[URLS[0]]["stages"]) == {"fetch", "parse", "save"}
+    assert feeds[URLS[0]]["items"] > 0 and feeds[URLS[0]]["error"] is None
+    assert feeds[URLS[0]]["stages"]["fetch"] >= 0.01
+    assert feeds[URLS[1]]["error"] == "HTTP 404"
+    assert report["duration"] >= report["stages"]["parse"]
+
+
+@pytest.mark.asyncio
+async def test_save_error_recorded():
+    traces = TraceBuffer()
+    task = make_task(traces=traces, save=AsyncMock(side_effect=RuntimeError("database is locked")))
+
+    with patch("ani_bot.rss.fetch_feed", side_effect=fake_fetch_feed):
+        await task.run()
+    [feed] = [f for f in traces.recent(1)[0].to_dict()["feeds"] if f["url"] == URLS[0]]
+    assert feed["error"] == "database is locked"
+
+
+@pytest.mark.asyncio
+async def test_buffered_commit_failure_recorded():
+    """写缓冲提交失败时计入运行报告和源健康统计，而不是在 add() 后就算成功"""
+    async def flush(items):
+        raise RuntimeError("disk full")
+
+    buffer = WriteBehindBuffer(flush, max_delay=3600)
+    health = Mock(filter_due=AsyncMock(side_effect=lambda urls: urls), record=AsyncMock())
+    traces = TraceBuffer()
+    task = RSSParseTask(AsyncMock(return_value=URLS[:1]), buffer.add, traces=traces, health=health,
+                        flush_saves=buffer.flush)
+
+    with patch("ani_bot.rss.fetch_feed", side_effect=fake_fetch_feed):
+        await task.run()
+    [feed] = traces.recent(1)[0].to_dict()["feeds"]
+    assert feed["error"] == "disk full" and feed["items"] == 0
+    [outcome] = health.record.call_args.args[0]
+    assert not outcome.ok and outcome.error == "save: disk full"
+
+
+@pytest.mark.asyncio
+async def test_profile_next_runs():
+    profiler = RunProfiler()
+    task = make_task(profiler=profiler)
+
+    with patch("ani_bot.rss.fetch_feed", side_effect=fake_fetch_feed):
+        # 未请求时不采样
+        await task.run()
+        future = profiler.request(runs=2, sort="tottime", limit=10)
+        with pytest.raises(RuntimeError):
+            profiler.request()
+
+        await task.run()
+        assert not future.done()
+        await task.run()
+
+    stats = await future
+    assert "Ordered by: internal time" in stats and "rss.py:" in stats
+    assert not profiler.active
+
+
+@pytest.mark.asyncio
+async def test_profile_includes_thread_work(db_engine):
+    """解析和写库在线程中执行，也要出现在采样结果里"""
+    profiler = RunProfiler()
+    task = make_task(profiler=profiler, save=crud.save_parsed_rss_result)
+
+    with patch("ani_bot.rss.fetch_feed", side_effect=fake_fetch_feed):
+        future = profiler.request(runs=1, sort="cumulative", limit=None)
+        await task.run()
+
+    stats = await future
+    assert "(parse_torrent)" in stats and "(_save_parsed_batch)" in stats
+
+
+@pytest.mark.asyncio
+async def test_profile_rejected_on_follower(monkeypatch):
+    """非 leader 进程不运行 RSS 轮询，采样请求立即返回而不是等到超时"""
+    monkeypatch.setattr(rss_profiler, "attached", False)
+    with pytest.raises(HTTPException) as exc:
+        await asyncio.wait_for(profile_rss(runs=1, sort="cumulative", limit=50, timeout=600.0), 1)
+    assert exc.value.status_code == 503
+    assert not rss_profiler.active
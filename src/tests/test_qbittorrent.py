@@ -0,0 +1,158 @@
+from collections import Counter
+
+import pytest
+import pytest_asyncio
+from aiohttp import web
+
+from ani_bot.downloader.bt_downloader import QBittorrentDownloader, magnet_info_hash, torrent_info_hash
+
+
+@pytest_asyncio.fixture
+async def fake_qbittorrent(tmp_path):
+    """本地 qBittorrent Web API 服务器（5.x：pause/resume 改名为 stop/start）"""
+    calls = Counter()
+    added = []
+    state = {"sid": "", "existing": set(), "rejected": set()}
+
+    async def login(request):
+        calls["login"] += 1
+        form = await request.post()
+        if form["password"] != "adminadmin":
+            return web.Response(text="Fails.")
+        state["sid"] = f"sid{calls['login']}"
+        response = web.Response(text="Ok.")
+        response.set_cookie("SID", state["sid"])
+        return response
+
+    def authorized(handler):
+        async def wrapper(request):
+            if request.cookies.get("SID") != state["sid"]:
+                return web.Response(status=403, text="Forbidden")
+            calls[request.path] += 1
+            return await handler(request)
+        return wrapper
+
+    async def add(request):
+        form = await request.post()
+        if "torrents" in form:
+            data = form["torrents"].file.read()
+            info_hash = torrent_info_hash(data)
+            added.append(("file", data, form.get("savepath")))
+        else:
+            info_hash = magnet_info_hash(form["urls"])
+            added.append(("url", form["urls"], form.get("savepath")))
+        # 已存在或无效的种子返回 Fails.
+        failed = info_hash in state["existing"] or info_hash in state["rejected"]
+        return web.Response(text="Fails." if failed else "Ok.")
+
+    async def info(request):
+        hashes = request.query["hashes"].split("|")
+        return web.json_response([{"hash": h} for h in hashes if h in state["existing"]])
+
+    async def maindata(request):
+        if request.query["rid"] == "0":
+            return web.json_response({"rid": 1, "full_update": True, "torrents": {
+                "aaa": {"name": "a", "state": "downloading", "progress": 0.5, "save_path": "/dl"},
+                "bbb": {"name": "b", "state": "stalledUP", "progress": 1, "save_path": "/dl"},
+            }})
+        # 增量结果只包含变化的字段
+        return web.json_response({"rid": 2, "torrents": {"aaa": {"progress": 1, "state": "uploading"}},
+                                  "torrents_removed": ["bbb"]})
+
+    async def stop(request):
+        return web.Response(text="")
+
+    app = web.Application()
+    app.router.add_post("/api/v2/auth/login", login)
+    app.router.add_post("/api/v2/torrents/add", authorized(add))
+    app.router.add_get("/api/v2/torrents/info", authorized(info))
+    app.router.add_get("/api/v2/sync/maindata", authorized(maindata))
+    app.router.add_post("/api/v2/torrents/stop", authorized(stop))
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+
+    downloader = QBittorrentDownloader({
+        "url": f"http://127.0.0.1:{runner.addresses[0][1]}",
+        "username": "admin",
+        "password": "adminadmin",
+        "download.save_path": str(tmp_path / "downloads"),
+    })
+    yield downloader, calls, added, state
+    await downloader.close()
+    await runner.cleanup()
+
+
+class TestQBittorrentDownloader:
+
+    @pytest.mark.asyncio
+    async def test_add_and_relogin(self, fake_qbittorrent, tmp_path):
+        downloader, calls, added, state = fake_qbittorrent
+        torrent_file = tmp_path / "a.torrent"
+        torrent_file.write_bytes(b"d4:infod4:name1:xee")
+
+        assert await downloader.add_torrent(str(torrent_file))
+        assert await downloader.add_magnet("magnet:?xt=urn:btih:abc", "/anime/a")
+        assert calls["login"] == 1
+
+        # 会话过期后重新登录，表单重新生成
+        state["sid"] = "expired"
+        assert await downloader.add_torrent(str(torrent_file))
+        assert calls["login"] == 2
+
+        assert added == [
+            ("file", b"d4:infod4:name1:xee", str(tmp_path / "downloads")),
+            ("url", "magnet:?xt=urn:btih:abc", "/anime/a"),
+            ("file", b"d4:infod4:name1:xee", str(tmp_path / "downloads")),
+        ]
+
+        # 未配置下载目录时不发送 savepath，由 qBittorrent 使用默认目录
+        downloader.save_path = None
+        assert await downloader.add_magnet("magnet:?xt=urn:btih:def")
+        assert added[-1] == ("url", "magnet:?xt=urn:btih:def", None)
+
+    @pytest.mark.asyncio
+    async def test_duplicate_add(self, fake_qbittorrent, tmp_path):
+        downloader, calls, added, state = fake_qbittorrent
+        torrent_file = tmp_path / "a.torrent"
+        torrent_file.write_bytes(b"d4:infod4:name1:xee")
+        magnet = "magnet:?xt=urn:btih:" + "a" * 40
+        state["existing"] = {torrent_info_hash(torrent_file.read_bytes()), "a" * 40}
+
+        # 已在 qBittorrent 中的种子视为添加成功
+        assert await downloader.add_torrents([(str(torrent_file), None), (magnet, None)]) == [True, True]
+        assert calls["/api/v2/torrents/info"] == 2
+
+        # 返回 Fails. 且查询不到时仍为失败
+        state["rejected"].add("b" * 40)
+        assert not await downloader.add_magnet("magnet:?xt=urn:btih:" + "b" * 40)
+
+    @pytest.mark.asyncio
+    async def test_incremental_poll(self, fake_qbittorrent):
+        downloader, calls, added, state = fake_qbittorrent
+        changed = await downloader.poll_statuses()
+        assert set(changed) == {"aaa", "bbb"}
+        assert changed["aaa"]["state"] == "downloading" and changed["aaa"]["percentDone"] == 0.5
+        assert changed["bbb"]["state"] == "seeding"
+
+        changed = await downloader.poll_statuses()
+        assert set(changed) == {"aaa"}
+        # 增量字段合并到已有状态上
+        assert changed["aaa"]["name"] == "a" and changed["aaa"]["downloadDir"] == "/dl"
+        assert changed["aaa"]["percentDone"] == 1 and changed["aaa"]["state"] == "seeding"
+        assert set(downloader.torrents) == {"aaa"}
+
+    @pytest.mark.asyncio
+    async def test_pause_falls_back_to_stop(self, fake_qbittorrent):
+        downloader, calls, added, state = fake_qbittorrent
+        assert await downloader.pause_download("aaa")
+        assert calls["/api/v2/torrents/stop"] == 1
+
+    @pytest.mark.asyncio
+    async def test_login_failure(self, fake_qbittorrent):
+        downloader, calls, added, state = fake_qbittorrent
+        downloader.password = "wrong"
+        assert not await downloader.add_magnet("magnet:?xt=urn:btih:abc")
+        with pytest.raises(RuntimeError):
+            await downloader.poll_statuses()
@@ -0,0 +1,132 @@
+import json
+
+import pytest
+from sqlmodel import Session, select, update
+
+from ani_bot import release
+from ani_bot.db import crud
+from ani_bot.db.models import Job, ParsedAnime, ParsedEpisode, ParsedTorrent, Torrent
+from ani_bot.release import ReleaseSelector, parse_release
+
+
+GB = 1024 ** 3
+
+ANIME = ParsedAnime(original_title="Mikan Project - 间谍过家家 第三季")
+ANI_1080 = "[ANi] SPY×FAMILY 第三季 - 05 [1080P][Baha][WEB-DL][AAC AVC][CHT][MP4]"
+ANI_720 = "[ANi] SPY×FAMILY 第三季 - 05 [720P][Baha][WEB-DL][AAC AVC][CHT][MP4]"
+LOLIHOUSE = "[LoliHouse] SPY×FAMILY S3 - 05 [WebRip 1080p HEVC-10bit AAC][简繁内封字幕]"
+LOLIHOUSE_V2 = "[LoliHouse] SPY×FAMILY S3 - 05v2 [WebRip 1080p HEVC-10bit AAC][简繁内封字幕]"
+
+
+class TestParseRelease:
+
+    @pytest.mark.parametrize("title, expected", [
+        (ANI_1080, ("ANi", 5, 1080, 1)),
+        (LOLIHOUSE_V2, ("LoliHouse", 5, 1080, 2)),
+        ("【喵萌奶茶屋】★10月新番★[间谍过家家 第三季][05][1080p][简日双语]", ("喵萌奶茶屋", 5, 1080, 1)),
+        ("[Nekomoe kissaten][SPY×FAMILY S3][05v2][1920x1080][JPSC].mp4", ("Nekomoe kissaten", 5, 1080, 2)),
+        ("[桜都字幕组] 间谍过家家 第三季 第12话 4K", ("桜都字幕组", 12, 2160, 1)),
+        ("[DBD-Raws][间谍过家家][2025][01-12TV全集][1080P][BDRip]", ("DBD-Raws", None, 1080, 1)),
+    ])
+    def test_titles(self, title, expected):
+        info = parse_release(title)
+        assert (info.group, info.episode, info.resolution, info.version) == expected
+
+
+class TestReleaseSelector:
+
+    def test_priority(self):
+        candidates = [(ANI_720, 1 * GB), (ANI_1080, 1 * GB), (LOLIHOUSE, 1 * GB)]
+        # 分辨率相同时按字幕组偏好
+        assert ReleaseSelector(groups=["LoliHouse"]).best(candidates) == 2
+        # 字幕组优先于分辨率
+        assert ReleaseSelector(groups=["ANi"], priority=["group", "resolution"]).best(candidates) == 1
+        # 同组修正版优先
+        assert ReleaseSelector().best([(LOLIHOUSE, GB), (LOLIHOUSE_V2, GB)]) == 1
+
+    def test_size(self):
+        candidates = [(ANI_1080, 2 * GB), (LOLIHOUSE, 1 * GB)]
+        assert ReleaseSelector().best(candidates) == 0
+        assert ReleaseSelector(prefer_smaller=True).best(candidates) == 1
+        assert ReleaseSelector(max_size=GB).best(candidates) == 1
+        assert ReleaseSelector(excluded_groups=["ani", "lolihouse"]).best(candidates) is None
+
+    def test_unknown_priority(self):
+        with pytest.raises(ValueError):
+            ReleaseSelector(priority=["seeders"])
+
+
+def releases(*items):
+    """由 (标题, 大小) 构建解析结果"""
+    episodes, torrents = [], []
+    for title, size in items:
+        episodes.append(ParsedEpisode(original_title=title, episode_number=parse_release(title).episode or 0))
+        torrents.append(ParsedTorrent(torrent_url=f"https://mikanime.tv/Download/{abs(hash(title))}.torrent", size=size))
+    return ANIME, episodes, torrents
+
+
+def queued_titles(db_engine):
+    """状态为 pending 且有待执行下载任务的种子"""
+    with Session(db_engine) as session:
+        ids = {json.loads(job.payload)["torrent_id"] for job in session.exec(select(Job)).all()}
+        return sorted(
+            torrent.title for torrent in session.exec(select(Torrent)).all()
+            if str(torrent.id) in ids and torrent.download_status == "pending"
+        )
+
+
+class TestSelectOnSave:
+
+    @pytest.fixture(autouse=True)
+    def selector(self, monkeypatch):
+        monkeypatch.setattr(release, "selector", ReleaseSelector(groups=["LoliHouse", "ANi"]))
+
+    @pytest.mark.asyncio
+    async def test_only_winner_is_queued(self, db_engine):
+        await crud.save_parsed_rss_result(*releases((ANI_720, GB), (ANI_1080, GB), (LOLIHOUSE, GB)))
+        assert queued_titles(db_engine) == [LOLIHOUSE]
+        with Session(db_engine) as session:
+            statuses = sorted(t.download_status for t in session.exec(select(Torrent)).all())
+            assert statuses == ["pending", "skipped", "skipped"]
+            assert len(session.exec(select(Job)).all()) == 1
+
+    @pytest.mark.asyncio
+    async def test_better_release_replaces_pending(self, db_engine):
+        await crud.save_parsed_rss_result(*releases((ANI_1080, GB)))
+        # 较差的版本不替换
+        await crud.save_parsed_rss_result(*releases((ANI_720, GB)))
+        assert queued_titles(db_engine) == [ANI_1080]
+
+        await crud.save_parsed_rss_result(*releases((LOLIHOUSE, GB)))
+        assert queued_titles(db_engine) == [LOLIHOUSE]
+        await crud.save_parsed_rss_result(*releases((LOLIHOUSE_V2, GB)))
+        assert queued_titles(db_engine) == [LOLIHOUSE_V2]
+        with Session(db_engine) as session:
+            assert len(session.exec(select(Job)).all()) == 1
+
+    @pytest.mark.asyncio
+    async def test_started_release_is_kept(self, db_engine):
+        await crud.save_parsed_rss_result(*releases((ANI_1080, GB)))
+        # 种子文件正在获取
+        with Session(db_engine) as session:
+            session.exec(update(Job).values(status="running"))
+            session.commit()
+        await crud.save_parsed_rss_result(*releases((LOLIHOUSE, GB)))
+
+        # 已提交给下载器
+        with Session(db_engine) as session:
+            session.exec(update(Job).values(status="done"))
+            session.exec(update(Torrent).where(Torrent.title == ANI_1080).values(download_status="downloading"))
+            session.commit()
+        await crud.save_parsed_rss_result(*releases((LOLIHOUSE_V2, GB)))
+
+        with Session(db_engine) as session:
+            statuses = {t.title: t.download_status for t in session.exec(select(Torrent)).all()}
+            assert len(session.exec(select(Job)).all()) == 1
+        assert statuses == {ANI_1080: "downloading", LOLIHOUSE: "skipped", LOLIHOUSE_V2: "skipped"}
+
+    @pytest.mark.asyncio
+    async def test_batches_are_not_selected(self, db_engine):
+        batch = "[DBD-Raws][间谍过家家][01-12TV全集][1080P][BDRip]"
+        await crud.save_parsed_rss_result(*releases((batch, 20 * GB), (ANI_1080, GB)))
+        assert queued_titles(db_engine) == [ANI_1080, batch]
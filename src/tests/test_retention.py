@@ -0,0 +1,122 @@
+from datetime import timedelta
+
+import pytest
+from sqlmodel import Session, select
+
+from ani_bot.core import db as core_db
+from ani_bot.db import crud
+from ani_bot.db.models import Anime, Episode, EventLog, Job, OrganizeOp, ParsedAnime, ParsedEpisode, ParsedTorrent, PrunedTorrent, Torrent
+from ani_bot.events import EventBroker, EventRelay, broker
+from ani_bot.retention import RetentionManager
+
+
+def seed(engine):
+    old = crud.utcnow() - timedelta(days=200)
+    watching = Anime(original_title="watching")
+    dropped = Anime(original_title="dropped", status="dropped")
+    downloaded = Episode(anime_id=watching.id, episode_number=1, download_status="downloaded")
+    pending = Episode(anime_id=watching.id, episode_number=2)
+    dropped_episode = Episode(anime_id=dropped.id, episode_number=1)
+
+    rows = [watching, dropped, downloaded, pending, dropped_episode]
+    # 已下载剧集：1 个已整理 + 5 个其他字幕组的 pending 种子
+    rows.append(Torrent(anime_id=watching.id, episode_id=downloaded.id, download_status="organized"))
+    superseded = [Torrent(anime_id=watching.id, episode_id=downloaded.id, torrent_url=f"s{i}") for i in range(5)]
+    rows += superseded
+    rows.append(Torrent(anime_id=watching.id, episode_id=pending.id, created_at=old))
+    rows += [Torrent(anime_id=dropped.id, episode_id=dropped_episode.id, torrent_url=f"d{i}", created_at=old)
+             for i in range(3)]
+    rows.append(Job(kind="fetch_torrent", dedupe_key=f"fetch_torrent:{superseded[0].id}", run_at=old))
+    rows.append(Job(kind="noop", status="done", updated_at=old))
+    rows.append(OrganizeOp(torrent_id=downloaded.id, status="failed", updated_at=old))
+    rows.append(OrganizeOp(torrent_id=downloaded.id, status="planned", updated_at=old))
+    rows.append(PrunedTorrent(torrent_url="expired", pruned_at=old))
+
+    with Session(engine) as session:
+        session.add_all(rows)
+        session.commit()
+
+
+class TestRetentionManager:
+
+    @pytest.mark.asyncio
+    async def test_prune(self, db_engine):
+        seed(db_engine)
+        result = await RetentionManager(batch_size=2).prune()
+
+        assert result == {
+            "superseded_torrents": 5,
+            "dropped_torrents": 3,
+            "dropped_episodes": 1,
+            "jobs": 1,
+            "organize_ops": 1,
+            "events": 0,
+            "tombstones": 1,
+        }
+        with Session(db_engine) as session:
+            statuses = sorted(t.download_status for t in session.exec(select(Torrent)).all())
+            assert statuses == ["organized", "pending"]
+            assert len(session.exec(select(Episode)).all()) == 2
+            # 被清理种子的待执行下载任务一并取消
+            assert session.exec(select(Job)).all() == []
+            # 未完成的整理操作保留，刚清理的种子 URL 记录保留
+            assert [op.status for op in session.exec(select(OrganizeOp)).all()] == ["planned"]
+            tombstones = set(session.exec(select(PrunedTorrent.torrent_url)).all())
+            assert "expired" not in tombstones and len(tombstones) == 8
+
+    @pytest.mark.asyncio
+    async def test_pruned_torrents_not_reinserted(self, db_engine):
+        """清理后 RSS 仍包含同样的条目，再次轮询不重新入库、不产生事件和下载任务"""
+        seed(db_engine)
+        await RetentionManager().prune()
+
+        feeds = [
+            (ParsedAnime(original_title="watching"), [ParsedEpisode(episode_number=1)] * 5,
+             [ParsedTorrent(torrent_url=f"s{i}") for i in range(5)]),
+            (ParsedAnime(original_title="dropped"), [ParsedEpisode(episode_number=1)] * 3,
+             [ParsedTorrent(torrent_url=f"d{i}") for i in range(3)]),
+        ]
+        with broker.subscribe() as subscription:
+            await crud.save_parsed_rss_results(feeds)
+            assert await subscription.get(0) is None
+
+        with Session(db_engine) as session:
+            assert len(session.exec(select(Torrent)).all()) == 2
+            assert len(session.exec(select(Episode)).all()) == 2
+            assert session.exec(select(Job)).all() == []
+
+    @pytest.mark.asyncio
+    async def test_event_ids_not_reused(self, db_engine):
+        """清理全部过期事件后新事件的 ID 仍然递增，清理前启动的 EventRelay 能收到"""
+        old = crud.utcnow() - timedelta(days=30)
+        torrent = Torrent()
+        with Session(db_engine) as session:
+            session.add_all([EventLog(type="torrent.status", data="{}", created_at=old) for _ in range(3)])
+            session.add(torrent)
+            session.commit()
+            torrent_id = torrent.id
+
+        worker = EventBroker()
+        relay = EventRelay(worker, crud.get_events, interval=3600)
+        await relay.start()
+        try:
+            with worker.subscribe() as subscription:
+                assert (await RetentionManager().prune())["events"] == 2
+                await crud.update_torrent_download(torrent_id, "downloading")
+                assert await relay.poll() == 1
+                event = await subscription.get(0)
+                assert event.type == "torrent.status" and event.id == 4
+        finally:
+            await relay.stop()
+
+    @pytest.mark.asyncio
+    async def test_run_compacts(self, db_engine):
+        seed(db_engine)
+        await RetentionManager().run(full_vacuum=True)
+
+        stats = core_db.database_stats()
+        if stats["dialect"] == "sqlite":
+            assert stats["auto_vacuum"] == "incremental"
+        assert stats["tables"]["torrent"]["rows"] == 2
+        # 增量模式下再次运行
+        await RetentionManager().run()
@@ -1,9 +1,16 @@
 import asyncio
+import os
+from datetime import datetime, timedelta, timezone
 import pytest
 from unittest.mock import AsyncMock, Mock, patch
 from typing import List
 
-from ani_bot.rss import RSSParseTask, fetch_rss_feed, fetch_all_rss, parse_torrent
+from ani_bot.profiling import TraceBuffer
+from ani_bot.rss import RSSParseTask, fetch_rss_feed, fetch_all_rss, parse_torrent, _parsers
+from ani_bot.scheduler import AsyncScheduler
+
+XML_BACKENDS = [name for name in ('mikan:etree', 'mikan:lxml') if name in _parsers]
+BANGUMI_XML = os.path.join(os.path.dirname(__file__), '..', 'ani_bot', 'resources', 'Bangumi.xml')
 
 
 @pytest.fixture
@@ -52,15 +59,15 @@ class TestRSSParseTask:
         async def mock_get_rss_sources():
             return ["https://test.com/rss"]
         
-        # mock fetch_all_rss函数返回示例内容
-        async def mock_fetch_all_rss(urls):
-            yield sample_rss_content
+        # mock fetch_feed函数返回示例内容
+        async def mock_fetch_feed(session, url):
+            return sample_rss_content
         
         # 创建任务实例
         task = RSSParseTask(mock_get_rss_sources, mock_save_parse_result)
         
-        # 使用mock替换fetch_all_rss函数
-        with patch('ani_bot.rss.fetch_all_rss', side_effect=mock_fetch_all_rss):
+        # 使用mock替换fetch_feed函数
+        with patch('ani_bot.rss.fetch_feed', side_effect=mock_fetch_feed):
             # 执行任务
             await task.run()
             
@@ -82,6 +89,76 @@ class TestRSSParseTask:
         mock_save_parse_result.assert_not_called()
 
 
+class TestRSSPipeline:
+
+    @staticmethod
+    def make_task(urls, save, **kwargs):
+        async def get_rss_sources():
+            return urls
+        return RSSParseTask(get_rss_sources, save, traces=TraceBuffer(), **kwargs)
+
+    @pytest.mark.asyncio
+    async def test_backpressure_bounds_buffered_bodies(self, sample_rss_content):
+        """写库变慢时下载在有界队列处等待，已下载未保存的响应体数量有上限"""
+        state = {"held": 0, "peak": 0, "saved": 0}
+
+        async def fetch(session, url):
+            state["held"] += 1
+            state["peak"] = max(state["peak"], state["held"])
+            return sample_rss_content
+
+        async def save(anime, episodes, torrents):
+            await asyncio.sleep(0.005)
+            state["held"] -= 1
+            state["saved"] += 1
+
+        urls = [f"https://test.com/rss/{i}" for i in range(40)]
+        task = self.make_task(urls, save, fetch_workers=8, parse_workers=2, queue_size=2)
+        with patch('ani_bot.rss.fetch_feed', side_effect=fetch):
+            await task.run()
+
+        assert state["saved"] == 40
+        # 两级队列 + 各阶段 worker 手中的条目
+        assert state["peak"] <= 2 * 2 + 8 + 2 + 1
+        trace = task.traces.recent(1)[0]
+        assert max(trace.queue_peaks.values()) <= 2
+        assert all(stats["queued"] == 0 and stats["busy"] == 0 for stats in task.stage_stats().values())
+
+    @pytest.mark.asyncio
+    async def test_scheduler_stop(self, sample_rss_content):
+        """stop 等待当前轮询完成；超时后取消流水线的全部 worker"""
+        saved = []
+
+        async def fetch(session, url):
+            return sample_rss_content
+
+        async def save(anime, episodes, torrents):
+            await asyncio.sleep(0.05)
+            saved.append(anime)
+
+        task = self.make_task([f"https://test.com/rss/{i}" for i in range(4)], save)
+        with patch('ani_bot.rss.fetch_feed', side_effect=fetch):
+            scheduler = AsyncScheduler()
+            await scheduler.start()
+            scheduler.add_task(task.run, interval=3600)
+            await asyncio.sleep(0.01)
+            await scheduler.stop(timeout=1)
+            assert len(saved) == 4
+
+            tasks_before = len(asyncio.all_tasks())
+            await scheduler.start()
+            scheduler.add_task(task.run, interval=3600)
+            for _ in range(100):
+                await asyncio.sleep(0.01)
+                if task.stage_stats()["save"]["busy"]:
+                    break
+            assert task.stage_stats()["save"]["busy"] == 1
+            await scheduler.stop()
+            assert len(saved) < 8
+            assert len(asyncio.all_tasks()) == tasks_before
+            assert task.stage_stats()["parse"]["queued"] == 0
+
+
 class TestFetchFunctions:
     
     @pytest.mark.asyncio
@@ -177,6 +254,31 @@ class TestParseTorrent:
         with pytest.raises(ValueError, match="Invalid RSS: no <channel> found"):
             parse_torrent(no_channel_rss)
 
+    @pytest.mark.parametrize("rss_type", XML_BACKENDS)
+    def test_xml_backends_agree(self, rss_type, sample_rss_content):
+        """各 XML 后端的解析结果一致"""
+        with open(BANGUMI_XML, encoding='utf-8') as f:
+            mikan_rss = f.read()
+
+        for data in (sample_rss_content, mikan_rss):
+            expected = parse_torrent(data, 'mikan:etree')
+            anime, episode_list, torrent_list = parse_torrent(data, rss_type)
+            assert anime.original_title == expected[0].original_title
+            assert [e.original_title for e in episode_list] == [e.original_title for e in expected[1]]
+            assert [(t.torrent_url, t.size, t.publish_date) for t in torrent_list] == \
+                [(t.torrent_url, t.size, t.publish_date) for t in expected[2]]
+
+        anime, episode_list, torrent_list = parse_torrent(mikan_rss, rss_type)
+        assert anime.original_title == "Mikan Project - 古诺希亚"
+        assert torrent_list[0].size == 483498400
+
+    def test_publish_date_is_utc(self):
+        """蜜柑的 pubDate 为不带时区的北京时间，统一转换为 UTC"""
+        with open(BANGUMI_XML, encoding='utf-8') as f:
+            _, _, torrent_list = parse_torrent(f.read())
+        assert torrent_list[0].publish_date == datetime(2026, 1, 10, 16, 31, 24, 196106, tzinfo=timezone.utc)
+        assert torrent_list[0].publish_date.utcoffset() == timedelta(0)
+
 
 if __name__ == "__main__":
     # 可以直接运行测试
@@ -0,0 +1,74 @@
+import pytest
+from sqlmodel import Session
+
+from ani_bot.db import search as db_search
+from ani_bot.db.models import Anime, Torrent
+from ani_bot.db.search import fts_query, init_search
+
+
+TITLES = [
+    "[ANi] 鬼灭之刃 锻刀村篇 - 01 [1080P][Baha][WEB-DL]",
+    "[LoliHouse] 鬼灭之刃 柱训练篇 / Kimetsu no Yaiba - 02 [1080p]",
+    "[ANi] GNOSIA / グノーシア - 13 [1080P][Baha][WEB-DL]",
+]
+
+
+def test_fts_query_escaping():
+    assert fts_query('鬼灭之刃  "x" OR') == '"鬼灭之刃" """x""" "OR"'
+
+
+class TestSearch:
+
+    def test_ranked_and_paginated(self, db_engine):
+        with Session(db_engine) as session:
+            session.add_all(Torrent(title=title) for title in TITLES)
+            session.commit()
+
+            data, count = db_search.search(session, "鬼灭之刃", kind="torrent", limit=1)
+            assert count == 2 and len(data) == 1
+            page2, _ = db_search.search(session, "鬼灭之刃", kind="torrent", skip=1, limit=1)
+            assert {data[0]["title"], page2[0]["title"]} == set(TITLES[:2])
+
+            # 日文与英文片段，大小写不敏感
+            assert db_search.search(session, "グノーシア", kind="torrent")[1] == 1
+            assert db_search.search(session, "kimetsu yaiba", kind="torrent")[1] == 1
+            # 少于 3 个字符的关键字回退为 LIKE
+            assert db_search.search(session, "鬼灭", kind="torrent")[1] == 2
+
+    def test_index_follows_writes(self, db_engine):
+        """触发器保持索引与表数据同步"""
+        with Session(db_engine) as session:
+            anime = Anime(original_title="Mikan Project - 古诺希亚")
+            session.add(anime)
+            session.commit()
+            assert db_search.search(session, "古诺希亚")[1] == 1
+
+            anime.title = "GNOSIA"
+            session.add(anime)
+            session.commit()
+            [result], _ = db_search.search(session, "gnosia")
+            assert result["id"] == str(anime.id)
+
+            session.delete(anime)
+            session.commit()
+            assert db_search.search(session, "古诺希亚")[1] == 0
+
+    def test_rebuild_existing_rows(self, tmp_path):
+        """已有数据库首次创建索引时导入现有数据"""
+        from sqlmodel import SQLModel, create_engine
+
+        engine = create_engine(f"sqlite:///{tmp_path / 'old.db'}")
+        SQLModel.metadata.create_all(bind=engine)
+        with Session(engine) as session:
+            session.add(Torrent(title=TITLES[0]))
+            session.commit()
+
+        init_search(engine)
+        init_search(engine)  # 重复执行无副作用
+        with Session(engine) as session:
+            assert db_search.search(session, "锻刀村", kind="torrent")[1] == 1
+        engine.dispose()
+
+    def test_invalid_type(self, db_engine):
+        with Session(db_engine) as session, pytest.raises(ValueError):
+            db_search.search(session, "abc", kind="rssfeed")
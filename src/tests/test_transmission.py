@@ -0,0 +1,130 @@
+from collections import Counter
+
+import pytest
+import pytest_asyncio
+from aiohttp import web
+
+from ani_bot.downloader.bt_downloader import TransmissionDownloader
+
+
+SESSION_ID = "abc123"
+
+
+@pytest_asyncio.fixture
+async def fake_transmission(tmp_path):
+    """本地 Transmission RPC 服务器"""
+    calls = Counter()
+    requests = []
+    torrents = {}
+
+    async def rpc(request):
+        if request.headers.get("X-Transmission-Session-Id") != SESSION_ID:
+            calls["409"] += 1
+            return web.Response(status=409, headers={"X-Transmission-Session-Id": SESSION_ID})
+
+        body = await request.json()
+        method, arguments = body["method"], body["arguments"]
+        calls[method] += 1
+        requests.append(body)
+
+        if method == "torrent-add":
+            torrent_id = len(torrents) + 1
+            torrent = {"id": torrent_id, "hashString": f"hash{torrent_id}", "name": f"t{torrent_id}",
+                       "status": 4, "percentDone": 0.5, "peers": [], "files": []}
+            torrents[torrent_id] = torrent
+            added = {key: torrent[key] for key in ("id", "hashString", "name")}
+            return web.json_response({"result": "success", "arguments": {"torrent-added": added}})
+
+        if method == "torrent-get":
+            selected = list(torrents.values())
+            if arguments.get("ids") == "recently-active":
+                selected = selected[-1:]
+            fields = arguments["fields"]
+            result = {"torrents": [{key: t[key] for key in fields if key in t} for t in selected]}
+            if arguments.get("ids") == "recently-active":
+                result["removed"] = [1]
+            return web.json_response({"result": "success", "arguments": result})
+
+        return web.json_response({"result": "success", "arguments": {}})
+
+    app = web.Application()
+    app.router.add_post("/transmission/rpc", rpc)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+
+    downloader = TransmissionDownloader({
+        "url": f"http://127.0.0.1:{runner.addresses[0][1]}/transmission/rpc",
+        "download.save_path": str(tmp_path / "downloads"),
+    })
+    yield downloader, calls, requests
+    await downloader.close()
+    await runner.cleanup()
+
+
+class TestTransmissionDownloader:
+
+    @pytest.mark.asyncio
+    async def test_session_id_negotiated_once(self, fake_transmission, tmp_path):
+        downloader, calls, requests = fake_transmission
+        torrent_file = tmp_path / "a.torrent"
+        torrent_file.write_bytes(b"d4:infod4:name1:xee")
+
+        results = await downloader.add_torrents([
+            (str(torrent_file), None),
+            ("magnet:?xt=urn:btih:abc", "/anime/a"),
+            ("https://mikanime.tv/Download/b.torrent", None),
+        ])
+        assert results == [True, True, True]
+        assert await downloader.add_magnet("magnet:?xt=urn:btih:def")
+        # 只有第一批请求遇到 409，之后复用缓存的会话ID
+        assert calls["409"] <= 3
+        assert calls["torrent-add"] == 4
+
+        # 本地种子文件以 metainfo 上传，URL 和磁力链接以 filename 提交
+        added = [request["arguments"] for request in requests]
+        assert sum("metainfo" in a for a in added) == 1
+        assert sum("filename" in a for a in added) == 3
+        assert any(a["download-dir"] == "/anime/a" for a in added)
+
+    @pytest.mark.asyncio
+    async def test_incremental_poll(self, fake_transmission):
+        downloader, calls, requests = fake_transmission
+        await downloader.add_torrents([("magnet:?xt=urn:btih:a", None), ("magnet:?xt=urn:btih:b", None)])
+
+        changed = await downloader.poll_statuses()
+        assert set(changed) == {"hash1", "hash2"}
+        assert changed["hash1"]["state"] == "downloading"
+        # 只请求需要的字段
+        assert "peers" not in changed["hash1"]
+
+        changed = await downloader.poll_statuses()
+        assert set(changed) == {"hash2"}
+        assert set(downloader.torrents) == {"hash2"}  # id 1 被移除
+
+        gets = [r["arguments"] for r in requests if r["method"] == "torrent-get"]
+        assert "ids" not in gets[0]
+        assert gets[1]["ids"] == "recently-active"
+        assert gets[1]["fields"] == TransmissionDownloader.STATUS_FIELDS
+
+    @pytest.mark.asyncio
+    async def test_remove_by_id_or_hash(self, fake_transmission):
+        downloader, calls, requests = fake_transmission
+        await downloader.add_torrents([("magnet:?xt=urn:btih:a", None), ("magnet:?xt=urn:btih:b", None)])
+        await downloader.poll_statuses()
+
+        # 数字 id 和 hashString 都会同时清理两个映射
+        assert await downloader.remove_download(1)
+        assert await downloader.remove_download("hash2")
+        assert downloader.torrents == {} and downloader._ids == {}
+        removes = [r["arguments"]["ids"] for r in requests if r["method"] == "torrent-remove"]
+        assert removes == [[1], ["hash2"]]
+
+    def test_download_dir_optional(self, tmp_path, monkeypatch):
+        monkeypatch.chdir(tmp_path)
+        downloader = TransmissionDownloader({"download.save_path": None})
+        # 未配置下载目录时交给 Transmission 使用默认目录，也不在本地创建目录
+        assert "download-dir" not in downloader._add_arguments("magnet:?xt=urn:btih:abc", None)
+        assert downloader._add_arguments("magnet:?xt=urn:btih:abc", "/anime/a")["download-dir"] == "/anime/a"
+        assert list(tmp_path.iterdir()) == []
@@ -0,0 +1,70 @@
+import asyncio
+
+import pytest
+from sqlmodel import Session, select
+
+from ani_bot.db import crud
+from ani_bot.db.models import Anime, Torrent
+from ani_bot.rss import parse_torrent
+from ani_bot.writebehind import WriteBehindBuffer
+from benchmarks.bench_parse import make_feed
+
+
+class TestWriteBehindBuffer:
+
+    @pytest.mark.asyncio
+    async def test_size_and_time_thresholds(self):
+        batches = []
+        committed = []
+
+        async def flush(items):
+            batches.append(list(items))
+
+        buffer = WriteBehindBuffer(flush, max_items=3, max_delay=0.05, on_commit=committed.extend)
+        futures = [await buffer.add(i) for i in range(4)]
+        # 第 3 条触发写入，第 4 条等待定时写入
+        assert batches == [[(0,), (1,), (2,)]]
+        assert all(f.done() for f in futures[:3]) and not futures[3].done()
+
+        await futures[3]
+        assert batches[1] == [(3,)]
+        assert committed == [(0,), (1,), (2,), (3,)]
+        assert buffer.stats() == {"buffered": 0, "flushes": 2, "committed": 4, "failed": 0}
+
+    @pytest.mark.asyncio
+    async def test_close_flushes_remaining(self):
+        batches = []
+
+        async def flush(items):
+            batches.append(list(items))
+
+        buffer = WriteBehindBuffer(flush, max_items=100, max_delay=3600)
+        future = await buffer.add("a", "b")
+        await buffer.close()
+        assert batches == [[("a", "b")]] and future.done()
+
+
+@pytest.mark.asyncio
+async def test_group_commit_with_fallback(db_engine):
+    """整批失败时逐条重试，只有坏数据失败"""
+    good = [parse_torrent(make_feed(5)), parse_torrent(make_feed(8))]
+    anime, episodes, torrents = parse_torrent(make_feed(3))
+    bad = (anime, episodes, torrents[:-1])
+
+    buffer = WriteBehindBuffer(crud.save_parsed_rss_results, max_items=10, fallback=crud.save_parsed_rss_result)
+    futures = [await buffer.add(*result) for result in (good[0], bad, good[1])]
+    await buffer.close()
+
+    assert futures[0].exception() is None and futures[2].exception() is None
+    assert isinstance(futures[1].exception(), ValueError)
+    with Session(db_engine) as session:
+        # 两个源属于同一部动漫，同一事务内不会重复创建
+        assert len(session.exec(select(Anime)).all()) == 1
+        assert len(session.exec(select(Torrent)).all()) == 8
+
+
+@pytest.mark.asyncio
+async def test_save_parsed_rss_results_single_transaction(db_engine):
+    await crud.save_parsed_rss_results([parse_torrent(make_feed(4)), parse_torrent(make_feed(6))])
+    with Session(db_engine) as session:
+        assert len(session.exec(select(Torrent)).all()) == 6